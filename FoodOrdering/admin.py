@@ -12,6 +12,7 @@ from .models import (
     ProductOptionGroup,
     OrderItemOption,
     Event,
+    Job,
 )
 
 # -------------------------
@@ -100,8 +101,8 @@ class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
     autocomplete_fields = ("product",)
-    fields = ("product", "quantity", "price_at_time")
-    readonly_fields = ()
+    fields = ("product", "quantity", "price_at_time", "line_total")
+    readonly_fields = ("line_total",)
     show_change_link = True
 
 
@@ -113,6 +114,11 @@ class OrderAdmin(admin.ModelAdmin):
     ordering = ("-created_at",)
     inlines = [OrderItemInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # items may have been added/changed/deleted in the inline
+        form.instance.recalculate_total()
+
     def total_price_display(self, obj):
         return f"{obj.total_price():.2f} €"
     total_price_display.short_description = "Total"
@@ -126,6 +132,12 @@ class OrderItemAdmin(admin.ModelAdmin):
     autocomplete_fields = ("order", "product")
     inlines = [OrderItemOptionInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # chosen options may have changed in the inline
+        form.instance.recalculate_totals()
+        form.instance.order.recalculate_total()
+
     def unit_total_display(self, obj):
         return f"{obj.unit_total():.2f} €"
     unit_total_display.short_description = "Unit total"
@@ -181,3 +193,16 @@ class EventAdmin(admin.ModelAdmin):
             return format_html('<img src="{}" style="height:40px; width:auto; border-radius:6px;" />', obj.image.url)
         return "-"
     image_preview.short_description = "Image"
+
+
+# -------------------------
+# BACKGROUND JOBS
+# -------------------------
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "max_attempts", "run_at", "created_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "key")
+    readonly_fields = ("key", "attempts", "locked_at", "last_error", "created_at", "updated_at")
+    ordering = ("-created_at",)
@@ -0,0 +1,225 @@
+"""
+Sales rollups: hourly and daily summaries for the dashboard charts.
+
+Sales are placed orders that are not cancelled, bucketed by `placed_at`
+(local time). SalesRollup holds orders/revenue per payment method (cash vs
+Stripe; the average basket is revenue / orders), ProductSalesRollup and
+OptionSalesRollup the quantities and revenue per product and option.
+
+`refresh()` (management command refresh_sales_rollups, run from cron) is
+incremental: it only looks at what changed since the RollupWatermark, i.e.
+orders placed since then plus orders cancelled/un-cancelled since then (from
+the status log), and rebuilds just the days those fall on. A day is rebuilt
+from scratch (delete + insert in one transaction: three grouped queries for
+its hours, the day rows summed from them), so a refresh can be re-run at any
+time. The watermark stays ROLLUP_LAG behind the clock so transactions still
+in flight aren't skipped. Edits outside the status flow (admin site, shell)
+need `refresh_sales_rollups --rebuild`.
+
+The charts (`sales_overview()`) read only the rollup tables: a fixed number
+of queries however many orders exist.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from .dashboard import day_start
+from .models import (
+    OptionSalesRollup, Order, OrderItem, OrderItemOption, OrderStatusEvent, ProductSalesRollup, RollupWatermark,
+    SalesRollup,
+)
+
+WATERMARK = "sales"
+ROLLUP_LAG = timedelta(minutes=2)
+ROLLUP_MODELS = (SalesRollup, ProductSalesRollup, OptionSalesRollup)
+TOP_N = 10
+
+
+def _sales(qs, prefix=""):
+    """Restrict an Order (or related) queryset to placed, not cancelled orders."""
+    return qs.exclude(**{f"{prefix}status": "CART"}).exclude(**{f"{prefix}status": "CANCELLED"})
+
+
+# -----------------------------
+# REFRESH
+# -----------------------------
+
+def dirty_days(since, until):
+    """Local dates whose sales may have changed in (since, until]; all days if `since` is None."""
+    placed = Order.objects.exclude(status="CART").filter(placed_at__lte=until)
+    placed = placed.filter(placed_at__gt=since) if since else placed.filter(placed_at__isnull=False)
+    days = set(placed.annotate(day=TruncDate("placed_at")).values_list("day", flat=True).distinct())
+    if since:
+        # cancelling (or restoring) an order changes the day it was placed on
+        changed = (
+            OrderStatusEvent.objects.filter(created_at__gt=since, created_at__lte=until)
+            .filter(Q(to_status="CANCELLED") | Q(from_status="CANCELLED"), order__placed_at__isnull=False)
+            .annotate(day=TruncDate("order__placed_at"))
+            .values_list("day", flat=True)
+            .distinct()
+        )
+        days.update(changed)
+    return sorted(days)
+
+
+def hourly_sales_query(start, end):
+    """Orders/revenue per local hour and payment method for orders placed in [start, end)."""
+    return (
+        _sales(Order.objects.filter(placed_at__gte=start, placed_at__lt=end))
+        .annotate(hour=TruncHour("placed_at"))
+        .values("hour", "payment_method")
+        .annotate(orders=Count("id"), revenue=Sum("total_amount"))
+        .order_by()
+    )
+
+
+def _hour_rows(start, end):
+    """(sales, products, options) grouped by local hour for orders placed in [start, end)."""
+    sales = hourly_sales_query(start, end)
+    products = (
+        _sales(OrderItem.objects.filter(order__placed_at__gte=start, order__placed_at__lt=end), "order__")
+        .annotate(hour=TruncHour("order__placed_at"))
+        .values("hour", "product_id")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("line_total"))
+        .order_by()
+    )
+    option_revenue = ExpressionWrapper(
+        F("price_delta_at_time") * F("order_item__quantity"), output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+    options = (
+        _sales(
+            OrderItemOption.objects.filter(
+                order_item__order__placed_at__gte=start, order_item__order__placed_at__lt=end
+            ),
+            "order_item__order__",
+        )
+        .annotate(hour=TruncHour("order_item__order__placed_at"))
+        .values("hour", "option_id")
+        .annotate(quantity=Sum("order_item__quantity"), revenue=Sum(option_revenue))
+        .order_by()
+    )
+    return list(sales), list(products), list(options)
+
+
+@transaction.atomic
+def rebuild_day(day):
+    """Replace the hour and day rollups of one local date from the raw orders."""
+    start, end = day_start(day), day_start(day + timedelta(days=1))
+    for model in ROLLUP_MODELS:
+        model.objects.filter(period_start__gte=start, period_start__lt=end).delete()
+
+    sales, products, options = _hour_rows(start, end)
+    specs = (
+        (SalesRollup, sales, "payment_method", ("orders", "revenue")),
+        (ProductSalesRollup, products, "product_id", ("quantity", "revenue")),
+        (OptionSalesRollup, options, "option_id", ("quantity", "revenue")),
+    )
+    for model, rows, key, measures in specs:
+        day_totals = defaultdict(lambda: dict.fromkeys(measures, 0))
+        hour_objs = []
+        for row in rows:
+            values = {m: row[m] or 0 for m in measures}
+            hour_objs.append(model(period="hour", period_start=row["hour"], **{key: row[key]}, **values))
+            for m in measures:
+                day_totals[row[key]][m] += values[m]
+        model.objects.bulk_create(hour_objs + [
+            model(period="day", period_start=start, **{key: k}, **values) for k, values in day_totals.items()
+        ])
+
+
+def refresh(now=None, rebuild=False):
+    """Bring the rollups up to `now - ROLLUP_LAG`; returns the rebuilt days."""
+    until = (now or timezone.now()) - ROLLUP_LAG
+    watermark = RollupWatermark.objects.filter(name=WATERMARK).first()
+    since = None if rebuild or watermark is None else watermark.position
+    if since is None:
+        for model in ROLLUP_MODELS:
+            model.objects.all().delete()
+
+    days = dirty_days(since, until)
+    for day in days:
+        rebuild_day(day)
+    # advanced only after every day is done: a failed run is simply repeated
+    RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={"position": until})
+    return days
+
+
+# -----------------------------
+# DASHBOARD
+# -----------------------------
+
+def _share(value, maximum):
+    return round(value / maximum * 100) if maximum else 0
+
+
+def _avg(revenue, orders):
+    return (revenue / orders).quantize(Decimal("0.01")) if orders else Decimal("0.00")
+
+
+def sales_overview(days=14, today=None):
+    """Chart data for the last `days` local days, from the rollups only (5 queries)."""
+    today = today or timezone.localdate()
+    first = today - timedelta(days=days - 1)
+    start, end = day_start(first), day_start(today + timedelta(days=1))
+    in_range = {"period_start__gte": start, "period_start__lt": end}
+
+    per_day = {first + timedelta(days=i): {"orders": 0, "revenue": Decimal("0.00"), "methods": {}} for i in range(days)}
+    methods = defaultdict(lambda: {"orders": 0, "revenue": Decimal("0.00")})
+    for row in SalesRollup.objects.filter(period="day", **in_range).values("period_start", "payment_method", "orders", "revenue"):
+        entry = per_day[timezone.localtime(row["period_start"]).date()]
+        entry["orders"] += row["orders"]
+        entry["revenue"] += row["revenue"]
+        method = row["payment_method"] or "?"
+        entry["methods"][method] = entry["methods"].get(method, Decimal("0.00")) + row["revenue"]
+        methods[method]["orders"] += row["orders"]
+        methods[method]["revenue"] += row["revenue"]
+
+    by_hour = defaultdict(int)
+    for period_start, orders in SalesRollup.objects.filter(period="hour", **in_range).values_list("period_start", "orders"):
+        by_hour[timezone.localtime(period_start).hour] += orders
+
+    products = list(
+        ProductSalesRollup.objects.filter(period="day", **in_range)
+        .values("product__name")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"))
+        .order_by("-revenue", "product__name")[:TOP_N]
+    )
+    options = list(
+        OptionSalesRollup.objects.filter(period="day", **in_range)
+        .values("option__group__name", "option__name")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"))
+        .order_by("-quantity", "option__name")[:TOP_N]
+    )
+    watermark = RollupWatermark.objects.filter(name=WATERMARK).values_list("position", flat=True).first()
+
+    total_orders = sum(d["orders"] for d in per_day.values())
+    total_revenue = sum((d["revenue"] for d in per_day.values()), Decimal("0.00"))
+    max_revenue = max((d["revenue"] for d in per_day.values()), default=0)
+    max_hour = max(by_hour.values(), default=0)
+    max_product = max((p["revenue"] for p in products), default=0)
+    return {
+        "days": [
+            {"date": day, "orders": d["orders"], "revenue": d["revenue"], "avg_basket": _avg(d["revenue"], d["orders"]),
+             "methods": d["methods"], "share": _share(d["revenue"], max_revenue)}
+            for day, d in per_day.items()
+        ],
+        "hours": [
+            {"hour": hour, "orders": by_hour[hour], "share": _share(by_hour[hour], max_hour)}
+            for hour in range(24) if by_hour[hour]
+        ],
+        "products": [{**p, "share": _share(p["revenue"], max_product)} for p in products],
+        "options": options,
+        "payment_methods": [
+            {"method": method, **values, "share": _share(values["revenue"], total_revenue)}
+            for method, values in sorted(methods.items())
+        ],
+        "orders": total_orders,
+        "revenue": total_revenue,
+        "avg_basket": _avg(total_revenue, total_orders),
+        "refreshed_until": watermark,
+    }
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class FoodorderingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'FoodOrdering'
+
+    def ready(self):
+        from . import instrumentation  # noqa: F401  (query wrapper on every new connection)
+        from . import signals  # noqa: F401
+        from . import tasks  # noqa: F401  (registers job handlers)
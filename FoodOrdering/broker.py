@@ -0,0 +1,156 @@
+"""
+Fan-out of order events to live dashboards (server-sent events).
+
+Orders are placed and moved in several processes (web workers, the
+`run_jobs` worker placing webhook orders), so events don't travel in memory
+between them: every transition is already written to the status log
+(OrderStatusEvent, status_log.py) in the same transaction. Each web process
+runs one `OrderEventRelay` thread that, while dashboards are connected,
+polls the log once per RELAY_INTERVAL and publishes new rows to the
+in-process `order_events` broker. Every connected `order_stream` gets the
+event through its own asyncio queue, so N open dashboards cost one poll per
+process instead of N polling queries.
+
+CART -> PLACED rows become `order.placed`, all others `order.status`.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time as time_module
+from datetime import timedelta
+
+from django.db import DatabaseError, close_old_connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .dashboard import get_feed_order, serialize_order
+from .models import OrderStatusEvent
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+RELAY_INTERVAL = 1  # seconds between status log polls
+# Log rows are stamped before their transaction commits; re-read this far back
+# so a row committed late is still published (once: seen ids are remembered).
+RELAY_LOOKBACK = timedelta(seconds=30)
+
+
+class Subscription:
+    def __init__(self, loop, queue):
+        self.loop = loop
+        self.queue = queue
+
+
+def _deliver(queue, event):
+    # Runs on the subscriber's event loop. A dashboard that can't keep up
+    # loses its backlog and is told to reload instead of blocking publishers.
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        event = {"id": event["id"], "type": "resync", "data": {}}
+    queue.put_nowait(event)
+
+
+class OrderEventBroker:
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """Call from the async view; events are delivered on its running loop."""
+        sub = Subscription(asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, event_type, data):
+        """Thread-safe; may be called from sync views running in worker threads."""
+        event = {"id": next(self._ids), "type": event_type, "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(_deliver, sub.queue, event)
+            except RuntimeError:
+                # loop already closed: the connection is gone
+                self.unsubscribe(sub)
+
+
+order_events = OrderEventBroker()
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def publish_order(broker, order_id, event_type):
+    order = get_feed_order(order_id)
+    if order is None:
+        return
+    data = {"order": serialize_order(order)}
+    if event_type == "order.placed":
+        data["html"] = render_to_string("includes/dashboard_order_row.html", {"order": order})
+    broker.publish(event_type, data)
+
+
+class OrderEventRelay:
+    """Publishes new status log rows to `broker`; see module docstring."""
+
+    def __init__(self, broker, interval=RELAY_INTERVAL, lookback=RELAY_LOOKBACK):
+        self.broker = broker
+        self.interval = interval
+        self.lookback = lookback
+        self._lock = threading.Lock()
+        self._thread = None
+        self._started_at = timezone.now()  # history before the relay existed is not replayed
+        self._seen = {}  # status event id -> created_at, pruned after `lookback`
+
+    def poll(self, now=None):
+        """One pass over the recent log (one query, plus the feed rows of new events)."""
+        now = now or timezone.now()
+        since = max(self._started_at, now - self.lookback)
+        rows = (
+            OrderStatusEvent.objects.filter(created_at__gte=since)
+            .order_by("created_at", "id")
+            .values_list("id", "order_id", "from_status", "created_at")
+        )
+        for event_id, order_id, from_status, created_at in rows:
+            if event_id in self._seen:
+                continue
+            self._seen[event_id] = created_at
+            publish_order(self.broker, order_id, "order.placed" if from_status == "CART" else "order.status")
+        self._seen = {event_id: at for event_id, at in self._seen.items() if at >= since}
+
+    def ensure_running(self):
+        """Start the polling thread of this process (idempotent)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="order-event-relay", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time_module.sleep(self.interval)
+            if not self.broker.subscriber_count:
+                continue  # nobody is watching, skip the query
+            try:
+                self.poll()
+            except DatabaseError:
+                logger.exception("order event relay: polling the status log failed")
+            finally:
+                close_old_connections()
+
+
+order_relay = OrderEventRelay(order_events)
@@ -0,0 +1,28 @@
+"""
+Version keys in the Django cache for the in-process caches (menu.py,
+kitchen.py, reservations.py).
+
+A process keeps its copy while the version it was built under is still the
+one in the cache; writers bump the version after commit. With a shared cache
+backend (REDIS_URL) a bump reaches every worker, with the default
+LocMemCache only the process that made it.
+"""
+import uuid
+
+from django.core.cache import cache
+
+
+def get_version(key):
+    """The version stored under `key`, created on first use."""
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() so concurrent first lookups agree on one version
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    """Make every copy built under the current version stale."""
+    cache.set(key, uuid.uuid4().hex, None)
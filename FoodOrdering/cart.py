@@ -0,0 +1,309 @@
+"""
+The shopping cart.
+
+Cart lines live in the user's session, not in the database: browsing, adding
+and removing never create Order rows. The option rules of a product come from
+the menu snapshot (menu.py), so a posted modal form is validated completely in
+memory. Only at checkout is the cart materialized into an Order(status="CART")
+with its OrderItems and OrderItemOptions, using one bulk INSERT per table.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Order, OrderItem, OrderItemOption
+
+SESSION_KEY = "cart"
+COUNT_SESSION_KEY = "cart_count"  # kept next to the cart for the header badge
+CUSTOMER_FIELDS = ("first_name", "last_name", "phone", "street", "postal_code", "city")
+
+
+def cart_count(session):
+    """Number of cart lines without decoding the cart (for /cart/count/)."""
+    return session.get(COUNT_SESSION_KEY, 0)
+
+
+class CartLineError(ValueError):
+    """The posted options do not satisfy the product's option rules."""
+
+
+def _parse_option_ids(raw_ids):
+    ids = []
+    for raw in raw_ids:
+        if not raw:
+            continue  # drop empty
+        try:
+            ids.append(int(raw))
+        except (TypeError, ValueError):
+            return None
+    return ids
+
+
+def validate_options(menu_product, data):
+    """
+    Check the posted `group_<id>` / `group_<id>[]` fields against every option
+    group of `menu_product` and return the chosen options as (group, MenuOption).
+    Raises CartLineError with a user-facing (German) message on the first violation.
+    """
+    chosen = []
+    for group in menu_product.option_groups:
+        min_select = group.min_select
+        max_select = group.max_select
+
+        # If required but min_select is 0, we treat it as 1 (sane UX)
+        if group.is_required and min_select == 0:
+            min_select = 1
+
+        if max_select and max_select > 1:
+            raw_ids = data.getlist(f"group_{group.id}[]")
+        else:
+            v = data.get(f"group_{group.id}")
+            raw_ids = [v] if v else []
+
+        option_ids = _parse_option_ids(raw_ids)
+        if option_ids is None:
+            raise CartLineError(f"Ungültige Auswahl bei: {group.name}")
+
+        count = len(option_ids)
+        if count < min_select:
+            raise CartLineError(f"Bitte wähle mindestens {min_select} Option(en) bei: {group.name}")
+
+        if max_select and count > max_select:
+            raise CartLineError(f"Zu viele Optionen gewählt bei: {group.name} (max. {max_select})")
+
+        # Options must be active and belong to THIS group; no duplicates
+        if len(set(option_ids)) != count or any(i not in group.options_by_id for i in option_ids):
+            raise CartLineError(f"Ungültige Auswahl bei: {group.name}")
+
+        chosen.extend((group, group.options_by_id[i]) for i in option_ids)
+
+    return chosen
+
+
+@dataclass(frozen=True)
+class CartLineOption:
+    option_id: int
+    group: str
+    name: str
+    price_delta: Decimal
+
+
+@dataclass(frozen=True)
+class CartLine:
+    product_id: int
+    name: str
+    price: Decimal  # base price snapshot for ONE unit
+    quantity: int
+    options: tuple
+
+    @property
+    def options_total(self):
+        return sum((o.price_delta for o in self.options), Decimal("0.00"))
+
+    @property
+    def unit_total(self):
+        return self.price + self.options_total
+
+    @property
+    def option_label(self):
+        return OrderItem.build_option_label((o.group, o.name) for o in self.options)
+
+    @property
+    def line_total(self):
+        return self.unit_total * self.quantity
+
+    @classmethod
+    def from_session(cls, data):
+        return cls(
+            product_id=data["product_id"],
+            name=data["name"],
+            price=Decimal(data["price"]),
+            quantity=data["quantity"],
+            options=tuple(
+                CartLineOption(option_id=o[0], group=o[1], name=o[2], price_delta=Decimal(o[3]))
+                for o in data["options"]
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class SummaryLine:
+    product_id: int
+    name: str
+    option_label: str
+    options: tuple  # CartLineOption, only for session carts
+    price: Decimal  # base price for ONE unit
+    unit_total: Decimal  # base + options for ONE unit
+    quantity: int
+    line_total: Decimal
+
+
+@dataclass(frozen=True)
+class CartSummary:
+    """
+    What cart/checkout/success pages and the Stripe payload show, computed once
+    per request: templates read attributes only, nothing queries or re-sums.
+    """
+    lines: tuple
+    total: Decimal
+    customer: dict = field(default_factory=dict)
+
+    @property
+    def count(self):
+        return len(self.lines)
+
+    @classmethod
+    def from_cart(cls, cart):
+        """Session cart: no queries."""
+        lines = tuple(
+            SummaryLine(
+                product_id=line.product_id,
+                name=line.name,
+                option_label=line.option_label,
+                options=line.options,
+                price=line.price,
+                unit_total=line.unit_total,
+                quantity=line.quantity,
+                line_total=line.line_total,
+            )
+            for line in cart.lines
+        )
+        return cls(lines=lines, total=sum((l.line_total for l in lines), Decimal("0.00")), customer=cart.customer)
+
+    @classmethod
+    def from_order(cls, order_id):
+        """Materialized/placed order: one query over its items (stored totals and labels)."""
+        rows = (
+            OrderItem.objects.filter(order_id=order_id)
+            .order_by("id")
+            .values_list("product_id", "product__name", "option_label", "price_at_time", "options_total", "quantity", "line_total")
+        )
+        lines = tuple(
+            SummaryLine(
+                product_id=product_id,
+                name=name,
+                option_label=option_label,
+                options=(),
+                price=price,
+                unit_total=price + options_total,
+                quantity=quantity,
+                line_total=line_total,
+            )
+            for product_id, name, option_label, price, options_total, quantity, line_total in rows
+        )
+        return cls(lines=lines, total=sum((l.line_total for l in lines), Decimal("0.00")))
+
+
+class SessionCart:
+    """
+    Cart stored in `request.session[SESSION_KEY]` as plain JSON:
+
+        {"lines": [{"product_id", "name", "price", "quantity",
+                    "options": [[option_id, group, name, price_delta], ...]}],
+         "customer": {...}, "order_id": <materialized CART order or None>}
+
+    Prices and names are snapshotted when a line is added, like
+    OrderItem.price_at_time / OrderItemOption.price_delta_at_time.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        # Read-only access doesn't mark the session modified (no session write)
+        self._data = session.get(SESSION_KEY) or {"lines": [], "customer": {}, "order_id": None}
+        self.lines = [CartLine.from_session(line) for line in self._data["lines"]]
+
+    def _save(self):
+        self.session[SESSION_KEY] = self._data
+        self.session[COUNT_SESSION_KEY] = len(self.lines)
+        self.session.modified = True
+
+    @property
+    def count(self):
+        # number of lines (not quantities), like the old cart.items.count()
+        return len(self.lines)
+
+    @property
+    def total(self):
+        return sum((line.line_total for line in self.lines), Decimal("0.00"))
+
+    @property
+    def customer(self):
+        return self._data.get("customer") or {}
+
+    @property
+    def order_id(self):
+        return self._data.get("order_id")
+
+    def add(self, menu_product, quantity, chosen):
+        """Append a line; `chosen` is the result of validate_options()."""
+        self._data["lines"].append({
+            "product_id": menu_product.id,
+            "name": menu_product.name,
+            "price": str(menu_product.price),
+            "quantity": quantity,
+            "options": [[opt.id, group.name, opt.name, str(opt.price_delta)] for group, opt in chosen],
+        })
+        self.lines.append(CartLine.from_session(self._data["lines"][-1]))
+        self._save()
+
+    def remove_product(self, product_id):
+        """Remove ALL lines of a product (old behaviour of remove_from_cart)."""
+        keep = [i for i, line in enumerate(self.lines) if line.product_id != product_id]
+        self._data["lines"] = [self._data["lines"][i] for i in keep]
+        self.lines = [self.lines[i] for i in keep]
+        self._save()
+
+    def remove_unavailable(self, snapshot):
+        """Drop lines whose product left the menu; returns the removed names."""
+        removed = [line.name for line in self.lines if snapshot.get_product(line.product_id) is None]
+        if removed:
+            keep = [i for i, line in enumerate(self.lines) if snapshot.get_product(line.product_id) is not None]
+            self._data["lines"] = [self._data["lines"][i] for i in keep]
+            self.lines = [self.lines[i] for i in keep]
+            self._save()
+        return removed
+
+    def set_customer(self, **fields):
+        self._data["customer"] = {k: fields.get(k, "") for k in CUSTOMER_FIELDS}
+        self._save()
+
+    def clear(self):
+        self.session.pop(SESSION_KEY, None)
+        self.session.pop(COUNT_SESSION_KEY, None)
+        self.lines = []
+        self._data = {"lines": [], "customer": {}, "order_id": None}
+
+    @transaction.atomic
+    def materialize(self, **order_fields):
+        """
+        Write the cart as an Order(status="CART") + items + options (3 INSERTs)
+        and remember its id. Each checkout attempt gets a fresh order, so an
+        abandoned Stripe session can still be paid without mixing in later
+        edits; leftovers are removed by `purge_abandoned_carts`.
+        """
+        order = Order.objects.create(status="CART", total_amount=self.total, **order_fields)
+
+        items = []
+        for line in self.lines:
+            item = OrderItem(
+                order=order,
+                product_id=line.product_id,
+                quantity=line.quantity,
+                price_at_time=line.price,
+                options_total=line.options_total,
+                option_label=line.option_label,
+            )
+            item.compute_totals()  # bulk_create skips save()
+            items.append(item)
+        OrderItem.objects.bulk_create(items)
+
+        OrderItemOption.objects.bulk_create([
+            OrderItemOption(order_item=item, option_id=opt.option_id, price_delta_at_time=opt.price_delta)
+            for item, line in zip(items, self.lines)
+            for opt in line.options
+        ])
+
+        self._data["order_id"] = order.id
+        self._save()
+        return order
@@ -0,0 +1,48 @@
+"""
+Stripe Checkout payload for a materialized cart order.
+
+Line items, item count and total come from the order's CartSummary (one
+query over its items): display names use the stored `OrderItem.option_label`
+and amounts the stored totals, so no option/group rows are read and nothing
+is recomputed per line.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from .cart import CartSummary
+
+
+def to_cents(amount):
+    """Stripe wants integer amounts in cents."""
+    return int((amount * 100).quantize(Decimal("1")))
+
+
+def line_item_name(product_name, option_label):
+    return product_name if not option_label else f"{product_name} ({option_label})"
+
+
+@dataclass(frozen=True)
+class CheckoutPayload:
+    line_items: list
+    item_count: int  # lines, like SessionCart.count
+    total: Decimal
+
+    @property
+    def total_cents(self):
+        return to_cents(self.total)
+
+
+def build_checkout_payload(order_id, currency="eur"):
+    summary = CartSummary.from_order(order_id)
+    line_items = [
+        {
+            "price_data": {
+                "currency": currency,
+                "product_data": {"name": line_item_name(line.name, line.option_label)},
+                "unit_amount": to_cents(line.unit_total),
+            },
+            "quantity": line.quantity,
+        }
+        for line in summary.lines
+    ]
+    return CheckoutPayload(line_items=line_items, item_count=summary.count, total=summary.total)
@@ -0,0 +1,251 @@
+"""
+Dashboard (admin_panel) read queries.
+
+Stats are computed in the database with conditional aggregation, and the
+order/reservation lists are paged with a (created_at, id) keyset cursor, so
+the number of queries and rows per request stays fixed no matter how many
+orders/reservations exist.
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import Count, Prefetch, Q, Sum
+from django.utils import timezone
+
+from .models import Order, OrderItem, OrderItemOption, TableReservation
+
+
+def _period_starts(now=None):
+    """Local midnight today, Monday of this week, 1st of this month."""
+    now = timezone.localtime(now or timezone.now())
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "today": today,
+        "week": today - timedelta(days=today.weekday()),
+        "month": today.replace(day=1),
+    }
+
+
+def order_stats(now=None):
+    """Status counts and paid revenue (total / today / week / month) in one query."""
+    starts = _period_starts(now)
+    paid = Q(is_paid=True)
+    stats = Order.objects.exclude(status="CART").aggregate(
+        orders_count=Count("id"),
+        placed_orders=Count("id", filter=Q(status="PLACED")),
+        preparing_orders=Count("id", filter=Q(status="PREPARING")),
+        delivering_orders=Count("id", filter=Q(status="DELIVERING")),
+        completed_orders=Count("id", filter=Q(status="COMPLETED")),
+        cancelled_orders=Count("id", filter=Q(status="CANCELLED")),
+        total_revenue=Sum("total_amount", filter=paid),
+        revenue_today=Sum("total_amount", filter=paid & Q(placed_at__gte=starts["today"])),
+        revenue_week=Sum("total_amount", filter=paid & Q(placed_at__gte=starts["week"])),
+        revenue_month=Sum("total_amount", filter=paid & Q(placed_at__gte=starts["month"])),
+    )
+    for key in ("total_revenue", "revenue_today", "revenue_week", "revenue_month"):
+        stats[key] = stats[key] or Decimal("0.00")
+    return stats
+
+
+def reservation_stats():
+    """Reservation counts per status in one query."""
+    return TableReservation.objects.aggregate(
+        reservations_count=Count("id"),
+        reservations_new=Count("id", filter=Q(status="new")),
+        reservations_confirmed=Count("id", filter=Q(status="confirmed")),
+        reservations_cancelled=Count("id", filter=Q(status="cancelled")),
+    )
+
+
+# -----------------------------
+# FEEDS (keyset pagination)
+# -----------------------------
+
+ORDER_PAGE_SIZE = 25
+RESERVATION_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+ORDER_STATUSES = frozenset(value for value, _ in Order.STATUS_CHOICES)
+RESERVATION_STATUSES = frozenset(value for value, _ in TableReservation._meta.get_field("status").choices)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(obj):
+    """`<created_at in µs since epoch>_<id>` of the last row on a page."""
+    delta = obj.created_at - _EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}_{obj.id}"
+
+
+def decode_cursor(raw):
+    """Inverse of encode_cursor(); raises ValueError on garbage."""
+    micros, _, obj_id = raw.partition("_")
+    try:
+        return _EPOCH + timedelta(microseconds=int(micros)), int(obj_id)
+    except (OverflowError, TypeError) as e:  # out of datetime's range
+        raise ValueError(f"Invalid cursor {raw!r}") from e
+
+
+def _parse_date(raw):
+    return date.fromisoformat(raw) if raw else None
+
+
+def _parse_limit(raw, default):
+    if not raw:
+        return default
+    return max(1, min(int(raw), MAX_PAGE_SIZE))
+
+
+def _parse_status(raw, statuses):
+    if raw and raw not in statuses:
+        raise ValueError(f"Unknown status {raw!r}")
+    return raw or None
+
+
+def parse_feed_params(params, default_limit, statuses):
+    """
+    Read `status` (one of `statuses`), `date_from`, `date_to` (YYYY-MM-DD),
+    `cursor` and `limit` from a QueryDict. Raises ValueError on malformed values.
+    """
+    cursor = params.get("cursor")
+    return {
+        "status": _parse_status(params.get("status"), statuses),
+        "date_from": _parse_date(params.get("date_from")),
+        "date_to": _parse_date(params.get("date_to")),
+        "cursor": decode_cursor(cursor) if cursor else None,
+        "limit": _parse_limit(params.get("limit"), default_limit),
+    }
+
+
+def day_start(day):
+    """Local midnight of `day` as an aware datetime."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def keyset_page_query(qs, cursor, limit):
+    """Newest first; rows strictly older than `cursor`; one extra row tells if there is more."""
+    if cursor:
+        created_at, obj_id = cursor
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=obj_id))
+    return qs.order_by("-created_at", "-id")[:limit + 1]
+
+
+def _page(qs, cursor, limit):
+    rows = list(keyset_page_query(qs, cursor, limit))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (encode_cursor(rows[-1]) if has_more else None)
+
+
+def _feed_orders():
+    return (
+        Order.objects.exclude(status="CART")
+        .select_related("user")
+        .prefetch_related(
+            Prefetch(
+                "items",
+                queryset=OrderItem.objects.select_related("product").prefetch_related(
+                    Prefetch("chosen_options", queryset=OrderItemOption.objects.select_related("option__group"))
+                ),
+            )
+        )
+    )
+
+
+def get_feed_order(order_id):
+    """A single non-cart order prefetched like a feed row (for live updates)."""
+    return _feed_orders().filter(id=order_id).first()
+
+
+def get_feed_orders(order_ids):
+    """Non-cart orders prefetched like feed rows, newest first (1 + 2 queries, none without ids)."""
+    if not order_ids:
+        return []
+    return list(_feed_orders().filter(id__in=order_ids).order_by("-created_at", "-id"))
+
+
+def order_feed_query(status=None, date_from=None, date_to=None):
+    """
+    Filtered non-cart orders (unordered). Dates become a plain created_at range
+    (not created_at__date) so the (status,) created_at indexes can serve it.
+    """
+    qs = _feed_orders()
+    if status:
+        qs = qs.filter(status=status)
+    if date_from:
+        qs = qs.filter(created_at__gte=day_start(date_from))
+    if date_to:
+        qs = qs.filter(created_at__lt=day_start(date_to + timedelta(days=1)))
+    return qs
+
+
+def order_feed(status=None, date_from=None, date_to=None, cursor=None, limit=ORDER_PAGE_SIZE):
+    """One page of non-cart orders with items/options (1 + 2 queries). Returns (orders, next_cursor)."""
+    return _page(order_feed_query(status, date_from, date_to), cursor, limit)
+
+
+def reservation_feed_query(status=None, date_from=None, date_to=None):
+    """Filtered reservations (unordered); dates filter the reserved day."""
+    qs = TableReservation.objects.all()
+    if status:
+        qs = qs.filter(status=status)
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
+def reservation_feed(status=None, date_from=None, date_to=None, cursor=None, limit=RESERVATION_PAGE_SIZE):
+    """One page of reservations, newest request first."""
+    return _page(reservation_feed_query(status, date_from, date_to), cursor, limit)
+
+
+def serialize_order(order):
+    return {
+        "id": order.id,
+        "order_number": order.order_number,
+        "status": order.status,
+        "status_display": order.get_status_display(),
+        "full_name": order.full_name,
+        "phone": order.phone,
+        "email": order.email,
+        "payment_method": order.payment_method,
+        "is_paid": order.is_paid,
+        "total_amount": str(order.total_amount),
+        "created_at": order.created_at.isoformat(),
+        "placed_at": order.placed_at.isoformat() if order.placed_at else None,
+        "items": [
+            {
+                "id": item.id,
+                "product": item.product.name,
+                "quantity": item.quantity,
+                "line_total": str(item.line_total),
+                "options": [
+                    {
+                        "group": cho.option.group.name,
+                        "name": cho.option.name,
+                        "price_delta": str(cho.price_delta_at_time),
+                    }
+                    for cho in item.chosen_options.all()
+                ],
+            }
+            for item in order.items.all()
+        ],
+    }
+
+
+def serialize_reservation(reservation):
+    return {
+        "id": reservation.id,
+        "name": reservation.name,
+        "email": reservation.email,
+        "phone": reservation.phone,
+        "date": reservation.date.isoformat(),
+        "time": reservation.time.strftime("%H:%M"),
+        "people": reservation.people,
+        "message": reservation.message,
+        "status": reservation.status,
+        "created_at": reservation.created_at.isoformat(),
+    }
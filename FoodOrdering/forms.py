@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 from .models import TableReservation
+from .reservations import ReservationError, validate_request
 
 class CustomAuthenticationForm(AuthenticationForm):
     """Custom login form matching the website design."""
@@ -38,3 +39,12 @@ class TableReservationForm(forms.ModelForm):
         if people < 1 or people > 50:
             raise forms.ValidationError("Bitte geben Sie eine gültige Personenzahl an (1–50).")
         return people
+
+    def clean(self):
+        cleaned = super().clean()
+        if all(cleaned.get(field) for field in ("date", "time", "people")):
+            try:
+                validate_request(cleaned["date"], cleaned["time"], cleaned["people"])
+            except ReservationError as e:
+                raise forms.ValidationError(str(e))
+        return cleaned
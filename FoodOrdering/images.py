@@ -0,0 +1,152 @@
+"""
+Responsive image variants for Product.image and Event.image.
+
+Uploads are served as-is (multi-hundred-KB JPEGs, full-size AVIFs), so the
+pages get resized AVIF/WebP copies instead:
+
+- Saving a product/event whose image changed enqueues an "images.generate"
+  job (signals.py); the worker resizes the original to the widths in
+  VARIANTS, stores the files next to it (`<dir>/variants/<stem>_<width>w.<fmt>`)
+  and records them in the model's `image_variants` JSON, stamping
+  `variants_updated_at`. Requests never resize anything.
+- The menu snapshot turns that JSON into a ResponsiveImage, which the
+  `{% responsive_image %}` / `{% image_set %}` tags (templatetags/responsive_images.py)
+  render as <picture> sources or a CSS image-set(). Until the job has run,
+  the original upload is used.
+- `python manage.py generate_image_variants` backfills existing media.
+
+Widths larger than the original are skipped (the original width is used as
+the largest one instead); AVIF is only written when Pillow supports it.
+"""
+import posixpath
+from dataclasses import dataclass
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+# name -> widths in px (each ~1x and ~2x of the rendered size)
+VARIANTS = {
+    "thumb": (240, 480),  # menu grid
+    "modal": (400, 800),  # product modal
+    "hero": (640, 1024, 1600),  # event slider backgrounds
+}
+
+# which variants each model's pages use
+MODEL_VARIANTS = {
+    "product": ("thumb", "modal"),
+    "event": ("hero",),
+}
+
+# `sizes` attribute per variant (rendered width of the slot, see main.css)
+SIZES = {
+    "thumb": "(min-width: 992px) 260px, calc(100vw - 150px)",
+    "modal": "(min-width: 768px) 320px, 90vw",
+    "hero": "(min-width: 1200px) 34vw, 100vw",
+}
+
+# Pillow format, mime type, encoder options; best first
+FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 55}),
+    "webp": ("WEBP", "image/webp", {"quality": 78, "method": 6}),
+}
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if features.check(fmt)]
+
+
+@dataclass(frozen=True)
+class ResponsiveImage:
+    src: str  # original upload, fallback for browsers without <picture>/image-set
+    variants: dict  # variant -> ((mime, [(width, url), ...]), ...) best format first
+
+    def sources(self, variant):
+        """[(mime, "url 240w, url 480w"), ...] for `variant` (empty if not generated yet)."""
+        return [
+            (mime, ", ".join(f"{url} {width}w" for width, url in urls))
+            for mime, urls in self.variants.get(variant, ())
+        ]
+
+    def largest(self, variant):
+        """[(mime, url), ...] of the widest file per format (CSS backgrounds)."""
+        return [(mime, urls[-1][1]) for mime, urls in self.variants.get(variant, ()) if urls]
+
+
+def responsive_image(field, image_variants):
+    """ResponsiveImage for an ImageField + its stored `image_variants`, or None without an image."""
+    if not field:
+        return None
+    variants = {}
+    if image_variants.get("source") == field.name:  # stale variants of a replaced image are ignored
+        for variant, formats in image_variants.get("variants", {}).items():
+            variants[variant] = tuple(
+                (FORMATS[fmt][1], [(width, default_storage.url(name)) for width, name in formats[fmt]])
+                for fmt in FORMATS
+                if formats.get(fmt)
+            )
+    return ResponsiveImage(src=field.url, variants=variants)
+
+
+def needs_variants(instance):
+    return bool(instance.image) and instance.image_variants.get("source") != instance.image.name
+
+
+def _variant_name(source_name, width, fmt):
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", f"{stem}_{width}w.{fmt}")
+
+
+def _widths(variant, original_width):
+    return sorted({min(width, original_width) for width in VARIANTS[variant]})
+
+
+def generate_variants(source_name, variants=tuple(VARIANTS), storage=default_storage, overwrite=False):
+    """
+    Resize `source_name` to the widths of `variants` in every format and save the files.
+    Returns the `image_variants` JSON; existing files are reused unless `overwrite`.
+    """
+    with storage.open(source_name, "rb") as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original.load()
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA" if "transparency" in original.info or "A" in original.mode else "RGB")
+
+    formats = available_formats()
+    result = {}
+    resized = {}
+    for variant in variants:
+        result[variant] = {fmt: [] for fmt in formats}
+        for width in _widths(variant, original.width):
+            for fmt in formats:
+                name = _variant_name(source_name, width, fmt)
+                if overwrite and storage.exists(name):
+                    storage.delete(name)
+                if not storage.exists(name):
+                    if width not in resized:
+                        height = max(1, round(original.height * width / original.width))
+                        resized[width] = original.resize((width, height), Image.Resampling.LANCZOS)
+                    pil_format, _, save_options = FORMATS[fmt]
+                    buffer = BytesIO()
+                    resized[width].save(buffer, pil_format, **save_options)
+                    name = storage.save(name, ContentFile(buffer.getvalue()))
+                result[variant][fmt].append([width, name])
+    return {"source": source_name, "variants": result}
+
+
+def store_variants(instance, overwrite=False):
+    """
+    Generate the variants of `instance.image` and save them on the row, unless
+    the image was replaced meanwhile. Uses .update() (no signals): web
+    processes notice the new `variants_updated_at` (menu.py).
+    """
+    variants = MODEL_VARIANTS[instance._meta.model_name]
+    image_variants = generate_variants(instance.image.name, variants, overwrite=overwrite)
+    return bool(
+        type(instance).objects.filter(id=instance.id, image=instance.image.name).update(
+            image_variants=image_variants, variants_updated_at=timezone.now()
+        )
+    )
@@ -0,0 +1,229 @@
+"""
+Per-request instrumentation.
+
+`InstrumentationMiddleware` (sync and async) measures every request: query
+count and DB time (an execute wrapper on every connection, works with
+DEBUG=False), template render time (the `TimedDjangoTemplates` backend in
+settings.TEMPLATES), response size and total time. The numbers are collected
+in a context variable, so they follow a request into `sync_to_async` threads
+and concurrent requests don't mix. It
+
+- adds a `Server-Timing` header (visible in the browser's network panel),
+- logs requests slower than SLOW_REQUEST_MS as one JSON line on the
+  "FoodOrdering.instrumentation" logger, including the slowest queries
+  (sampled with SLOW_REQUEST_SAMPLE_RATE),
+- keeps the last METRICS_WINDOW requests per URL name in process memory for
+  the staff-only `/dashboard/metrics/` endpoint (p50/p95/p99).
+
+Numbers are per process: with several workers each one reports its own window.
+"""
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+METRICS_WINDOW = 1000  # requests kept per URL name
+TOP_QUERIES = 5
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = []  # (duration_ms, sql)
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            self.db_ms += duration
+            self.queries.append((duration, sql))
+
+    def top_queries(self, n=TOP_QUERIES):
+        return [
+            {"ms": round(duration, 2), "sql": sql[:500]}
+            for duration, sql in sorted(self.queries, key=lambda q: q[0], reverse=True)[:n]
+        ]
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:  # management commands, job worker, queries outside a request
+        return execute(sql, params, many, context)
+    return stats.record_query(execute, sql, params, many, context)
+
+
+def _install(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+# Connections are per thread; each one gets the wrapper when it connects
+# (connected from FoodorderingConfig.ready(), before the first connection).
+connection_created.connect(_on_connection_created, dispatch_uid="instrumentation_record_query")
+
+
+class TimedTemplate(Template):
+    """Times top-level renders (render(), render_to_string()); {% include %}s run inside them."""
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, returning TimedTemplate."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class RequestMetrics:
+    """Rolling window of (total_ms, queries, db_ms, bytes) per URL name."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, url_name, total_ms, queries, db_ms, size):
+        with self._lock:
+            self._samples[url_name].append((total_ms, queries, db_ms, size))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+
+        result = {}
+        for name, values in sorted(samples.items()):
+            durations = sorted(v[0] for v in values)
+            queries = sorted(v[1] for v in values)
+            result[name] = {
+                "count": len(values),
+                "p50_ms": round(percentile(durations, 50), 1),
+                "p95_ms": round(percentile(durations, 95), 1),
+                "p99_ms": round(percentile(durations, 99), 1),
+                "queries_p50": percentile(queries, 50),
+                "queries_max": queries[-1],
+                "db_ms_avg": round(sum(v[2] for v in values) / len(values), 1),
+                "bytes_avg": round(sum(v[3] for v in values) / len(values)),
+            }
+        return result
+
+
+request_metrics = RequestMetrics()
+
+
+def _response_size(response):
+    if response.streaming:
+        return 0  # SSE etc.: unknown up front
+    return len(response.content)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.slow_ms = getattr(settings, "SLOW_REQUEST_MS", 500)
+        self.sample_rate = getattr(settings, "SLOW_REQUEST_SAMPLE_RATE", 1.0)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    def _finish(self, request, response, stats, started):
+        total_ms = (time.perf_counter() - started) * 1000
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={stats.db_ms:.1f};desc="{len(stats.queries)} queries"',
+            f"tpl;dur={stats.template_ms:.1f}",
+            f"total;dur={total_ms:.1f}",
+        ])
+
+        match = request.resolver_match
+        if match is None:
+            return response  # unresolved URL (404 before routing)
+
+        size = _response_size(response)
+        request_metrics.record(match.view_name, total_ms, len(stats.queries), stats.db_ms, size)
+
+        if total_ms >= self.slow_ms and random.random() < self.sample_rate:
+            logger.warning(json.dumps({
+                "event": "slow_request",
+                "url_name": match.view_name,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 1),
+                "db_ms": round(stats.db_ms, 1),
+                "template_ms": round(stats.template_ms, 1),
+                "queries": len(stats.queries),
+                "bytes": size,
+                "top_queries": stats.top_queries(),
+            }))
+        return response
@@ -0,0 +1,118 @@
+"""
+Database-backed job queue.
+
+- `enqueue(name, payload, key=...)` inserts a Job row inside the caller's
+  transaction, so a job exists exactly when the write that caused it commits.
+  A `key` makes enqueueing idempotent (e.g. one job per Stripe event id).
+- Handlers are plain functions registered with `@handler("name")` (see
+  tasks.py) and receive the payload dict. They must be idempotent: a job can
+  run again if a worker dies after the handler but before it is marked DONE.
+- `python manage.py run_jobs` claims due jobs one at a time; a failing job is
+  retried with exponential backoff until `max_attempts`, then marked FAILED.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 10  # seconds, doubled per attempt
+BACKOFF_MAX = 60 * 60
+LEASE = timedelta(minutes=10)  # RUNNING longer than this = worker died, job is due again
+
+_handlers = {}
+
+
+def handler(name):
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, *, key=None, run_at=None, max_attempts=5):
+    """Create a job; with `key`, returns the existing job instead of a duplicate."""
+    fields = {"name": name, "payload": payload or {}, "max_attempts": max_attempts}
+    if run_at:
+        fields["run_at"] = run_at
+    if key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(key=key, **fields)
+    except IntegrityError:
+        return Job.objects.get(key=key)
+
+
+def backoff(attempts):
+    """Seconds until the next try after `attempts` failures (with jitter)."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay + random.uniform(0, delay / 4)
+
+
+def _due(now):
+    return Job.objects.filter(
+        Q(status="PENDING", run_at__lte=now) | Q(status="RUNNING", locked_at__lt=now - LEASE)
+    )
+
+
+def claim_next():
+    """Mark the next due job RUNNING and return it (None if the queue is empty)."""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = _due(now).order_by("run_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            # PostgreSQL: parallel workers skip each other's rows instead of waiting
+            qs = qs.select_for_update(skip_locked=True)
+        job = qs.first()
+        if job is None:
+            return None
+        # Conditional update: with several SQLite workers only one wins the row
+        claimed = _due(now).filter(id=job.id).update(status="RUNNING", locked_at=now, attempts=job.attempts + 1)
+        if not claimed:
+            return None
+    job.status, job.locked_at, job.attempts = "RUNNING", now, job.attempts + 1
+    return job
+
+
+def run_job(job):
+    """Run a claimed job's handler and record the outcome. Returns True on success."""
+    func = _handlers.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f"No handler registered for job {job.name!r}")
+        func(job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed permanently:\n%s", job.id, job.name, error)
+            Job.objects.filter(id=job.id).update(status="FAILED", locked_at=None, last_error=error)
+        else:
+            run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning("Job %s (%s) failed, retry at %s", job.id, job.name, run_at)
+            Job.objects.filter(id=job.id).update(status="PENDING", locked_at=None, run_at=run_at, last_error=error)
+        return False
+
+    Job.objects.filter(id=job.id).update(status="DONE", locked_at=None, last_error="")
+    return True
+
+
+def run_pending(limit=None):
+    """Work through due jobs; returns (succeeded, failed)."""
+    succeeded = failed = 0
+    while limit is None or succeeded + failed < limit:
+        job = claim_next()
+        if job is None:
+            break
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -0,0 +1,254 @@
+"""
+Kitchen load and ready-time (ETA) estimates for placed orders.
+
+Preparation time is learned per product: `ProductPrepTime.seconds` is the
+estimated kitchen time for one unit. When an order leaves the kitchen
+(PLACED/PREPARING -> DELIVERING/COMPLETED), its observed duration (from
+`preparing_at`, or `placed_at` if it was never marked PREPARING) is compared
+with the estimate and every product in it moves KITCHEN_LEARNING_RATE of the
+way towards the observed ratio. That is a couple of small writes per status
+event (one batch per bulk update), never a scan over past orders.
+
+The live queue is a model of KITCHEN_STATIONS parallel stations: orders in
+PREPARING occupy a station since they started, PLACED orders follow in
+placement order. `get_queue()` builds it with one query over the active
+orders and keeps it in process memory, versioned through the cache like the
+menu snapshot; every status change bumps the version (after commit), and
+entries expire after QUEUE_TTL since the estimates depend on the clock.
+"""
+import heapq
+import math
+import threading
+import time as time_module
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_versions import bump_version, get_version
+from .models import OrderItem, ProductPrepTime
+
+ACTIVE_STATUSES = ("PLACED", "PREPARING")
+READY_STATUSES = ("DELIVERING", "COMPLETED")
+
+QUEUE_TTL = 30  # seconds
+VERSION_CACHE_KEY = "kitchen:version"
+
+
+def order_seconds(lines):
+    """Estimated kitchen time of an order; lines: (quantity, seconds per unit or None)."""
+    default = settings.KITCHEN_DEFAULT_ITEM_SECONDS
+    return settings.KITCHEN_BASE_SECONDS + sum(quantity * (seconds or default) for quantity, seconds in lines)
+
+
+# -----------------------------
+# LEARNING
+# -----------------------------
+
+def _observed_seconds(order, ready_at):
+    """Kitchen time of one order, None if it can't be a sample."""
+    started = order.preparing_at or order.placed_at
+    if started is None:
+        return None
+    observed = (ready_at - started).total_seconds() - settings.KITCHEN_BASE_SECONDS
+    if observed <= 0 or observed > settings.KITCHEN_MAX_SAMPLE_SECONDS:
+        return None  # clicked through / forgotten in the system: not a kitchen time
+    return observed
+
+
+def learn_many(orders, ready_at):
+    """
+    Move the products' estimates towards these orders' observed kitchen times:
+    one items query, one locking read of the estimates and one bulk write for
+    the whole batch, however many orders it has. Orders are applied in turn,
+    as if learn() had been called for each.
+    """
+    observed = {order.id: seconds for order in orders if (seconds := _observed_seconds(order, ready_at)) is not None}
+    if not observed:
+        return
+
+    quantities = defaultdict(lambda: defaultdict(int))  # order id -> product id -> quantity
+    rows = OrderItem.objects.filter(order_id__in=observed).values_list("order_id", "product_id", "quantity")
+    for order_id, product_id, quantity in rows:
+        quantities[order_id][product_id] += quantity
+    if not quantities:
+        return
+    product_ids = {pid for lines in quantities.values() for pid in lines}
+
+    with transaction.atomic():
+        current = {
+            stat.product_id: stat
+            for stat in ProductPrepTime.objects.select_for_update().filter(product_id__in=product_ids)
+        }
+        existing = set(current)
+        default = settings.KITCHEN_DEFAULT_ITEM_SECONDS
+        for order_id, lines in quantities.items():
+            estimates = {pid: current[pid].seconds if pid in current else default for pid in lines}
+            expected = sum(lines[pid] * estimates[pid] for pid in lines)
+            # each product gets its share of the observed time, proportional to its current estimate
+            factor = 1 + settings.KITCHEN_LEARNING_RATE * (observed[order_id] / expected - 1)
+            for pid, estimate in estimates.items():
+                stat = current.setdefault(pid, ProductPrepTime(product_id=pid, samples=0))
+                stat.seconds = estimate * factor
+                stat.samples += 1
+                stat.updated_at = ready_at
+
+        ProductPrepTime.objects.bulk_update(
+            [stat for pid, stat in current.items() if pid in existing], ["seconds", "samples", "updated_at"]
+        )
+        ProductPrepTime.objects.bulk_create([stat for pid, stat in current.items() if pid not in existing])
+
+
+def learn(order, ready_at):
+    """Move the products' estimates towards this order's observed kitchen time."""
+    learn_many([order], ready_at)
+
+
+def statuses_changed(changes, now=None):
+    """
+    Call after saving status changes, [(order, previous status), ...]
+    (dashboard, bulk updates): records when cooking started, learns from
+    orders leaving the kitchen and refreshes the queue.
+    """
+    now = now or timezone.now()
+    changes = [(order, previous) for order, previous in changes if order.status != previous]
+    if not changes:
+        return
+    started = [order for order, _ in changes if order.status == "PREPARING" and order.preparing_at is None]
+    if started:
+        for order in started:
+            order.preparing_at = now
+        type(started[0]).objects.filter(
+            id__in=[order.id for order in started], preparing_at__isnull=True
+        ).update(preparing_at=now)
+    learn_many(
+        [order for order, previous in changes if order.status in READY_STATUSES and previous in ACTIVE_STATUSES],
+        now,
+    )
+    transaction.on_commit(invalidate_queue)
+
+
+def order_status_changed(order, previous_status, now=None):
+    """statuses_changed() for a single order."""
+    statuses_changed([(order, previous_status)], now=now)
+
+
+# -----------------------------
+# LIVE QUEUE
+# -----------------------------
+
+@dataclass(frozen=True)
+class KitchenEta:
+    order_id: int
+    order_number: str
+    status: str
+    position: int  # 0 = cooking now
+    ready_at: object  # datetime
+
+    @property
+    def minutes_left(self):
+        return max(0, math.ceil((self.ready_at - timezone.now()).total_seconds() / 60))
+
+    def as_json(self):
+        return {
+            "eta": self.ready_at.isoformat(),
+            "eta_minutes": self.minutes_left,
+            "queue_position": self.position,
+        }
+
+
+@dataclass(frozen=True)
+class KitchenQueue:
+    built_at: object
+    etas: dict  # order_number -> KitchenEta
+    preparing: int
+    waiting: int
+    busy_until: object  # when the last active order should be ready
+
+    @property
+    def backlog_minutes(self):
+        return max(0, math.ceil((self.busy_until - timezone.now()).total_seconds() / 60))
+
+
+def build_queue(now=None):
+    """Simulate the stations over the active orders (one query)."""
+    now = now or timezone.now()
+    rows = (
+        OrderItem.objects.filter(order__status__in=ACTIVE_STATUSES)
+        .order_by("order__placed_at", "order_id")
+        .values_list(
+            "order_id", "order__order_number", "order__status", "order__placed_at", "order__preparing_at",
+            "quantity", "product__prep_time__seconds",
+        )
+    )
+    orders = {}
+    for order_id, number, status, placed_at, preparing_at, quantity, seconds in rows:
+        order = orders.setdefault(order_id, {
+            "id": order_id, "number": number, "status": status, "placed_at": placed_at or now,
+            "preparing_at": preparing_at, "lines": [],
+        })
+        order["lines"].append((quantity, seconds))
+
+    preparing = sorted(
+        (o for o in orders.values() if o["status"] == "PREPARING"),
+        key=lambda o: o["preparing_at"] or o["placed_at"],
+    )
+    waiting = [o for o in orders.values() if o["status"] == "PLACED"]  # already in placement order
+
+    stations = [now] * settings.KITCHEN_STATIONS
+    heapq.heapify(stations)
+    etas = {}
+    for position, order in enumerate(preparing + waiting):
+        duration = timedelta(seconds=order_seconds(order["lines"]))
+        free_at = heapq.heappop(stations)
+        if order["status"] == "PREPARING" and position < settings.KITCHEN_STATIONS:
+            start = order["preparing_at"] or order["placed_at"]  # cooking since then
+        else:
+            start = free_at
+        # running late: expect it shortly rather than in the past
+        ready_at = max(start + duration, now + timedelta(minutes=1))
+        heapq.heappush(stations, ready_at)
+        etas[order["number"]] = KitchenEta(
+            order_id=order["id"],
+            order_number=order["number"],
+            status=order["status"],
+            position=max(0, position - settings.KITCHEN_STATIONS + 1),
+            ready_at=ready_at,
+        )
+
+    return KitchenQueue(
+        built_at=now,
+        etas=etas,
+        preparing=len(preparing),
+        waiting=len(waiting),
+        busy_until=max(stations),
+    )
+
+
+_lock = threading.Lock()
+_queue = None  # (version, built monotonic, KitchenQueue)
+
+
+def invalidate_queue():
+    bump_version(VERSION_CACHE_KEY)
+
+
+def get_queue():
+    global _queue
+    version = get_version(VERSION_CACHE_KEY)
+    now = time_module.monotonic()
+    entry = _queue
+    if entry is not None and entry[0] == version and now - entry[1] < QUEUE_TTL:
+        return entry[2]
+    queue = build_queue()
+    with _lock:
+        _queue = (version, now, queue)
+    return queue
+
+
+def get_eta(order_number):
+    """KitchenEta of an active order, None once it left the kitchen (or never was there)."""
+    return get_queue().etas.get(order_number)
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from FoodOrdering import analytics, dashboard
+from FoodOrdering.jobs import _due
+from FoodOrdering.models import Order, OrderItem, TableReservation
+
+
+def hot_queries():
+    """(label, queryset) for the queries behind the busiest pages, shaped like the real ones."""
+    now = timezone.now()
+    today = timezone.localdate()
+    cursor = (now, 1_000_000)
+    limit = dashboard.ORDER_PAGE_SIZE
+    stats = Order.objects.exclude(status="CART")
+    return [
+        ("dashboard: order feed", dashboard.keyset_page_query(dashboard.order_feed_query(), None, limit)),
+        ("dashboard: order feed, next page", dashboard.keyset_page_query(dashboard.order_feed_query(), cursor, limit)),
+        ("dashboard: order feed by status", dashboard.keyset_page_query(dashboard.order_feed_query("PLACED"), None, limit)),
+        (
+            "dashboard: order feed by date",
+            dashboard.keyset_page_query(dashboard.order_feed_query(None, today - timedelta(days=7), today), None, limit),
+        ),
+        ("dashboard: order stats", stats.values("status").order_by()),
+        ("dashboard: revenue this month", stats.filter(is_paid=True, placed_at__gte=now.replace(day=1)).values("total_amount")),
+        ("dashboard: reservation feed", dashboard.keyset_page_query(dashboard.reservation_feed_query(), None, limit)),
+        (
+            "dashboard: reservation feed by status",
+            dashboard.keyset_page_query(dashboard.reservation_feed_query("new"), None, limit),
+        ),
+        ("dashboard: reservation stats", TableReservation.objects.values("status").order_by()),
+        ("placement: cart row", Order.objects.filter(id=1, status="CART")),
+        ("tracking: order by number", Order.objects.exclude(status="CART").filter(order_number="OK-00000000-000000")),
+        ("summary: order items", OrderItem.objects.filter(order_id=1).order_by("id")),
+        ("purge: abandoned carts", Order.objects.filter(status="CART", created_at__lt=now - timedelta(hours=48)).order_by("id")),
+        ("jobs: next due job", _due(now).order_by("run_at", "id")),
+        ("rollups: sales per hour", analytics.hourly_sales_query(now - timedelta(days=1), now)),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans of the hot order/reservation queries (verify they use the indexes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (PostgreSQL only, runs the queries).")
+
+    def handle(self, *args, **options):
+        explain_options = {"analyze": True} if options["analyze"] and connection.vendor == "postgresql" else {}
+        index_names = [
+            index.name for model in (Order, OrderItem, TableReservation) for index in model._meta.indexes
+        ]
+
+        for label, qs in hot_queries():
+            plan = qs.explain(**explain_options)
+            used = [name for name in index_names if name in plan]
+            self.stdout.write(self.style.SUCCESS(f"== {label}") + (f"  [{', '.join(used)}]" if used else ""))
+            self.stdout.write(plan)
+            self.stdout.write("")
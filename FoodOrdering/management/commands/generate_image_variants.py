@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from FoodOrdering.images import available_formats, needs_variants, store_variants
+from FoodOrdering.menu import invalidate_menu
+from FoodOrdering.models import Event, Product
+
+
+class Command(BaseCommand):
+    help = "Backfill resized AVIF/WebP variants for existing product and event images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-encode all images, even up-to-date ones.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the images that need variants.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING(f"Generating image variants ({', '.join(available_formats())})..."))
+
+        done = failed = 0
+        for model in (Product, Event):
+            rows = model.objects.exclude(image="").exclude(image=None).only("id", "image", "image_variants")
+            for instance in rows.order_by("id").iterator():
+                if not (options["force"] or needs_variants(instance)):
+                    continue
+                if options["dry_run"]:
+                    self.stdout.write(f"{model.__name__} #{instance.id}: {instance.image.name}")
+                    continue
+                try:
+                    store_variants(instance, overwrite=options["force"])
+                except OSError as e:  # missing/unreadable file: report and keep going
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"{model.__name__} #{instance.id}: {e}"))
+                    continue
+                done += 1
+
+        if done:
+            invalidate_menu()
+        self.stdout.write(self.style.SUCCESS(f"Done: {done} images processed, {failed} failed."))
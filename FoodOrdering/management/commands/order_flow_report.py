@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from FoodOrdering.status_log import PERCENTILES, hourly_throughput, stage_latencies
+
+FLOW_STATUSES = ("PLACED", "PREPARING", "DELIVERING", "COMPLETED", "CANCELLED")
+
+
+def _minutes(seconds):
+    return f"{seconds / 60:.1f}"
+
+
+class Command(BaseCommand):
+    help = "Per-stage latency percentiles and hourly throughput from the order status log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Look back this many days (default 7).")
+        parser.add_argument("--hourly", action="store_true", help="Also list transitions per hour.")
+
+    def handle(self, *args, **options):
+        until = timezone.now()
+        since = until - timedelta(days=options["days"])
+        self.stdout.write(self.style.WARNING(
+            f"Order flow {timezone.localtime(since):%Y-%m-%d %H:%M} - {timezone.localtime(until):%Y-%m-%d %H:%M} "
+            "(minutes in stage)"
+        ))
+
+        header = f"{'stage':<26}{'count':>7}{'avg':>8}" + "".join(f"{f'p{p}':>8}" for p in PERCENTILES)
+        self.stdout.write(header)
+        stages = stage_latencies(since, until)
+        for stage in stages:
+            self.stdout.write(
+                f"{stage['from_status'] + ' -> ' + stage['to_status']:<26}{stage['count']:>7}"
+                f"{_minutes(stage['avg_seconds']):>8}"
+                + "".join(f"{_minutes(stage[f'p{p}']):>8}" for p in PERCENTILES)
+            )
+        if not stages:
+            self.stdout.write("No transitions logged in this period.")
+
+        if options["hourly"]:
+            self.stdout.write("")
+            self.stdout.write(f"{'hour':<18}" + "".join(f"{status:>12}" for status in FLOW_STATUSES))
+            for hour in hourly_throughput(since, until):
+                self.stdout.write(
+                    f"{timezone.localtime(hour['hour']):%Y-%m-%d %H:%M}  "
+                    + "".join(f"{hour.get(status, 0):>12}" for status in FLOW_STATUSES)
+                )
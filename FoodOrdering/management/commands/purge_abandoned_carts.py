@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from FoodOrdering.models import Order, OrderItem, OrderItemOption
+
+
+class Command(BaseCommand):
+    help = "Delete CART orders left behind by abandoned checkouts (in batches)."
+
+    def add_arguments(self, parser):
+        # Stripe checkout sessions expire after 24h at most, keep a margin
+        parser.add_argument("--older-than-hours", type=int, default=48, help="Minimum cart age (default 48).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Orders per transaction (default 500).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count, delete nothing.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["older_than_hours"])
+        carts = Order.objects.filter(status="CART", created_at__lt=cutoff).order_by("id")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{carts.count()} abandoned carts older than {cutoff:%Y-%m-%d %H:%M}."))
+            return
+
+        self.stdout.write(self.style.WARNING("Purging abandoned carts..."))
+
+        deleted = 0
+        last_id = 0
+        while True:
+            # keyset batches keep each transaction (and its locks) short
+            ids = list(carts.filter(id__gt=last_id).values_list("id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            last_id = ids[-1]
+            deleted += self._purge_batch(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {deleted} carts deleted."))
+
+    @transaction.atomic
+    def _purge_batch(self, ids):
+        # re-check the status under lock: an order placed meanwhile must survive
+        ids = list(Order.objects.select_for_update().filter(id__in=ids, status="CART").values_list("id", flat=True))
+        # children first, so each DELETE is a single statement without cascade collection
+        OrderItemOption.objects.filter(order_item__order_id__in=ids).delete()
+        OrderItem.objects.filter(order_id__in=ids).delete()
+        deleted, _ = Order.objects.filter(id__in=ids).delete()
+        return deleted
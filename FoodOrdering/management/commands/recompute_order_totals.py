@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from FoodOrdering.models import Order, OrderItem, OrderItemOption
+
+
+class Command(BaseCommand):
+    help = "Recompute stored OrderItem totals/option labels and Order.total_amount from snapshots (backfill/repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Orders per transaction (default 500).")
+        parser.add_argument("--status", help="Only orders with this status, e.g. CART or PLACED.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        orders = Order.objects.order_by("id")
+        if options["status"]:
+            orders = orders.filter(status=options["status"])
+
+        self.stdout.write(self.style.WARNING("Recomputing order totals..."))
+
+        last_id = 0
+        orders_done = items_done = 0
+        while True:
+            # keyset batches: constant number of queries per batch, no OFFSET scans
+            ids = list(orders.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            n_orders, n_items = self._recompute_batch(ids)
+            orders_done += n_orders
+            items_done += n_items
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {orders_done} orders, {items_done} items updated."))
+
+    @transaction.atomic
+    def _recompute_batch(self, ids):
+        batch = list(
+            Order.objects.filter(id__in=ids)
+            .only("id", "total_amount")
+            .prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=OrderItem.objects.prefetch_related(
+                        Prefetch("chosen_options", queryset=OrderItemOption.objects.select_related("option__group"))
+                    ),
+                ),
+            )
+        )
+
+        items = []
+        for order in batch:
+            total = Decimal("0.00")
+            for item in order.items.all():
+                chosen = item.chosen_options.all()
+                item.options_total = sum((o.price_delta_at_time for o in chosen), Decimal("0.00"))
+                item.option_label = OrderItem.build_option_label((o.option.group.name, o.option.name) for o in chosen)
+                item.compute_totals()
+                total += item.line_total
+                items.append(item)
+            order.total_amount = total
+
+        OrderItem.objects.bulk_update(items, ["options_total", "option_label", "subtotal", "line_total"], batch_size=500)
+        Order.objects.bulk_update(batch, ["total_amount"], batch_size=500)
+        return len(batch), len(items)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from FoodOrdering.analytics import ROLLUP_LAG, refresh
+
+
+class Command(BaseCommand):
+    help = "Update the hourly/daily sales rollups with orders placed or cancelled since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Drop all rollups and rebuild them from every order.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING(
+            f"{'Rebuilding' if options['rebuild'] else 'Refreshing'} sales rollups "
+            f"(up to {int(ROLLUP_LAG.total_seconds() // 60)} min ago)..."
+        ))
+        days = refresh(rebuild=options["rebuild"])
+        for day in days:
+            self.stdout.write(f"  {day:%Y-%m-%d}")
+        self.stdout.write(self.style.SUCCESS(f"Done: {len(days)} days rebuilt."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from FoodOrdering.jobs import run_pending
+
+
+class Command(BaseCommand):
+    help = "Job worker: run due background jobs (Stripe webhooks, order side effects) with retries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the due jobs and exit (cron mode).")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty (default 2).")
+        parser.add_argument("--batch", type=int, default=100, help="Jobs per round before re-checking connections (default 100).")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING("Job worker started..."))
+        done = failed = 0
+        try:
+            while True:
+                close_old_connections()  # long-running process: drop broken/expired DB connections
+                ok, bad = run_pending(limit=options["batch"])
+                done += ok
+                failed += bad
+                if options["once"] and ok + bad < options["batch"]:
+                    break
+                if ok + bad == 0:
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {done} jobs succeeded, {failed} failed."))
@@ -0,0 +1,76 @@
+import re
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+
+from FoodOrdering.static_assets import COMPRESS_EXTENSIONS, COMPRESS_MIN_SIZE, compress
+
+PAGES = {
+    "home": "index.html",
+    "login": "login.html",
+    "dashboard": "admin.html",
+}
+
+STATIC_TAG = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]\s*%}""")
+INCLUDE_TAG = re.compile(r"""{%\s*include\s+['"]([^'"]+)['"]""")
+
+
+def static_references(template_name, seen=None):
+    """Every `{% static %}` path in a template and the templates it includes."""
+    seen = seen if seen is not None else set()
+    if template_name in seen:
+        return set()
+    seen.add(template_name)
+    source = get_template(template_name).template.source
+    paths = set(STATIC_TAG.findall(source))
+    for included in INCLUDE_TAG.findall(source):
+        paths |= static_references(included, seen)
+    return paths
+
+
+def transfer_size(path, content):
+    """Bytes on the wire from the compressed build (smallest precompressed variant)."""
+    if not path.lower().endswith(tuple(COMPRESS_EXTENSIONS)) or len(content) < COMPRESS_MIN_SIZE:
+        return len(content)
+    return min([len(content), *(len(data) for data in compress(content).values())])
+
+
+class Command(BaseCommand):
+    help = "Report static bytes per page before/after the hashed + compressed static build."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", action="store_true", help="List every file per page.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING(
+            "Counts every {% static %} reference of the page template (and its includes)."
+        ))
+        self.stdout.write(f"{'page':<12}{'files':>7}{'before KB':>12}{'after KB':>11}{'saved':>8}   repeat visit")
+
+        for page, template_name in PAGES.items():
+            before = after = files = 0
+            missing = []
+            rows = []
+            for path in sorted(static_references(template_name)):
+                found = finders.find(path)
+                if not found:
+                    missing.append(path)
+                    continue
+                with open(found, "rb") as f:
+                    content = f.read()
+                size, wire = len(content), transfer_size(path, content)
+                before += size
+                after += wire
+                files += 1
+                rows.append(f"    {path}: {size / 1024:.1f} KB -> {wire / 1024:.1f} KB")
+
+            saved = (1 - after / before) * 100 if before else 0
+            self.stdout.write(
+                f"{page:<12}{files:>7}{before / 1024:>12.1f}{after / 1024:>11.1f}{saved:>7.0f}%   "
+                f"{files} revalidations -> 0 (immutable)"
+            )
+            if options["files"]:
+                self.stdout.write("\n".join(rows))
+            for path in missing:
+                self.stdout.write(self.style.ERROR(f"    missing: {path}"))
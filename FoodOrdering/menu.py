@@ -0,0 +1,256 @@
+"""
+Menu snapshot.
+
+An immutable, in-process copy of the active menu (categories -> products ->
+option groups -> options, plus active events) that the homepage renders from.
+
+- The snapshot is built with one prefetched query tree and then kept in memory.
+- A version key in the Django cache says which snapshot is current. Saving or
+  deleting any menu model bumps it after commit (see signals.py), so every
+  worker rebuilds on its next request. With the default LocMemCache this is per process; use a
+  shared cache backend (REDIS_URL) when running several workers.
+- Without a shared cache, other workers (and the job worker writing image
+  variants) can't bump the version here. A stamp of the menu tables (newest
+  `updated_at`/`variants_updated_at` and the row count, so deletes count too)
+  is therefore part of the version; it is re-read at most every
+  MENU_CHECK_INTERVAL seconds (one aggregate query per menu model).
+- The rendered menu section is cached under the same version, so a warm
+  homepage needs no DB queries for the menu at all.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Prefetch
+from django.template.backends.utils import csrf_input
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache_versions import bump_version, get_version
+from .images import responsive_image
+from .models import Category, Event, Option, OptionGroup, Product, ProductOptionGroup
+
+VERSION_CACHE_KEY = "menu:version"
+FRAGMENT_CACHE_KEY = "menu:fragment:{version}"
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+MENU_CHECK_INTERVAL = 10  # seconds
+# aggregated by _menu_stamp(); `.update()` bypasses auto_now, so the job worker stamps variants_updated_at
+STAMP_FIELDS = {
+    Category: ("updated_at",),
+    Product: ("updated_at", "variants_updated_at"),
+    OptionGroup: ("updated_at",),
+    Option: ("updated_at",),
+    ProductOptionGroup: ("updated_at",),
+    Event: ("updated_at", "variants_updated_at"),
+}
+
+# Rendered into the cached fragment instead of a real token, swapped per request.
+CSRF_PLACEHOLDER = "<!--menu-csrf-token-->"
+
+
+@dataclass(frozen=True)
+class MenuOption:
+    id: int
+    name: str
+    price_delta: Decimal
+
+
+@dataclass(frozen=True)
+class MenuOptionGroup:
+    """A ProductOptionGroup with its rules already resolved (effective_*)."""
+    id: int
+    name: str
+    is_required: bool
+    min_select: int
+    max_select: int
+    options: tuple
+    options_by_id: dict  # option_id -> MenuOption, for add-to-cart validation
+
+
+@dataclass(frozen=True)
+class MenuProduct:
+    id: int
+    category_id: int
+    name: str
+    description: str
+    price: Decimal
+    image_url: str
+    image: object  # images.ResponsiveImage or None
+    option_groups: tuple
+
+
+@dataclass(frozen=True)
+class MenuCategory:
+    id: int
+    name: str
+    slug: str
+    products: tuple
+
+
+@dataclass(frozen=True)
+class MenuEvent:
+    id: int
+    title: str
+    description: str
+    price: Decimal
+    image_url: str
+    image: object  # images.ResponsiveImage or None
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    version: str
+    categories: tuple
+    events: tuple
+    products: dict  # product_id -> MenuProduct
+
+    def get_product(self, product_id):
+        return self.products.get(int(product_id))
+
+
+_lock = threading.Lock()
+_snapshot = None
+_menu_check = (0.0, "")  # (next check on time.monotonic(), stamp)
+
+
+def _image_url(field):
+    return field.url if field else ""
+
+
+def _build_snapshot(version):
+    categories_qs = (
+        Category.objects.filter(is_active=True)
+        .prefetch_related(
+            Prefetch("products", queryset=Product.objects.filter(is_available=True)),
+            Prefetch(
+                "products__product_option_groups",
+                queryset=(
+                    ProductOptionGroup.objects.select_related("group")
+                    .filter(group__is_active=True)
+                    .order_by("sort_order", "group__sort_order", "group__name")
+                ),
+            ),
+            Prefetch(
+                "products__product_option_groups__group__options",
+                queryset=Option.objects.filter(is_active=True),
+            ),
+        )
+    )
+
+    categories = []
+    products = {}
+    for category in categories_qs:
+        menu_products = []
+        for product in category.products.all():
+            groups = []
+            for pog in product.product_option_groups.all():
+                options = tuple(
+                    MenuOption(id=opt.id, name=opt.name, price_delta=opt.price_delta)
+                    for opt in pog.group.options.all()
+                )
+                groups.append(MenuOptionGroup(
+                    id=pog.group.id,
+                    name=pog.group.name,
+                    is_required=pog.effective_is_required(),
+                    min_select=pog.effective_min_select(),
+                    max_select=pog.effective_max_select(),
+                    options=options,
+                    options_by_id={opt.id: opt for opt in options},
+                ))
+            menu_product = MenuProduct(
+                id=product.id,
+                category_id=category.id,
+                name=product.name,
+                description=product.description,
+                price=product.price,
+                image_url=_image_url(product.image),
+                image=responsive_image(product.image, product.image_variants),
+                option_groups=tuple(groups),
+            )
+            menu_products.append(menu_product)
+            products[product.id] = menu_product
+
+        categories.append(MenuCategory(
+            id=category.id,
+            name=category.name,
+            slug=category.slug,
+            products=tuple(menu_products),
+        ))
+
+    events = tuple(
+        MenuEvent(
+            id=event.id,
+            title=event.title,
+            description=event.description,
+            price=event.price,
+            image_url=_image_url(event.image),
+            image=responsive_image(event.image, event.image_variants),
+        )
+        for event in Event.objects.filter(is_active=True).order_by("sort_order")
+    )
+
+    return MenuSnapshot(version=version, categories=tuple(categories), events=events, products=products)
+
+
+def _menu_stamp():
+    """Newest change and row count of the menu tables, re-read every MENU_CHECK_INTERVAL."""
+    global _menu_check
+    next_check, stamp = _menu_check
+    now = time.monotonic()
+    if now >= next_check:
+        newest, rows = None, 0
+        for model, fields in STAMP_FIELDS.items():
+            result = model.objects.aggregate(rows=Count("pk"), **{field: Max(field) for field in fields})
+            rows += result.pop("rows")
+            newest = max((at for at in (newest, *result.values()) if at), default=None)
+        stamp = f"{newest.timestamp() if newest else 0}-{rows}"
+        _menu_check = (now + MENU_CHECK_INTERVAL, stamp)
+    return stamp
+
+
+def current_version():
+    return f"{get_version(VERSION_CACHE_KEY)}:{_menu_stamp()}"
+
+
+def invalidate_menu():
+    """Mark the current snapshot (and its rendered fragment) as stale."""
+    global _snapshot, _menu_check
+    bump_version(VERSION_CACHE_KEY)
+    with _lock:
+        _snapshot = None
+        _menu_check = (0.0, "")
+
+
+def get_menu_snapshot():
+    """Return the current snapshot, rebuilding it if the version moved."""
+    global _snapshot
+    version = current_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = _build_snapshot(version)
+        return _snapshot
+
+
+def render_menu_section(request, snapshot=None):
+    """
+    Rendered HTML of the menu section, cached per snapshot version.
+    The per-user CSRF token is filled in after the cache lookup.
+    """
+    snapshot = snapshot or get_menu_snapshot()
+    key = FRAGMENT_CACHE_KEY.format(version=snapshot.version)
+
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string("sections/menu.html", {
+            "categories": snapshot.categories,
+            "csrf_input": mark_safe(CSRF_PLACEHOLDER),
+        })
+        cache.set(key, html, FRAGMENT_TIMEOUT)
+
+    return mark_safe(html.replace(CSRF_PLACEHOLDER, str(csrf_input(request))))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FoodOrdering', '0008_order_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='option_label',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
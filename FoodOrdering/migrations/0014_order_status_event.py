@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FoodOrdering', '0013_kitchen_eta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('CART', 'Cart'), ('PLACED', 'Placed'), ('PREPARING', 'Preparing'), ('DELIVERING', 'Delivering'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], max_length=12)),
+                ('to_status', models.CharField(choices=[('CART', 'Cart'), ('PLACED', 'Placed'), ('PREPARING', 'Preparing'), ('DELIVERING', 'Delivering'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], max_length=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('elapsed_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('order', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='FoodOrdering.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['order', 'created_at'], name='status_event_order_idx'), models.Index(fields=['created_at'], name='status_event_created_idx')],
+            },
+        ),
+    ]
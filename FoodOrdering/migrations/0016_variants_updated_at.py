@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FoodOrdering', '0015_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='variants_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='variants_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
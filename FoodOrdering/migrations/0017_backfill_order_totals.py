@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Prefetch
+
+BATCH_SIZE = 500
+
+
+def backfill_order_totals(apps, schema_editor):
+    """
+    Orders from before 0008/0009 have zero totals and empty option labels:
+    fill them from the price snapshots, like `manage.py recompute_order_totals`
+    (historical models have no compute_totals(), so the arithmetic is inlined).
+    """
+    Order = apps.get_model("FoodOrdering", "Order")
+    OrderItem = apps.get_model("FoodOrdering", "OrderItem")
+    OrderItemOption = apps.get_model("FoodOrdering", "OrderItemOption")
+
+    last_id = 0
+    while True:
+        ids = list(Order.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        last_id = ids[-1]
+        batch = list(
+            Order.objects.filter(id__in=ids)
+            .only("id", "total_amount")
+            .prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=OrderItem.objects.prefetch_related(
+                        Prefetch("chosen_options", queryset=OrderItemOption.objects.select_related("option__group"))
+                    ),
+                ),
+            )
+        )
+
+        items = []
+        for order in batch:
+            total = Decimal("0.00")
+            for item in order.items.all():
+                chosen = item.chosen_options.all()
+                item.options_total = sum((o.price_delta_at_time for o in chosen), Decimal("0.00"))
+                item.option_label = " | ".join(f"{o.option.group.name}: {o.option.name}" for o in chosen)[:500]
+                item.subtotal = item.price_at_time * item.quantity
+                item.line_total = (item.price_at_time + item.options_total) * item.quantity
+                total += item.line_total
+                items.append(item)
+            order.total_amount = total
+
+        OrderItem.objects.bulk_update(items, ["options_total", "option_label", "subtotal", "line_total"], batch_size=500)
+        Order.objects.bulk_update(batch, ["total_amount"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FoodOrdering', '0016_variants_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from decimal import Decimal
 import uuid
 from django.conf import settings
 from django.db import models
+from django.db.models import Sum
 from django.utils import timezone
 
 
@@ -10,6 +11,7 @@ class Category(models.Model):
     slug = models.SlugField(max_length=140, unique=True, blank=True)
     is_active = models.BooleanField(default=True)
     sort_order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)  # seen by menu.py
 
     class Meta:
         ordering = ["sort_order", "name"]
@@ -25,7 +27,11 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=8, decimal_places=2)
     image = models.ImageField(upload_to="products/", blank=True, null=True)
+    # Resized AVIF/WebP copies of `image`, written by the job worker (see images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    variants_updated_at = models.DateTimeField(null=True, blank=True, editable=False)  # seen by menu.py
     is_available = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -52,6 +58,13 @@ class TableReservation(models.Model):
         default="new",
     )
 
+    class Meta:
+        indexes = [
+            # dashboard feed: newest first, optionally one status (dashboard.reservation_feed)
+            models.Index(fields=["-created_at", "-id"], name="reservation_created_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="reservation_status_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.date} {self.time} ({self.people})"
 
@@ -74,6 +87,7 @@ class OptionGroup(models.Model):
 
     sort_order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["sort_order", "name"]
@@ -94,6 +108,7 @@ class Option(models.Model):
     price_delta = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal("0.00"))
     sort_order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["sort_order", "name"]
@@ -117,6 +132,7 @@ class ProductOptionGroup(models.Model):
     max_select = models.PositiveIntegerField(null=True, blank=True)
 
     sort_order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("product", "group")
@@ -162,6 +178,7 @@ class Order(models.Model):
     status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="CART")
     created_at = models.DateTimeField(auto_now_add=True)
     placed_at = models.DateTimeField(null=True, blank=True)
+    preparing_at = models.DateTimeField(null=True, blank=True)  # kitchen started (see kitchen.py)
 
     payment_method = models.CharField(max_length=20, blank=True)  # "CASH" or "STRIPE"
     is_paid = models.BooleanField(default=False)
@@ -170,14 +187,52 @@ class Order(models.Model):
 
     order_number = models.CharField(max_length=20, unique=True, null=True, blank=True, db_index=True)
 
+    # Denormalized sum of items.line_total (see recalculate_total / recompute_order_totals)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+
+    @staticmethod
+    def generate_order_number():
+        # Example: OK-20260113-7F3A2B (unique is enforced by the DB, see placement.place_order)
+        return f"OK-{timezone.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+
     def ensure_order_number(self):
         if not self.order_number:
-            # Example: OK-20260113-7F3A2B
-            self.order_number = f"OK-{timezone.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+            self.order_number = self.generate_order_number()
 
 
     def total_price(self):
-        return sum(item.total_price() for item in self.items.all())
+        # stored column, no item/option queries
+        return self.total_amount
+
+    def recalculate_total(self, save=True):
+        """Re-sum the stored line totals (one aggregate query)."""
+        self.total_amount = self.items.aggregate(total=Sum("line_total"))["total"] or Decimal("0.00")
+        if save:
+            self.save(update_fields=["total_amount"])
+        return self.total_amount
+
+    class Meta:
+        # Carts make up most rows, so the dashboard/reporting indexes leave them
+        # out (partial indexes); their WHERE must match the queries' exclude(status="CART").
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], condition=~models.Q(status="CART"), name="order_placed_created_idx"
+            ),
+            models.Index(
+                fields=["status", "-created_at", "-id"],
+                condition=~models.Q(status="CART"),
+                name="order_status_created_idx",
+            ),
+            models.Index(
+                fields=["placed_at"],
+                condition=models.Q(is_paid=True) & ~models.Q(status="CART"),
+                name="order_paid_placed_idx",
+            ),
+            # sales rollups: orders placed in a time range
+            models.Index(fields=["placed_at"], condition=~models.Q(status="CART"), name="order_placed_at_idx"),
+            # purge_abandoned_carts walks carts in id order and checks their age from the index alone
+            models.Index(fields=["id", "created_at"], condition=models.Q(status="CART"), name="order_cart_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.status}"
@@ -194,22 +249,64 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     price_at_time = models.DecimalField(max_digits=8, decimal_places=2)
 
-    def options_total(self):
-        # options_total for ONE unit
-        return sum(o.price_delta_at_time for o in self.chosen_options.all())
+    # Denormalized totals, derived in save() from price_at_time/quantity/options_total
+    options_total = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal("0.00"))  # ONE unit
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))  # base * quantity
+    line_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))  # unit_total * quantity
+    # "Group: Option | Group: Option", rendered once when the item is written (Stripe name, cart/success pages)
+    option_label = models.CharField(max_length=500, blank=True, default="")
+
+    @staticmethod
+    def build_option_label(pairs):
+        """pairs: iterable of (group name, option name)."""
+        return " | ".join(f"{group}: {name}" for group, name in pairs)[:500]
+
+    def compute_totals(self):
+        self.subtotal = self.price_at_time * self.quantity
+        self.line_total = self.unit_total() * self.quantity
+
+    def recalculate_totals(self, save=True):
+        """Re-read options_total/option_label from chosen_options (after options were changed directly)."""
+        chosen = list(self.chosen_options.select_related("option__group"))
+        self.options_total = sum((c.price_delta_at_time for c in chosen), Decimal("0.00"))
+        self.option_label = self.build_option_label((c.option.group.name, c.option.name) for c in chosen)
+        self.compute_totals()
+        if save:
+            self.save(update_fields=["options_total", "option_label", "subtotal", "line_total"])
+
+    def save(self, *args, **kwargs):
+        self.compute_totals()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "subtotal", "line_total"}
+        super().save(*args, **kwargs)
 
     def unit_total(self):
         # base + options for ONE unit
-        return self.price_at_time + self.options_total()
+        return self.price_at_time + self.options_total
 
     def total_price(self):
         # unit_total * quantity
-        return self.unit_total() * self.quantity
+        return self.line_total
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
 
 
+class ProductPrepTime(models.Model):
+    """
+    Learned kitchen time for one unit of a product, updated whenever an order
+    containing it leaves the kitchen (see kitchen.py).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="prep_time")
+    seconds = models.FloatField()
+    samples = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.name}: {self.seconds:.0f}s ({self.samples} orders)"
+
+
 class OrderItemOption(models.Model):
     """
     Stores chosen options per order item (snapshot price delta at the time).
@@ -225,6 +322,91 @@ class OrderItemOption(models.Model):
         return f"{self.order_item} - {self.option.group.name}: {self.option.name}"
 
 
+class OrderStatusEvent(models.Model):
+    """
+    Append-only log of order status transitions (see status_log.py).
+    `elapsed_seconds` is the time the order spent in `from_status`, so stage
+    latencies aggregate over single rows without pairing them up.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="status_events", db_index=False)
+    from_status = models.CharField(max_length=12, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=12, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+    elapsed_seconds = models.PositiveIntegerField(null=True, blank=True)  # None: start unknown
+
+    class Meta:
+        indexes = [
+            # last transition of an order (covers the FK lookups too)
+            models.Index(fields=["order", "created_at"], name="status_event_order_idx"),
+            # reports over a time range
+            models.Index(fields=["created_at"], name="status_event_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+# -----------------------------
+# SALES ROLLUPS (see analytics.py)
+# -----------------------------
+
+ROLLUP_PERIODS = (("hour", "Hour"), ("day", "Day"))
+
+
+class SalesRollup(models.Model):
+    """Orders and revenue per period and payment method (placed, not cancelled orders)."""
+    period = models.CharField(max_length=4, choices=ROLLUP_PERIODS)
+    period_start = models.DateTimeField()
+    payment_method = models.CharField(max_length=20, blank=True)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period", "period_start", "payment_method"], name="sales_rollup_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start:%Y-%m-%d %H:%M} {self.payment_method}: {self.revenue}"
+
+
+class ProductSalesRollup(models.Model):
+    period = models.CharField(max_length=4, choices=ROLLUP_PERIODS)
+    period_start = models.DateTimeField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period", "period_start", "product"], name="product_sales_rollup_unique"),
+        ]
+
+
+class OptionSalesRollup(models.Model):
+    """How often an option was chosen (item quantities) and its price deltas."""
+    period = models.CharField(max_length=4, choices=ROLLUP_PERIODS)
+    period_start = models.DateTimeField()
+    option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name="+")
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period", "period_start", "option"], name="option_sales_rollup_unique"),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Everything up to `position` is reflected in the rollups named `name`."""
+    name = models.CharField(max_length=50, primary_key=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.position:%Y-%m-%d %H:%M:%S}"
+
+
 class Event(models.Model):
     """
     Event model for displaying events on the website.
@@ -235,6 +417,8 @@ class Event(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=8, decimal_places=2)
     image = models.ImageField(upload_to="events/", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # see images.py
+    variants_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     sort_order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -245,3 +429,41 @@ class Event(models.Model):
 
     def __str__(self):
         return f"{self.title} (€{self.price})"
+
+
+# -----------------------------
+# BACKGROUND JOBS (see jobs.py)
+# -----------------------------
+
+class Job(models.Model):
+    """
+    A unit of deferred work (webhook processing, confirmation mails, ...),
+    picked up by `python manage.py run_jobs`.
+    """
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    )
+
+    name = models.CharField(max_length=100)  # handler registered with @jobs.handler(name)
+    payload = models.JSONField(default=dict, blank=True)
+    # Deduplication, e.g. "stripe:<event id>": enqueueing the same key twice is a no-op
+    key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # not before (retry backoff)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_at"], name="job_status_run_at_idx")]
+
+    def __str__(self):
+        return f"Job #{self.id} {self.name} - {self.status}"
@@ -0,0 +1,202 @@
+"""
+Payment gateway: the only place that talks to Stripe.
+
+Views call `get_gateway()` instead of the global `stripe` module:
+
+- `StripeGateway` keeps one `StripeClient` per process with a pooled HTTP
+  session (keep-alive instead of a TLS handshake per call), strict
+  connect/read timeouts and a bounded number of network retries.
+- `acreate_checkout_session()` / `aretrieve_checkout_session()` are for async
+  views: they await Stripe over httpx when it is installed, otherwise the
+  blocking call runs in a thread pool, never in the request's worker thread.
+- `FakeGateway` answers in-process without network (tests, load tests,
+  local development): set PAYMENT_GATEWAY = "FoodOrdering.payments.FakeGateway".
+"""
+import asyncio
+import itertools
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import stripe
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import httpx  # optional: native async Stripe calls
+except ImportError:
+    httpx = None
+
+POOL_SIZE = 10
+
+
+class PaymentGatewayError(Exception):
+    """Stripe could not be reached or rejected the request."""
+
+
+class InvalidWebhookError(PaymentGatewayError):
+    """Webhook payload or signature is invalid."""
+
+
+@dataclass(frozen=True)
+class CheckoutSession:
+    id: str
+    url: str
+    payment_status: str
+    payment_intent: str = ""
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def is_paid(self):
+        return self.payment_status == "paid"
+
+    @classmethod
+    def from_stripe(cls, session):
+        """From a stripe.checkout.Session (or the plain dict FakeGateway builds)."""
+        if isinstance(session, stripe.StripeObject):
+            session = session.to_dict()  # not a dict subclass (no .get()) since stripe 15
+        return cls(
+            id=session["id"],
+            url=session.get("url") or "",
+            payment_status=session.get("payment_status") or "",
+            payment_intent=session.get("payment_intent") or "",
+            metadata=dict(session.get("metadata") or {}),
+        )
+
+
+class StripeGateway:
+    def __init__(self):
+        self.webhook_secret = settings.STRIPE_WEBHOOK_SECRET
+        self._loop = None  # the httpx pool belongs to the first event loop that used it
+        self.client = stripe.StripeClient(
+            settings.STRIPE_SECRET_KEY,
+            max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+            http_client=self._http_client(settings.STRIPE_TIMEOUT),
+        )
+
+    @staticmethod
+    def _http_client(timeout):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+        async_client = None
+        if httpx is not None:
+            connect, read = timeout
+            async_client = stripe.HTTPXClient(timeout=httpx.Timeout(read, connect=connect))
+        return stripe.RequestsClient(timeout=timeout, session=session, async_fallback_client=async_client)
+
+    @staticmethod
+    def _session_params(line_items, success_url, cancel_url, metadata):
+        return {
+            "mode": "payment",
+            "payment_method_types": ["card"],
+            "line_items": line_items,
+            "success_url": success_url,
+            "cancel_url": cancel_url,
+            "metadata": metadata,
+        }
+
+    def create_checkout_session(self, line_items, success_url, cancel_url, metadata):
+        params = self._session_params(line_items, success_url, cancel_url, metadata)
+        try:
+            return CheckoutSession.from_stripe(self.client.v1.checkout.sessions.create(params))
+        except stripe.StripeError as e:
+            raise PaymentGatewayError(str(e)) from e
+
+    def retrieve_checkout_session(self, session_id):
+        try:
+            return CheckoutSession.from_stripe(self.client.v1.checkout.sessions.retrieve(session_id))
+        except stripe.StripeError as e:
+            raise PaymentGatewayError(str(e)) from e
+
+    def _native_async(self):
+        # Under WSGI every async view gets a fresh loop (async_to_sync), where the
+        # pooled httpx connections can't be reused: use the thread pool there.
+        if httpx is None:
+            return False
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        return self._loop is loop
+
+    async def acreate_checkout_session(self, line_items, success_url, cancel_url, metadata):
+        if not self._native_async():
+            return await sync_to_async(self.create_checkout_session, thread_sensitive=False)(
+                line_items, success_url, cancel_url, metadata
+            )
+        params = self._session_params(line_items, success_url, cancel_url, metadata)
+        try:
+            return CheckoutSession.from_stripe(await self.client.v1.checkout.sessions.create_async(params))
+        except stripe.StripeError as e:
+            raise PaymentGatewayError(str(e)) from e
+
+    async def aretrieve_checkout_session(self, session_id):
+        if not self._native_async():
+            return await sync_to_async(self.retrieve_checkout_session, thread_sensitive=False)(session_id)
+        try:
+            return CheckoutSession.from_stripe(await self.client.v1.checkout.sessions.retrieve_async(session_id))
+        except stripe.StripeError as e:
+            raise PaymentGatewayError(str(e)) from e
+
+    def construct_event(self, payload, sig_header):
+        """
+        Verify the Stripe-Signature header (local HMAC, no network) and return
+        the event as a plain dict, like FakeGateway (stripe.Event has no .get()).
+        """
+        try:
+            event = self.client.construct_event(payload, sig_header, self.webhook_secret)
+        except (ValueError, stripe.SignatureVerificationError) as e:
+            raise InvalidWebhookError(str(e)) from e
+        return event.to_dict()
+
+
+class FakeGateway:
+    """
+    In-memory Stripe stand-in: sessions get ids `cs_fake_<n>` and are reported
+    with `payment_status` (default "paid"); the checkout URL is the success URL
+    itself. Webhook payloads are parsed without signature check.
+    """
+
+    def __init__(self, payment_status="paid"):
+        self.payment_status = payment_status
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    def create_checkout_session(self, line_items, success_url, cancel_url, metadata):
+        session_id = f"cs_fake_{next(self._ids)}"
+        session = CheckoutSession(
+            id=session_id,
+            url=success_url.replace("{CHECKOUT_SESSION_ID}", session_id),
+            payment_status=self.payment_status,
+            payment_intent=f"pi_fake_{session_id[8:]}",
+            metadata=dict(metadata),
+        )
+        self.sessions[session_id] = (session, line_items)
+        return session
+
+    def retrieve_checkout_session(self, session_id):
+        try:
+            return self.sessions[session_id][0]
+        except KeyError:
+            raise PaymentGatewayError(f"No such checkout session: {session_id}") from None
+
+    async def acreate_checkout_session(self, *args, **kwargs):
+        return self.create_checkout_session(*args, **kwargs)
+
+    async def aretrieve_checkout_session(self, session_id):
+        return self.retrieve_checkout_session(session_id)
+
+    def construct_event(self, payload, sig_header):
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            raise InvalidWebhookError(str(e)) from e
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    """The configured gateway (settings.PAYMENT_GATEWAY), one per process."""
+    return import_string(settings.PAYMENT_GATEWAY)()
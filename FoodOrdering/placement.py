@@ -0,0 +1,84 @@
+"""
+Order placement: the single CART -> PLACED transition used by cash checkout,
+the Stripe success redirect and the Stripe webhook.
+
+- The transition is a conditional `UPDATE ... WHERE status = 'CART'`, so when
+  the success redirect and the webhook race, exactly one of them places the
+  order and the other becomes a no-op (or only records the payment).
+- The row is locked with SELECT ... FOR UPDATE where the backend supports it
+  (PostgreSQL); SQLite serializes writers on its own.
+- A placed order enqueues an "order.placed" job in the same transaction;
+  its side effects (confirmation mail, ...) run in the job worker.
+- The CART -> PLACED transition is logged (status_log.py) in the same
+  transaction; live dashboards learn about the order from that row (broker.py),
+  whichever process placed it.
+- Order numbers are random (OK-YYYYMMDD-6HEX); a unique clash is retried with
+  a fresh number inside a savepoint instead of surfacing as a 500.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .jobs import enqueue
+from .kitchen import order_status_changed
+from .models import Order, OrderItem
+from .status_log import record_transition
+
+ORDER_NUMBER_ATTEMPTS = 5
+
+
+def _set_with_unique_order_number(order_id, values):
+    """Run the conditional CART update with a fresh order number; returns rows updated."""
+    for _ in range(ORDER_NUMBER_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return Order.objects.filter(id=order_id, status="CART").update(
+                    order_number=Order.generate_order_number(), **values
+                )
+        except IntegrityError:
+            continue  # order_number clash, try another one
+    raise IntegrityError(f"Could not allocate a unique order number for order {order_id}")
+
+
+@transaction.atomic
+def place_order(order_id, *, payment_method, is_paid=False, **fields):
+    """
+    Idempotently place the cart `order_id`.
+
+    `fields` are extra Order columns written in the same UPDATE (customer
+    data, Stripe ids). Returns `(order, placed)`; `placed` is False when the
+    order was already placed by a concurrent request, `order` is None if it
+    doesn't exist.
+    """
+    order = Order.objects.select_for_update().filter(id=order_id).first()
+    if order is None:
+        return None, False
+
+    placed = False
+    if order.status == "CART":
+        total = (
+            OrderItem.objects.filter(order_id=order_id).aggregate(total=Sum("line_total"))["total"]
+            or Decimal("0.00")
+        )
+        placed = bool(_set_with_unique_order_number(order_id, {
+            **fields,
+            "status": "PLACED",
+            "payment_method": payment_method,
+            "is_paid": is_paid,
+            "placed_at": timezone.now(),
+            "total_amount": total,
+        }))
+    elif is_paid:
+        # Placed by the other Stripe path already: only record the payment once
+        Order.objects.filter(id=order_id, is_paid=False).update(
+            is_paid=True, payment_method=payment_method, **fields
+        )
+
+    order.refresh_from_db()
+    if placed:
+        enqueue("order.placed", {"order_id": order.id}, key=f"order.placed:{order.id}")
+        record_transition(order, "CART")
+        order_status_changed(order, "CART")  # joins the kitchen queue
+    return order, placed
@@ -0,0 +1,244 @@
+"""
+Table availability for reservations.
+
+Capacity is a set of tables per size (RESERVATION_TABLES, seats -> count)
+and the day is cut into RESERVATION_SLOT_MINUTES slots within the opening
+hours. A reservation occupies the smallest free table that seats the party
+for RESERVATION_DURATION_MINUTES (every slot it overlaps, until closing).
+
+- `get_day(date)` returns a DayAvailability: the occupancy of every slot,
+  built from that day's new/confirmed reservations with one query and kept
+  in process memory. A version per date in the Django cache is bumped after
+  every committed reservation write (signals.py), so workers rebuild on their
+  next lookup; entries are also rebuilt after AVAILABILITY_TTL as a safety net.
+  Free start times per party size are memoized on the day, so the JSON
+  endpoint answers from memory.
+- `reserve(**fields)` is the only way the site books a table: inside one
+  transaction it takes a per-day lock (SQLite: the IMMEDIATE write lock,
+  PostgreSQL: an advisory lock), rebuilds the day from the database and
+  inserts only if a table is still free. Concurrent submissions for the last
+  table therefore cannot both succeed.
+"""
+import threading
+import time as time_module
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache_versions import bump_version, get_version
+from .models import TableReservation
+
+AVAILABILITY_TTL = 60  # seconds; in-process days are rebuilt after this even without a version bump
+ADVISORY_LOCK_CLASS = 7021  # pg_advisory_xact_lock(class, day) namespace for reservations
+ACTIVE_STATUSES = ("new", "confirmed")
+
+WEEKDAYS = ("Mo", "Di", "Mi", "Do", "Fr", "Sa", "So")
+
+
+class ReservationError(Exception):
+    """A reservation request that can't be accepted; the message is shown to the customer."""
+
+
+class SlotUnavailable(ReservationError):
+    def __init__(self, message, alternatives=()):
+        super().__init__(message)
+        self.alternatives = alternatives
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _parse_hhmm(raw):
+    hours, minutes = raw.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def table_sizes():
+    """((seats, count), ...) smallest table first."""
+    return tuple(sorted((int(seats), count) for seats, count in settings.RESERVATION_TABLES.items()))
+
+
+def opening_hours(day):
+    """(open, close) in minutes after midnight, or None if closed that day."""
+    hours = settings.RESERVATION_HOURS.get(day.weekday())
+    if not hours:
+        return None
+    return _parse_hhmm(hours[0]), _parse_hhmm(hours[1])
+
+
+class DayAvailability:
+    """Slot occupancy of one day. Build with `build_day()`; read-only once cached."""
+
+    def __init__(self, day, reservations=()):
+        self.day = day
+        self.slot = settings.RESERVATION_SLOT_MINUTES
+        self.duration = settings.RESERVATION_DURATION_MINUTES
+        self.sizes = table_sizes()
+        hours = opening_hours(day)
+        self.open, self.close = hours or (0, 0)
+        last_start = self.close - settings.RESERVATION_LAST_SEATING_MINUTES
+        self.starts = tuple(range(self.open, last_start + 1, self.slot)) if hours else ()
+        n_slots = -(-(self.close - self.open) // self.slot) if hours else 0
+        self.used = [[0] * len(self.sizes) for _ in range(n_slots)]  # [slot][table size] -> tables taken
+        self._free = {}  # people -> free start times (memo)
+        for start, people in reservations:
+            self.add(start, people, force=True)
+
+    def _window(self, start):
+        """Slot indexes a reservation starting at `start` (minutes) occupies."""
+        first = max(0, (start - self.open) // self.slot)
+        end = min(self.close, start + self.duration)
+        last = -(-(end - self.open) // self.slot)
+        return range(first, min(last, len(self.used)))
+
+    def table_for(self, start, people):
+        """Index of the smallest table size free for the whole window, or None."""
+        window = self._window(start)
+        if not window:
+            return None
+        for i, (seats, count) in enumerate(self.sizes):
+            if seats >= people and all(self.used[s][i] < count for s in window):
+                return i
+        return None
+
+    def add(self, start, people, force=False):
+        """
+        Occupy a table. `force` records reservations that already exist even if
+        the day is overbooked (manual entries), so they still block capacity.
+        """
+        i = self.table_for(start, people)
+        if i is None:
+            if not force:
+                return False
+            i = next((i for i, (seats, _) in enumerate(self.sizes) if seats >= people), len(self.sizes) - 1)
+        for s in self._window(start):
+            self.used[s][i] += 1
+        self._free.clear()
+        return True
+
+    def free_starts(self, people):
+        """Start times (minutes) with a free table for `people`."""
+        free = self._free.get(people)
+        if free is None:
+            free = self._free[people] = tuple(start for start in self.starts if self.table_for(start, people) is not None)
+        return free
+
+    def free_slots(self, people):
+        return [format_minutes(start) for start in self.free_starts(people)]
+
+
+def build_day(day):
+    """Occupancy from the database (one query)."""
+    rows = (
+        TableReservation.objects.filter(date=day, status__in=ACTIVE_STATUSES)
+        .order_by("created_at", "id")
+        .values_list("time", "people")
+    )
+    return DayAvailability(day, ((_minutes(t), people) for t, people in rows))
+
+
+# -----------------------------
+# IN-PROCESS DAY INDEX
+# -----------------------------
+
+_lock = threading.Lock()
+_days = {}  # date -> (version, built_at, DayAvailability)
+
+
+def _version_key(day):
+    return f"reservations:version:{day.isoformat()}"
+
+
+def invalidate_day(day):
+    bump_version(_version_key(day))
+
+
+def get_day(day):
+    version = get_version(_version_key(day))
+    now = time_module.monotonic()
+    entry = _days.get(day)
+    if entry is not None and entry[0] == version and now - entry[1] < AVAILABILITY_TTL:
+        return entry[2]
+
+    built = build_day(day)
+    with _lock:
+        # keep today and later only
+        for old in [d for d in _days if d < timezone.localdate()]:
+            del _days[old]
+        _days[day] = (version, now, built)
+    return built
+
+
+# -----------------------------
+# REQUESTS
+# -----------------------------
+
+def largest_table():
+    return max(seats for seats, _ in table_sizes())
+
+
+def validate_request(day, start, people):
+    """Checks that don't depend on other reservations; raises ReservationError."""
+    now = timezone.localtime()
+    if day < now.date() or (day == now.date() and _minutes(start) <= _minutes(now.time())):
+        raise ReservationError("Bitte wählen Sie einen Zeitpunkt in der Zukunft.")
+    if day > now.date() + timedelta(days=settings.RESERVATION_MAX_DAYS_AHEAD):
+        raise ReservationError(
+            f"Reservierungen sind bis zu {settings.RESERVATION_MAX_DAYS_AHEAD} Tage im Voraus möglich."
+        )
+    if people > largest_table():
+        raise ReservationError(f"Für Gruppen über {largest_table()} Personen rufen Sie uns bitte an.")
+    hours = opening_hours(day)
+    if hours is None:
+        raise ReservationError(f"Am {WEEKDAYS[day.weekday()]} haben wir geschlossen.")
+    last_start = hours[1] - settings.RESERVATION_LAST_SEATING_MINUTES
+    if not hours[0] <= _minutes(start) <= last_start:
+        raise ReservationError(
+            f"Reservierungen sind zwischen {format_minutes(hours[0])} und {format_minutes(last_start)} Uhr möglich."
+        )
+
+
+def _lock_day(day):
+    """Serialize bookings for `day` until the transaction ends."""
+    # SQLite: transactions are BEGIN IMMEDIATE (settings.DATABASES), one writer at a time already.
+    # Row locks wouldn't help on PostgreSQL (the competing row doesn't exist yet): lock the day instead.
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ADVISORY_LOCK_CLASS, day.toordinal()])
+
+
+@transaction.atomic
+def reserve(**fields):
+    """
+    Create a TableReservation if a table is free at fields["date"]/["time"]
+    for fields["people"]; raises SlotUnavailable (with free alternatives) if not.
+    """
+    day, start, people = fields["date"], fields["time"], fields["people"]
+    validate_request(day, start, people)
+    _lock_day(day)
+    current = build_day(day)  # fresh, under the lock
+    if current.table_for(_minutes(start), people) is None:
+        raise SlotUnavailable(
+            f"Für {people} Personen ist um {start:%H:%M} Uhr leider kein Tisch mehr frei.",
+            alternatives=current.free_slots(people),
+        )
+    return TableReservation.objects.create(**fields)
+
+
+def available_slots(day, people):
+    """Free start times ("HH:MM") for `people` on `day`; empty for invalid requests."""
+    today = timezone.localdate()
+    if not 1 <= people <= largest_table() or not today <= day <= today + timedelta(days=settings.RESERVATION_MAX_DAYS_AHEAD):
+        return []
+    starts = get_day(day).free_starts(people)
+    if day == today:
+        now = _minutes(timezone.localtime().time())
+        starts = [start for start in starts if start > now]
+    return [format_minutes(start) for start in starts]
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+
+from .images import needs_variants
+from .jobs import enqueue
+from .menu import invalidate_menu
+from .models import Category, Event, Option, OptionGroup, Order, Product, ProductOptionGroup, TableReservation
+from .reservations import invalidate_day
+from .tracking import invalidate_tracking
+
+MENU_MODELS = (Category, Product, OptionGroup, Option, ProductOptionGroup, Event)
+
+
+def menu_changed(sender, **kwargs):
+    """
+    Any menu write (admin, seed command, shell) invalidates the menu snapshot.
+    After commit: a request between the write and the commit would otherwise
+    rebuild from the old rows and cache them under the new version.
+    """
+    transaction.on_commit(invalidate_menu)
+
+
+for model in MENU_MODELS:
+    post_save.connect(menu_changed, sender=model, dispatch_uid=f"menu_changed_save_{model.__name__}")
+    post_delete.connect(menu_changed, sender=model, dispatch_uid=f"menu_changed_delete_{model.__name__}")
+
+
+def order_changed(sender, instance, **kwargs):
+    """Status (or anything else shown to the customer) changed: drop the tracking entry after commit."""
+    order_number = instance.order_number
+    transaction.on_commit(lambda: invalidate_tracking(order_number))
+
+
+post_save.connect(order_changed, sender=Order, dispatch_uid="order_changed_save")
+post_delete.connect(order_changed, sender=Order, dispatch_uid="order_changed_delete")
+
+
+def image_changed(sender, instance, **kwargs):
+    """New/replaced product or event image: resize it in the job worker, not in the request."""
+    if needs_variants(instance):
+        enqueue(
+            "images.generate",
+            {"model": sender._meta.model_name, "id": instance.id},
+            key=f"images:{sender._meta.model_name}:{instance.id}:{instance.image.name}",
+        )
+
+
+for model in (Product, Event):
+    post_save.connect(image_changed, sender=model, dispatch_uid=f"image_changed_{model.__name__}")
+
+
+def reservation_changed(sender, instance, **kwargs):
+    """
+    Availability of that day changed. After commit, so no worker rebuilds the
+    day from a snapshot without this write under the new version.
+    """
+    day = instance.date
+    transaction.on_commit(lambda: invalidate_day(day))
+
+
+post_save.connect(reservation_changed, sender=TableReservation, dispatch_uid="reservation_changed_save")
+post_delete.connect(reservation_changed, sender=TableReservation, dispatch_uid="reservation_changed_delete")
+
+
+def sqlite_connected(sender, connection, **kwargs):
+    """
+    WAL for SQLite (see settings.DATABASES). The journal mode is stored in the
+    database file, so the sample db.sqlite3 tracked in git is left alone
+    unless SQLITE_WAL forces it.
+    """
+    if connection.vendor != "sqlite":
+        return
+    if not settings.SQLITE_WAL and Path(connection.settings_dict["NAME"]) == Path(settings.SQLITE_SAMPLE_DB):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+
+
+connection_created.connect(sqlite_connected, dispatch_uid="sqlite_connected")
@@ -0,0 +1,193 @@
+"""
+Static asset build and serving.
+
+- `CompressedManifestStaticFilesStorage` (STORAGES["staticfiles"] when not
+  DEBUG): `collectstatic` writes content-hashed copies (`main.3f2a91c0.css`)
+  plus the `staticfiles.json` manifest, so `{% static %}` URLs change
+  whenever a file changes. Text assets additionally get precompressed `.gz`
+  and, with the optional `brotli` package, `.br` siblings.
+- `StaticFilesMiddleware` (SERVE_STATIC) serves STATIC_ROOT from the app
+  itself when no reverse proxy is in front: the best precompressed variant
+  the client accepts (Accept-Encoding q-values; `q=0` refuses a coding),
+  and `Cache-Control: immutable` for one year on hashed
+  names (a new build means new URLs, so nothing is ever revalidated).
+  Unhashed names get a short max-age with Last-Modified revalidation.
+
+Behind nginx/a CDN, leave SERVE_STATIC off and point the proxy at
+STATIC_ROOT (with gzip_static/brotli_static for the precompressed files).
+"""
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli  # optional: .br variants
+except ImportError:
+    brotli = None
+
+COMPRESS_EXTENSIONS = {".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt", ".html", ".xml", ".ico", ".ttf", ".eot"}
+COMPRESS_MIN_SIZE = 1024  # bytes; below that the saving is lost in headers
+COMPRESS_MIN_RATIO = 0.95  # keep a variant only if it saves at least 5%
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=60"
+
+# (suffix, Content-Encoding), best first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(content):
+    """{suffix: bytes} of the worthwhile compressed variants of `content`."""
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    return {suffix: data for suffix, data in variants.items() if len(data) < len(content) * COMPRESS_MIN_RATIO}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        # A {% static %} reference without a collected file (e.g. a video that
+        # was never added) keeps its plain URL and 404s, instead of a 500 page.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed_names:
+            self._write_compressed(hashed_name)
+
+    def _write_compressed(self, name):
+        if posixpath.splitext(name)[1].lower() not in COMPRESS_EXTENSIONS:
+            return
+        path = self.path(name)
+        if os.path.getsize(path) < COMPRESS_MIN_SIZE:
+            return
+        with open(path, "rb") as f:
+            content = f.read()
+        for suffix, data in compress(content).items():
+            with open(path + suffix, "wb") as f:
+                f.write(data)
+
+
+def _hashed_names(static_root):
+    """Hashed file names from collectstatic's manifest (empty without a build)."""
+    try:
+        with open(os.path.join(static_root, ManifestStaticFilesStorage.manifest_name), encoding="utf-8") as f:
+            return set(json.load(f).get("paths", {}).values())
+    except (OSError, ValueError):
+        return set()
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header; "*" stands for any coding not listed."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0  # malformed: don't guess
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header, available):
+    """Best of `available` (suffix by coding, in ENCODINGS order) with q > 0, or None."""
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding, _ in ENCODINGS:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if coding in available and q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class StaticFilesMiddleware:
+    """Serve STATIC_ROOT (after collectstatic) before sessions/auth run; see module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, "SERVE_STATIC", False)
+        self.prefix = "/" + settings.STATIC_URL.strip("/") + "/"
+        self.root = str(settings.STATIC_ROOT)
+        self.hashed = _hashed_names(self.root) if self.enabled else set()
+
+    def _wants_static(self, request):
+        return self.enabled and request.method in ("GET", "HEAD") and request.path.startswith(self.prefix)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self._wants_static(request):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self._wants_static(request):
+            # stat/open are blocking file system calls: keep them off the event loop
+            response = await sync_to_async(self.serve, thread_sensitive=False)(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:  # ../ outside STATIC_ROOT
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(path)
+        available = {coding: suffix for coding, suffix in ENCODINGS if os.path.isfile(path + suffix)}
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), available) if available else None
+        if encoding:
+            path += available[encoding]
+
+        response = FileResponse(open(path, "rb"), content_type=content_type or "application/octet-stream")
+        del response["Content-Disposition"]  # FileResponse adds the (.gz/.br) file name
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if posixpath.splitext(name)[1].lower() in COMPRESS_EXTENSIONS:
+            response["Vary"] = "Accept-Encoding"
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Cache-Control"] = IMMUTABLE if name in self.hashed else REVALIDATE
+        return response
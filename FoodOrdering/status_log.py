@@ -0,0 +1,151 @@
+"""
+Order status transition log and order-flow reports.
+
+Every status change writes one OrderStatusEvent (dashboard updates and
+place_order, which covers cash checkout, the Stripe success redirect and the
+webhook). Rows are never updated; `elapsed_seconds` holds the time spent in
+the previous status, taken from the order's previous event (or `created_at`
+for carts, `placed_at` for orders placed before the log existed).
+
+The reports aggregate in the database and return a handful of rows no
+matter how long the log is:
+- `stage_latencies()`: per transition (PLACED -> PREPARING, ...) count,
+  average and percentiles of the time spent in the stage. Percentiles are
+  nearest-rank, picked with ROW_NUMBER()/COUNT() windows, which SQLite and
+  PostgreSQL both support.
+- `hourly_throughput()`: transitions per hour and target status.
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, F, Max, Q, Window
+from django.db.models.functions import RowNumber, TruncHour
+from django.utils import timezone
+
+from .models import OrderStatusEvent
+
+PERCENTILES = (50, 90, 99)
+
+
+def _elapsed(since, now):
+    if since is None:
+        return None
+    return max(0, int((now - since).total_seconds()))
+
+
+def record_transitions(changes, now=None):
+    """
+    Log status changes; `changes` is [(order, previous_status)] with the new
+    status already set on the order. At most 2 queries for any number of orders.
+    """
+    now = now or timezone.now()
+    changes = [(order, previous) for order, previous in changes if order.status != previous]
+    if not changes:
+        return []
+
+    known = [order.id for order, previous in changes if previous != "CART"]
+    last_event = {}
+    if known:
+        last_event = dict(
+            OrderStatusEvent.objects.filter(order_id__in=known)
+            .values("order_id")
+            .annotate(last=Max("created_at"))
+            .values_list("order_id", "last")
+        )
+
+    def since(order, previous):
+        if previous == "CART":
+            return order.created_at
+        if order.id in last_event:
+            return last_event[order.id]
+        return order.placed_at if previous == "PLACED" else None
+
+    return OrderStatusEvent.objects.bulk_create([
+        OrderStatusEvent(
+            order_id=order.id,
+            from_status=previous,
+            to_status=order.status,
+            created_at=now,
+            elapsed_seconds=_elapsed(since(order, previous), now),
+        )
+        for order, previous in changes
+    ])
+
+
+def record_transition(order, previous_status, now=None):
+    """Log one status change (call after saving the order)."""
+    return record_transitions([(order, previous_status)], now=now)
+
+
+# -----------------------------
+# REPORTS
+# -----------------------------
+
+def _range(since, until):
+    until = until or timezone.now()
+    return OrderStatusEvent.objects.filter(created_at__gte=since, created_at__lt=until)
+
+
+def stage_latencies(since, until=None, percentiles=PERCENTILES):
+    """
+    [{"from_status", "to_status", "count", "avg_seconds", "p50", ...}] for the
+    transitions in [since, until), slowest stage (by the highest percentile) first.
+    """
+    stage = [F("from_status"), F("to_status")]
+    ranked = (
+        _range(since, until)
+        .exclude(from_status="CART")  # time to checkout is not part of the kitchen flow
+        .filter(elapsed_seconds__isnull=False)
+        .annotate(
+            row=Window(RowNumber(), partition_by=stage, order_by=F("elapsed_seconds").asc()),
+            n=Window(Count("id"), partition_by=stage),
+            avg=Window(Avg("elapsed_seconds"), partition_by=stage),
+        )
+    )
+    # nearest rank: the ceil(n * p / 100)-th smallest value
+    wanted = Q()
+    for p in percentiles:
+        wanted |= Q(row=(F("n") * p + 99) / 100)
+    rows = ranked.filter(wanted).values_list("from_status", "to_status", "row", "n", "avg", "elapsed_seconds")
+
+    stages = {}
+    for from_status, to_status, row, n, avg, seconds in rows:
+        entry = stages.setdefault((from_status, to_status), {
+            "from_status": from_status,
+            "to_status": to_status,
+            "count": n,
+            "avg_seconds": round(avg, 1),
+        })
+        for p in percentiles:
+            if (n * p + 99) // 100 == row:
+                entry[f"p{p}"] = seconds
+    return sorted(stages.values(), key=lambda s: s[f"p{max(percentiles)}"], reverse=True)
+
+
+def hourly_throughput(since, until=None):
+    """[{"hour": datetime, "PLACED": n, "COMPLETED": n, ...}] per hour with any transition."""
+    rows = (
+        _range(since, until)
+        .annotate(hour=TruncHour("created_at"))
+        .values("hour", "to_status")
+        .annotate(count=Count("id"))
+        .order_by("hour")
+    )
+    hours = {}
+    for row in rows:
+        hours.setdefault(row["hour"], {"hour": row["hour"]})[row["to_status"]] = row["count"]
+    return list(hours.values())
+
+
+def order_flow(days=7, now=None):
+    """Both reports over the last `days` days (JSON-ready)."""
+    now = now or timezone.now()
+    since = now - timedelta(days=days)
+    return {
+        "since": since.isoformat(),
+        "until": now.isoformat(),
+        "stages": stage_latencies(since, now),
+        "hourly": [
+            {**hour, "hour": timezone.localtime(hour["hour"]).isoformat()}
+            for hour in hourly_throughput(since, now)
+        ],
+    }
@@ -0,0 +1,57 @@
+"""
+Job handlers, run by `python manage.py run_jobs` (see jobs.py).
+
+Registered on import from FoodorderingConfig.ready(). New side effects of a
+placed order (receipts, kitchen printer, ...) go into `order_placed`.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .images import needs_variants, store_variants
+from .jobs import handler
+from .menu import invalidate_menu
+from .models import Order
+from .placement import place_order
+
+
+@handler("stripe.checkout_completed")
+def stripe_checkout_completed(payload):
+    """Stripe confirmed the payment: place the order (no-op if the success page did already)."""
+    place_order(
+        payload["order_id"],
+        payment_method="STRIPE",
+        is_paid=True,
+        stripe_session_id=payload.get("session_id", ""),
+        stripe_payment_intent_id=payload.get("payment_intent", ""),
+    )
+
+
+@handler("order.placed")
+def order_placed(payload):
+    order = Order.objects.filter(id=payload["order_id"]).first()
+    if order is None or not order.email:
+        return
+
+    send_mail(
+        subject=f"Omran Kebab – Bestellung {order.order_number}",
+        message=(
+            f"Hallo {order.full_name},\n\n"
+            f"vielen Dank für Ihre Bestellung {order.order_number} über {order.total_amount} €.\n"
+            "Wir melden uns, sobald sie unterwegs ist.\n\n"
+            "Ihr Omran Kebab Team"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[order.email],
+    )
+
+
+@handler("images.generate")
+def generate_image_variants(payload):
+    """Resized AVIF/WebP copies of a product/event image (see images.py)."""
+    model = apps.get_model("FoodOrdering", payload["model"])
+    instance = model.objects.filter(id=payload["id"]).only("id", "image", "image_variants").first()
+    if instance is None or not needs_variants(instance):
+        return
+    if store_variants(instance):
+        invalidate_menu()  # immediate with a shared cache; web processes also see variants_updated_at
@@ -0,0 +1,18 @@
+"""
+Template tags for the kitchen queue (kitchen.py).
+
+    {% load kitchen %}
+    {% kitchen_eta order.order_number as eta %}
+    {% if eta %}ca. {{ eta.ready_at|time:"H:i" }}{% endif %}
+"""
+from django import template
+
+from ..kitchen import get_eta
+
+register = template.Library()
+
+
+@register.simple_tag
+def kitchen_eta(order_number):
+    """KitchenEta of an active order (from the in-process queue), or None."""
+    return get_eta(order_number)
@@ -0,0 +1,48 @@
+"""
+Template tags for images.ResponsiveImage (menu snapshot `product.image` / `event.image`).
+
+    {% load responsive_images %}
+    {% responsive_image product.image "thumb" alt=product.name class="menu-img img-fluid" %}
+    <div style="background-image: url({{ event.image_url }}); background-image: {% image_set event.image 'hero' %}">
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..images import SIZES
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, variant, alt="", css_class="", sizes=None, loading="lazy", **attrs):
+    """<picture> with one AVIF/WebP <source> per format and the original upload as <img> fallback."""
+    if image is None:
+        return ""
+    css_class = attrs.pop("class", css_class)
+    sizes = sizes or SIZES[variant]
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, srcset, sizes) for mime, srcset in image.sources(variant)),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" class="{}" alt="{}" loading="{}" decoding="async"></picture>',
+        sources, image.src, css_class, alt, loading,
+    )
+
+
+@register.simple_tag
+def image_set(image, variant):
+    """
+    CSS value: image-set() of the largest AVIF/WebP file, or the original as
+    url(). Single quotes only: it goes into a double-quoted style="" attribute.
+    """
+    if image is None:
+        return ""
+    candidates = image.largest(variant)
+    if not candidates:
+        return format_html("url('{}')", image.src)
+    return format_html(
+        "image-set({})",
+        format_html_join(", ", "url('{}') type('{}')", ((url, mime) for mime, url in candidates)),
+    )
@@ -1,3 +1,1563 @@
-from django.test import TestCase
+import gzip
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from html.parser import HTMLParser
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections
+from django.http import QueryDict
+from django.templatetags.static import static
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+import stripe
+from PIL import Image
+
+from .analytics import ROLLUP_LAG, refresh, sales_overview
+from .broker import RELAY_LOOKBACK, OrderEventRelay
+from .cart import CartLineError, CartSummary, SessionCart, validate_options
+from .dashboard import _period_starts, order_feed, order_stats, reservation_stats
+from .jobs import enqueue, handler, run_pending
+from . import jobs, menu
+from .kitchen import get_queue, invalidate_queue, learn
+from .management.commands.explain_hot_queries import hot_queries
+from .menu import current_version, get_menu_snapshot, invalidate_menu, render_menu_section
+from .models import (
+    Category, Event, Job, Option, OptionGroup, OptionSalesRollup, Order, OrderItem, OrderItemOption, OrderStatusEvent,
+    Product, ProductOptionGroup, ProductPrepTime, ProductSalesRollup, SalesRollup, TableReservation,
+)
+from .payments import CheckoutSession, StripeGateway, get_gateway
+from .placement import ORDER_NUMBER_ATTEMPTS, place_order
+from .static_assets import IMMUTABLE, REVALIDATE, choose_encoding
+from .status_log import hourly_throughput, stage_latencies
+from .templatetags.responsive_images import image_set
+from .tracking import get_tracked_order
+
+
+def make_menu(*names, price="7.00", **fields):
+    """
+    Products in the "Döner" category, one per name (default: a single
+    "Döner"), all at `price`; `fields` go to every product. Returns them in order.
+    """
+    category, _ = Category.objects.get_or_create(name="Döner", slug="doener")
+    return [
+        Product.objects.create(category=category, name=name, slug=slugify(name), price=Decimal(price), **fields)
+        for name in names or ["Döner"]
+    ]
+
+
+class CartPresentationTests(TestCase):
+    """cart_detail / order_success must not issue more queries for bigger carts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sauce = OptionGroup.objects.create(name="Soße")
+        cls.garlic = Option.objects.create(group=sauce, name="Knoblauch", price_delta=Decimal("0.50"))
+        cls.products = make_menu(*(f"Döner {i}" for i in range(12)))
+        for product in cls.products:
+            ProductOptionGroup.objects.create(product=product, group=sauce, min_select=0, max_select=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def fill_cart(self, size):
+        for product in self.products[:size]:
+            self.client.post(
+                reverse("add_to_cart", args=[product.id]),
+                {"quantity": 2, f"group_{self.garlic.group_id}": self.garlic.id},
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def place(self):
+        session = self.client.session
+        cart = SessionCart(session)
+        order = cart.materialize(full_name="Test Kunde", phone="0341", payment_method="CASH")
+        order, _ = place_order(order.id, payment_method="CASH")
+        cart.clear()
+        session.save()
+        return order
+
+    def test_summary_totals(self):
+        self.fill_cart(3)
+        summary = CartSummary.from_cart(SessionCart(self.client.session))
+        self.assertEqual(summary.count, 3)
+        self.assertEqual(summary.lines[0].option_label, "Soße: Knoblauch")
+        self.assertEqual(summary.lines[0].line_total, Decimal("15.00"))
+        self.assertEqual(summary.total, Decimal("45.00"))
+
+        placed = CartSummary.from_order(self.place().id)
+        self.assertEqual(placed.total, summary.total)
+        self.assertEqual([l.option_label for l in placed.lines], [l.option_label for l in summary.lines])
+
+    def test_cart_detail_query_count_is_constant(self):
+        get_menu_snapshot()
+        self.fill_cart(1)
+        small = self.count_queries(reverse("cart_detail"))
+        self.fill_cart(12)
+        large = self.count_queries(reverse("cart_detail"))
+        self.assertEqual(small, large)
+        self.assertEqual(large, 1)  # the session row; lines come from the session
+
+    def test_order_success_query_count_is_constant(self):
+        self.fill_cart(1)
+        small_order = self.place()
+        self.fill_cart(12)
+        large_order = self.place()
+        self.assertEqual(Order.objects.get(id=large_order.id).items.count(), 12)
+
+        get_queue()  # the kitchen ETA comes from the in-process queue; built once for both
+        small = self.count_queries(reverse("order_success", args=[small_order.order_number]))
+        large = self.count_queries(reverse("order_success", args=[large_order.order_number]))
+        self.assertEqual(small, large)
+        self.assertEqual(large, 2)  # order + one query for all lines
+        # served from the tracking cache afterwards
+        self.assertEqual(self.count_queries(reverse("order_success", args=[large_order.order_number])), 0)
+
+
+# -----------------------------
+# VIEW BUDGETS (benchmark)
+# -----------------------------
+
+# Orders/reservations in the DB per measurement round
+DATA_SIZES = (10, 100, 400)
+
+# Max queries per request (savepoints included); a view must also issue the
+# SAME number at every size. Lower a budget when a view gets cheaper. Measured
+# with DB sessions (no REDIS_URL): views using the session read its row once.
+QUERY_BUDGETS = {
+    "home": 0,  # warm menu snapshot + fragment
+    "add_to_cart": 4,  # session read + write only
+    "cart_detail": 1,  # session read
+    "admin_panel": 9,  # session, user, 2 feeds (+prefetch), 2 stats, kitchen queue
+    "track_order": 3,  # cold tracking cache + kitchen queue
+    "order_status_json": 0,
+    "place_cash_order": 20,  # incl. the status log insert
+    "create_stripe_checkout_session": 10,
+    "checkout_success": 17,  # incl. the status log insert and saving the cleared session
+}
+
+
+@override_settings(PAYMENT_GATEWAY="FoodOrdering.payments.FakeGateway")
+class ViewBudgetTests(TestCase):
+    """
+    Seeds the real menu (seed_omran_wolt) and grows synthetic orders and
+    reservations through DATA_SIZES, measuring each view at every size.
+    Set BENCH_REPORT=1 to print wall time and peak memory as well.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_omran_wolt", stdout=open(os.devnull, "w"))
+        cls.staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        cls.products = list(Product.objects.filter(is_available=True, product_option_groups__isnull=True)[:5])
+
+    def setUp(self):
+        cache.clear()
+        invalidate_menu()
+        get_gateway.cache_clear()
+        self.addCleanup(get_gateway.cache_clear)
+        self.orders = 0
+
+    def grow(self, size):
+        """Bulk-insert placed orders (2 items each) and reservations up to `size`."""
+        n = size - self.orders
+        orders = Order.objects.bulk_create([
+            Order(
+                full_name=f"Kunde {i}", phone="0341", status=("PLACED", "PREPARING", "COMPLETED")[i % 3],
+                payment_method="CASH", order_number=f"OK-BENCH-{i:06d}", total_amount=Decimal("14.00"),
+            )
+            for i in range(self.orders, size)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1, price_at_time=Decimal("7.00"),
+                      subtotal=Decimal("7.00"), line_total=Decimal("7.00"))
+            for order in orders
+            for product in self.products[:2]
+        ])
+        TableReservation.objects.bulk_create([
+            TableReservation(name=f"Gast {i}", email="gast@example.com", phone="0341",
+                             date=date(2026, 1, 1), time=dt_time(19, 0), people=2)
+            for i in range(n)
+        ])
+        self.orders = size
+
+    def fill_cart(self, lines=3):
+        for product in self.products[:lines]:
+            self.client.post(reverse("add_to_cart", args=[product.id]), {"quantity": 1})
+
+    def measure(self, request):
+        tracemalloc.start()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            response = request()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(response.status_code, 400)
+        return len(ctx.captured_queries), elapsed, peak
+
+    def check_budget(self, name, request, prepare=None):
+        counts = {}
+        for size in DATA_SIZES:
+            self.grow(size)
+            if prepare:
+                prepare()
+            counts[size], elapsed, peak = self.measure(request)
+            if os.environ.get("BENCH_REPORT"):
+                print(f"\n{name:32} size={size:<5} queries={counts[size]:<3} "
+                      f"{elapsed * 1000:7.1f} ms  peak {peak / 1024:8.1f} KiB")
+
+        self.assertEqual(len(set(counts.values())), 1, f"{name}: query count grows with data size {counts}")
+        self.assertLessEqual(counts[DATA_SIZES[-1]], QUERY_BUDGETS[name], f"{name}: over query budget")
+
+    def customer(self):
+        return {"first_name": "A", "last_name": "B", "phone": "0341", "street": "Str. 1",
+                "postal_code": "04103", "city": "Leipzig"}
+
+    def test_home(self):
+        self.client.get(reverse("home"))  # warm the snapshot
+        self.check_budget("home", lambda: self.client.get(reverse("home")))
+
+    def test_add_to_cart(self):
+        product = self.products[0]
+        self.client.post(reverse("add_to_cart", args=[product.id]), {"quantity": 1})  # warm snapshot + session
+        self.check_budget("add_to_cart", lambda: self.client.post(reverse("add_to_cart", args=[product.id]), {"quantity": 1}))
+
+    def test_cart_detail(self):
+        self.fill_cart()
+        self.check_budget("cart_detail", lambda: self.client.get(reverse("cart_detail")))
+
+    def test_admin_panel(self):
+        self.client.force_login(self.staff)
+        self.check_budget("admin_panel", lambda: self.client.get(reverse("admin")), prepare=invalidate_queue)
+
+    def test_track_order(self):
+        self.check_budget(
+            "track_order",
+            lambda: self.client.post(reverse("track_order"), {"order_number": "OK-BENCH-000001"}),
+            prepare=cache.clear,  # cold tracking cache
+        )
+
+    def test_order_status_json(self):
+        url = reverse("order_status_json", args=["OK-BENCH-000001"])
+        self.grow(DATA_SIZES[0])
+        self.client.get(url)
+        self.check_budget("order_status_json", lambda: self.client.get(url))
+
+    def test_place_cash_order(self):
+        self.check_budget(
+            "place_cash_order",
+            lambda: self.client.post(reverse("place_cash_order"), self.customer()),
+            prepare=self.fill_cart,
+        )
+
+    def test_create_stripe_checkout_session(self):
+        self.check_budget(
+            "create_stripe_checkout_session",
+            lambda: self.client.post(reverse("create_stripe_checkout_session"), self.customer()),
+            prepare=self.fill_cart,
+        )
+
+    def test_checkout_success(self):
+        def start_checkout():
+            self.fill_cart()
+            response = self.client.post(reverse("create_stripe_checkout_session"), self.customer())
+            self.success_url = response.json()["checkout_url"]
+
+        def finish():
+            self.response = self.client.get(self.success_url)
+            return self.response
+
+        self.check_budget("checkout_success", finish, prepare=start_checkout)
+        order = Order.objects.filter(status="PLACED").latest("id")
+        self.assertContains(self.response, order.order_number)
+        self.assertContains(self.response, f"{order.total_amount} €")
+        self.assertNotContains(self.response, "Zahlung wird bestätigt")
+
+
+# -----------------------------
+# CONCURRENCY (database settings)
+# -----------------------------
+
+# one table per size, 18:00-22:00 every day (last seating 21:00)
+RESERVATION_SETTINGS = {
+    "RESERVATION_TABLES": {2: 1, 4: 1},
+    "RESERVATION_HOURS": {weekday: ("18:00", "22:00") for weekday in range(7)},
+    "RESERVATION_SLOT_MINUTES": 30,
+    "RESERVATION_DURATION_MINUTES": 120,
+    "RESERVATION_LAST_SEATING_MINUTES": 60,
+    "RESERVATION_MAX_DAYS_AHEAD": 60,
+}
+
+
+class ConcurrencyTests(TransactionTestCase):
+    """
+    Parallel customers against the test database file: with WAL + IMMEDIATE
+    transactions + busy timeout (settings.DATABASES) no request may fail with
+    "database is locked", and every checkout must become exactly one order.
+    """
+
+    CUSTOMERS = 8
+    LINES = 3
+
+    def setUp(self):
+        cache.clear()
+        self.products = make_menu(*(f"Döner {i}" for i in range(self.LINES)))
+
+    def customer_session(self, errors, barrier):
+        try:
+            client = self.client_class()
+            barrier.wait()
+            for product in self.products:
+                response = client.post(reverse("add_to_cart", args=[product.id]), {"quantity": 1})
+                if response.status_code != 302:
+                    errors.append(f"add_to_cart: {response.status_code}")
+            response = client.post(reverse("place_cash_order"), {
+                "first_name": "A", "last_name": "B", "phone": "0341", "street": "Str. 1",
+                "postal_code": "04103", "city": "Leipzig",
+            })
+            if response.status_code != 302 or "/order/success/" not in response.url:
+                errors.append(f"place_cash_order: {response.status_code}")
+        except Exception as e:  # "database is locked" etc.
+            errors.append(repr(e))
+        finally:
+            connections.close_all()
+
+    def test_parallel_cart_and_checkout(self):
+        if connection.vendor == "sqlite":
+            self.assertEqual(connection.cursor().execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+        errors = []
+        barrier = threading.Barrier(self.CUSTOMERS)
+        threads = [
+            threading.Thread(target=self.customer_session, args=(errors, barrier))
+            for _ in range(self.CUSTOMERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        placed = Order.objects.filter(status="PLACED")
+        self.assertEqual(placed.count(), self.CUSTOMERS)
+        self.assertEqual(len(set(placed.values_list("order_number", flat=True))), self.CUSTOMERS)
+        self.assertEqual(OrderItem.objects.count(), self.CUSTOMERS * self.LINES)
+        self.assertFalse(Order.objects.filter(status="CART").exists())
+
+
+    @override_settings(**RESERVATION_SETTINGS)
+    def test_parallel_reservations_for_the_last_table(self):
+        day = timezone.localdate() + timedelta(days=3)
+        errors = []
+        barrier = threading.Barrier(self.CUSTOMERS)
+
+        def submit(i):
+            try:
+                client = self.client_class()
+                barrier.wait()
+                client.post(reverse("create_reservation"), {
+                    "name": f"Gast {i}", "email": f"g{i}@example.com", "phone": "0341",
+                    "date": day.isoformat(), "time": "19:00", "people": 4,
+                })
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(self.CUSTOMERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(TableReservation.objects.filter(date=day).count(), 1)  # one 4-seat table
+
+
+# -----------------------------
+# INDEXES (explain_hot_queries)
+# -----------------------------
+
+class QueryPlanTests(TestCase):
+    """The dashboard/purge queries must be served by the indexes from Order/TableReservation.Meta."""
+
+    EXPECTED = {
+        "dashboard: order feed": "order_placed_created_idx",
+        "dashboard: order feed by status": "order_status_created_idx",
+        "dashboard: order feed by date": "order_placed_created_idx",
+        # either placed_at index serves it; which one SQLite picks depends on the (empty) tables
+        "dashboard: revenue this month": ("order_paid_placed_idx", "order_placed_at_idx"),
+        "dashboard: reservation feed": "reservation_created_idx",
+        "dashboard: reservation feed by status": "reservation_status_created_idx",
+        "purge: abandoned carts": "order_cart_created_idx",
+        "rollups: sales per hour": "order_placed_at_idx",
+    }
+
+    def test_hot_queries_use_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("planner choices on other backends depend on table statistics")
+        plans = {label: qs.explain() for label, qs in hot_queries()}
+        for label, indexes in self.EXPECTED.items():
+            with self.subTest(label):
+                indexes = (indexes,) if isinstance(indexes, str) else indexes
+                self.assertTrue(any(index in plans[label] for index in indexes), plans[label])
+
+    def test_order_feed_date_range_is_inclusive(self):
+        today = timezone.localdate()
+        order = Order.objects.create(status="PLACED", full_name="A", phone="1")
+        self.assertEqual([o.id for o in order_feed(date_from=today, date_to=today)[0]], [order.id])
+        self.assertEqual(order_feed(date_to=today - timedelta(days=1))[0], [])
+        self.assertEqual(order_feed(date_from=today + timedelta(days=1))[0], [])
+
+    def test_malformed_feed_params_are_rejected(self):
+        self.client.force_login(get_user_model().objects.create_user("staff", password="x", is_staff=True))
+        for params in ({"cursor": f"{10 ** 30}_1"}, {"cursor": "1_"}, {"cursor": "x"}, {"status": "BOGUS"}):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(reverse("admin_orders_feed"), params).status_code, 400)
+        self.assertEqual(self.client.get(reverse("admin_reservations_feed"), {"status": "PLACED"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("admin_orders_feed"), {"status": "PLACED"}).status_code, 200)
+        self.assertEqual(self.client.get(reverse("admin_reservations_feed"), {"status": "new"}).status_code, 200)
+
+
+# -----------------------------
+# IMAGE VARIANTS (images.py)
+# -----------------------------
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="omran-media-"))
+class ImageVariantTests(TestCase):
+    """Uploads are resized by the job worker; pages render AVIF/WebP sources with the original as fallback."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        invalidate_menu()
+
+    def upload(self, name, size):
+        buffer = BytesIO()
+        Image.new("RGB", size, "orange").save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def test_upload_is_resized_off_the_request_path(self):
+        [product] = make_menu(image=self.upload("doener.jpg", (600, 300)))
+        self.assertEqual(product.image_variants, {})
+        self.assertTrue(Job.objects.filter(name="images.generate", payload__id=product.id).exists())
+
+        self.assertEqual(run_pending(), (1, 0))
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants["source"], product.image.name)
+        modal = product.image_variants["variants"]["modal"]
+        # never upscaled: 800 is capped at the original 600
+        self.assertEqual([width for width, _ in modal["webp"]], [400, 600])
+        for files in modal.values():
+            for _, name in files:
+                self.assertTrue(default_storage.exists(name))
+
+        html = render_menu_section(RequestFactory().get("/"))
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn(f'<img src="{product.image.url}"', html)
+
+    def test_variants_from_another_process_reach_the_menu(self):
+        [product] = make_menu(image=self.upload("doener.jpg", (600, 300)))
+        self.assertIsNone(get_menu_snapshot().get_product(product.id).image.variants.get("thumb"))
+
+        # the job worker's invalidate_menu() bumps only its own LocMemCache
+        with mock.patch("FoodOrdering.tasks.invalidate_menu"):
+            self.assertEqual(run_pending(), (1, 0))
+        self.assertIsNone(get_menu_snapshot().get_product(product.id).image.variants.get("thumb"))  # not re-read yet
+        with mock.patch.object(menu, "_menu_check", (0.0, "")):  # MENU_CHECK_INTERVAL has passed
+            self.assertTrue(get_menu_snapshot().get_product(product.id).image.variants["thumb"])
+
+    def test_without_variants_the_original_is_used(self):
+        event = Event.objects.create(
+            title="Feier", description="", price=Decimal("20.00"), image=self.upload("feier.jpg", (100, 50)),
+        )
+        image = get_menu_snapshot().events[0].image
+        self.assertEqual(image_set(image, "hero"), f"url('{event.image.url}')")
+
+        call_command("generate_image_variants", stdout=StringIO())
+        image = get_menu_snapshot().events[0].image
+        self.assertIn("type('image/webp')", image_set(image, "hero"))
+        self.assertEqual(image.sources("thumb"), [])
+
+    def test_hero_style_attribute_stays_intact(self):
+        event = Event.objects.create(
+            title="Feier", description="", price=Decimal("20.00"), image=self.upload("feier.jpg", (1200, 600)),
+        )
+        self.assertEqual(run_pending(), (1, 0))
+
+        slides = []
+
+        class SlideParser(HTMLParser):
+            def handle_starttag(self, tag, attrs):
+                attrs = dict(attrs)
+                if "event-item" in (attrs.get("class") or ""):
+                    slides.append(attrs)
+
+        SlideParser().feed(self.client.get(reverse("home")).content.decode())
+        self.assertEqual(len(slides), 1)
+        self.assertEqual(set(slides[0]), {"class", "style"})  # nothing leaked out of style=""
+        style = slides[0]["style"]
+        self.assertTrue(style.startswith(f"background-image: url({event.image.url}); background-image: image-set("), style)
+        self.assertIn("type('image/webp')", style)
+        self.assertTrue(style.endswith(")"), style)
+
+
+# -----------------------------
+# STATIC BUILD (static_assets.py)
+# -----------------------------
+
+class StaticAssetTests(TestCase):
+    """collectstatic writes hashed + precompressed files; the middleware serves them immutable."""
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp(prefix="omran-static-src-")
+        self.root = tempfile.mkdtemp(prefix="omran-static-root-")
+        self.addCleanup(shutil.rmtree, self.source, True)
+        self.addCleanup(shutil.rmtree, self.root, True)
+        os.makedirs(os.path.join(self.source, "css"))
+        with open(os.path.join(self.source, "css", "main.css"), "w") as f:
+            f.write("body { background: url('../logo.png'); }\n" + ".a { color: red; }\n" * 200)
+        Image.new("RGB", (4, 4)).save(os.path.join(self.source, "logo.png"))
+
+        settings_override = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STORAGES={
+                **settings.STORAGES,
+                "staticfiles": {"BACKEND": "FoodOrdering.static_assets.CompressedManifestStaticFilesStorage"},
+            },
+            SERVE_STATIC=True,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def test_build_and_serve(self):
+        css_url = static("css/main.css")
+        self.assertRegex(css_url, r"/css/main\.[0-9a-f]{12}\.css$")
+        css_path = os.path.join(self.root, css_url.split("/static/", 1)[1])
+        self.assertTrue(os.path.exists(css_path + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.root, static("logo.png").split("/static/", 1)[1]) + ".gz"))
+        with open(css_path) as f:
+            self.assertIn(static("logo.png").rsplit("/", 1)[1], f.read())  # references rewritten to hashed names
+
+        response = self.client.get(css_url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Cache-Control"], IMMUTABLE)
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content))[:10], b"body { bac")
+
+        response = self.client.get("/static/css/main.css")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Cache-Control"], REVALIDATE)
+
+    def test_accept_encoding_q_values(self):
+        available = {"br": ".br", "gzip": ".gz"}
+        self.assertEqual(choose_encoding("gzip, br", available), "br")
+        self.assertEqual(choose_encoding("br;q=0, gzip", available), "gzip")
+        self.assertEqual(choose_encoding("br;q=0.5, gzip;q=0.8", available), "gzip")
+        self.assertEqual(choose_encoding("*;q=0", available), None)
+        self.assertEqual(choose_encoding("identity", available), None)
+        self.assertEqual(choose_encoding("*", {"gzip": ".gz"}), "gzip")
+
+        response = self.client.get(static("css/main.css"), HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertNotIn("Content-Encoding", response)
+
+    async def test_served_under_asgi(self):
+        response = await self.async_client.get(static("css/main.css"), ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Cache-Control"], IMMUTABLE)
+
+    def test_missing_reference_keeps_plain_url(self):
+        self.assertEqual(static("videos/missing.mp4"), "/static/videos/missing.mp4")
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+
+
+# -----------------------------
+# RESERVATIONS (reservations.py)
+# -----------------------------
+
+@override_settings(**RESERVATION_SETTINGS)
+class ReservationAvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.day = timezone.localdate() + timedelta(days=3)
+
+    def book(self, time, people, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("create_reservation"), {
+                "name": "Gast", "email": "gast@example.com", "phone": "0341",
+                "date": self.day.isoformat(), "time": time, "people": people, **extra,
+            })
+
+    def slots(self, people):
+        response = self.client.get(reverse("reservation_availability"), {"date": self.day.isoformat(), "people": people})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["slots"]
+
+    def test_booking_blocks_overlapping_slots(self):
+        all_slots = ["18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00"]
+        self.assertEqual(self.slots(4), all_slots)
+
+        self.book("19:00", 3)  # the 4-seat table, 19:00-21:00
+        self.assertEqual(self.slots(4), ["21:00"])
+        self.assertEqual(self.slots(2), all_slots)  # a couple still gets the 2-seat table
+
+        self.book("19:30", 2)  # the 2-seat table, 19:30-21:30
+        self.assertEqual(self.slots(2), ["21:00"])  # only the 4-seat table after 21:00 is left
+        self.book("21:00", 1)
+        self.assertEqual(self.slots(1), [])
+        self.assertEqual(TableReservation.objects.count(), 3)
+
+    def test_overbooked_request_is_rejected(self):
+        self.book("19:00", 4)
+        response = self.book("20:00", 4)
+        self.assertEqual(TableReservation.objects.count(), 1)
+        message = str(list(get_messages(response.wsgi_request))[-1])
+        self.assertIn("kein Tisch mehr frei", message)
+        self.assertIn("Noch frei: 21:00 Uhr.", message)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.slots(9), [])  # bigger than the largest table
+        self.book("17:00", 2)  # before opening
+        self.book("19:00", 6)
+        self.assertFalse(TableReservation.objects.exists())
+        response = self.client.get(reverse("reservation_availability"), {"date": "morgen"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cancelled_reservations_free_the_table(self):
+        self.book("19:00", 4)
+        self.assertEqual(self.slots(4), ["21:00"])
+        with self.captureOnCommitCallbacks(execute=True):
+            TableReservation.objects.update(status="cancelled")
+            TableReservation.objects.get().save()
+        self.assertEqual(len(self.slots(4)), 7)
+
+
+# -----------------------------
+# KITCHEN ETA (kitchen.py)
+# -----------------------------
+
+@override_settings(KITCHEN_STATIONS=1, KITCHEN_BASE_SECONDS=180, KITCHEN_DEFAULT_ITEM_SECONDS=240,
+                   KITCHEN_LEARNING_RATE=0.2)
+class KitchenEtaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        [cls.doener] = make_menu()
+        cls.staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def order(self, number, status="PLACED", quantity=1, minutes_ago=0):
+        placed_at = timezone.now() - timedelta(minutes=minutes_ago)
+        order = Order.objects.create(
+            full_name="Kunde", phone="0341", status=status, order_number=number,
+            placed_at=placed_at, preparing_at=placed_at if status == "PREPARING" else None,
+        )
+        OrderItem.objects.create(order=order, product=self.doener, quantity=quantity,
+                                 price_at_time=Decimal("7.00"), subtotal=Decimal("7.00"), line_total=Decimal("7.00"))
+        return order
+
+    def set_status(self, order, status):
+        self.client.force_login(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("update_order_status", args=[order.id]), {"status": status})
+
+    def test_queue_runs_orders_in_placement_order(self):
+        self.order("OK-1", status="PREPARING", minutes_ago=2)  # 180 + 240s, started 2 min ago
+        self.order("OK-2", minutes_ago=1)
+        self.order("OK-3", quantity=2)
+        queue = get_queue()
+
+        first, second, third = (queue.etas[n] for n in ("OK-1", "OK-2", "OK-3"))
+        self.assertEqual((first.position, second.position, third.position), (0, 1, 2))
+        self.assertEqual(second.ready_at - first.ready_at, timedelta(seconds=420))
+        self.assertEqual(third.ready_at - second.ready_at, timedelta(seconds=660))
+        self.assertEqual((queue.preparing, queue.waiting), (1, 2))
+        self.assertEqual(first.minutes_left, 5)  # 7 min of work, 2 already done
+
+    def test_status_json_and_dashboard_refresh_the_eta(self):
+        self.order("OK-1")
+        url = reverse("order_status_json", args=["OK-1"])
+        self.assertEqual(self.client.get(url).json()["eta_minutes"], 7)
+
+        self.order("OK-0", status="PREPARING", minutes_ago=10)  # inserted behind the queue's back
+        self.assertEqual(self.client.get(url).json()["queue_position"], 0)  # cached queue
+
+        self.set_status(Order.objects.get(order_number="OK-1"), "COMPLETED")
+        data = self.client.get(url).json()
+        self.assertEqual(data["status"], "COMPLETED")
+        self.assertIsNone(data["eta"])
+        self.assertEqual(set(get_queue().etas), {"OK-0"})
+
+    def test_finished_orders_teach_the_prep_time(self):
+        order = self.order("OK-1", quantity=2, minutes_ago=20)
+        self.set_status(order, "PREPARING")
+        order.refresh_from_db()
+        self.assertIsNotNone(order.preparing_at)
+
+        # observed 12 min for 2 Döner (+3 min base): 15 min after starting
+        learn(order, order.preparing_at + timedelta(minutes=15))
+        stat = ProductPrepTime.objects.get(product=self.doener)
+        self.assertAlmostEqual(stat.seconds, 240 * (1 + 0.2 * (720 / 480 - 1)))
+        self.assertEqual(stat.samples, 1)
+
+        self.set_status(order, "COMPLETED")  # seconds after starting: too short to learn from
+        self.order("OK-2")
+        queue = get_queue()
+        self.assertEqual(queue.etas["OK-2"].ready_at - queue.built_at, timedelta(seconds=180 + stat.seconds))
+
+        # a forgotten order (hours in the kitchen) is not a sample
+        learn(order, order.preparing_at + timedelta(hours=5))
+        self.assertEqual(ProductPrepTime.objects.get(product=self.doener).samples, 1)
+
+
+# -----------------------------
+# STATUS LOG (status_log.py)
+# -----------------------------
+
+class StatusLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_transition_is_logged_with_the_time_in_the_previous_status(self):
+        [product] = make_menu()
+        self.client.post(reverse("add_to_cart", args=[product.id]), {"quantity": 1})
+        self.client.post(reverse("place_cash_order"), {
+            "first_name": "A", "last_name": "B", "phone": "0341", "street": "Str. 1",
+            "postal_code": "04103", "city": "Leipzig",
+        })
+        order = Order.objects.get(status="PLACED")
+        OrderStatusEvent.objects.filter(order=order).update(created_at=timezone.now() - timedelta(minutes=4))
+
+        self.client.force_login(self.staff)
+        for status in ("PREPARING", "PREPARING", "COMPLETED"):
+            self.client.post(reverse("update_order_status", args=[order.id]), {"status": status})
+
+        events = list(OrderStatusEvent.objects.filter(order=order).order_by("created_at", "id"))
+        self.assertEqual(
+            [(e.from_status, e.to_status) for e in events],
+            [("CART", "PLACED"), ("PLACED", "PREPARING"), ("PREPARING", "COMPLETED")],  # no-op update not logged
+        )
+        self.assertAlmostEqual(events[1].elapsed_seconds, 240, delta=5)
+        self.assertLess(events[2].elapsed_seconds, 5)
+
+    def test_percentiles_and_throughput_are_computed_in_one_query_each(self):
+        now = timezone.now().replace(minute=30)
+        orders = Order.objects.bulk_create([
+            Order(full_name="Kunde", phone="0341", status="PREPARING", order_number=f"OK-{i}") for i in range(100)
+        ])
+        OrderStatusEvent.objects.bulk_create([
+            OrderStatusEvent(order=order, from_status="PLACED", to_status="PREPARING",
+                             created_at=now - timedelta(hours=i % 2), elapsed_seconds=(i + 1) * 60)
+            for i, order in enumerate(orders)
+        ] + [
+            OrderStatusEvent(order=orders[0], from_status="PREPARING", to_status="COMPLETED",
+                             created_at=now, elapsed_seconds=600),
+            OrderStatusEvent(order=orders[1], from_status="CART", to_status="PLACED", created_at=now),
+        ])
+
+        since = now - timedelta(days=1)
+        with self.assertNumQueries(1):
+            stages = stage_latencies(since, now + timedelta(minutes=1))
+        self.assertEqual(stages[0], {
+            "from_status": "PLACED", "to_status": "PREPARING", "count": 100, "avg_seconds": 3030.0,
+            "p50": 3000, "p90": 5400, "p99": 5940,
+        })
+        self.assertEqual(stages[1]["p50"], stages[1]["p99"], 600)  # one sample is every percentile
+        self.assertEqual(len(stages), 2)  # checkout time (CART -> PLACED) is left out
+
+        with self.assertNumQueries(1):
+            hours = hourly_throughput(since, now + timedelta(minutes=1))
+        self.assertEqual([h.get("PREPARING") for h in hours], [50, 50])
+        self.assertEqual((hours[1]["COMPLETED"], hours[1]["PLACED"]), (1, 1))
+
+    def test_order_flow_endpoint(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("order_flow"), {"days": 1})
+        self.assertEqual(response.json()["stages"], [])
+        self.assertEqual(self.client.get(reverse("order_flow"), {"days": "x"}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("order_flow")).status_code, 302)
+
+
+# -----------------------------
+# BULK STATUS UPDATES (transitions.py)
+# -----------------------------
+
+class BulkStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        [cls.doener] = make_menu()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def orders(self, n, status="PLACED", minutes_ago=0):
+        orders = Order.objects.bulk_create([
+            Order(full_name="Kunde", phone="0341", status=status, order_number=f"OK-{status}-{i}",
+                  placed_at=timezone.now() - timedelta(minutes=minutes_ago))
+            for i in range(n)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.doener, quantity=1, price_at_time=Decimal("7.00"),
+                      subtotal=Decimal("7.00"), line_total=Decimal("7.00"))
+            for order in orders
+        ])
+        return orders
+
+    def post(self, changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("bulk_update_order_status"), {"changes": changes}, content_type="application/json"
+            )
+
+    def test_one_update_per_target_status(self):
+        orders = self.orders(6)
+        get_tracked_order(orders[0].order_number)  # cached as PLACED
+        changes = (
+            [{"id": o.id, "status": "PREPARING"} for o in orders[:3]]
+            + [{"id": o.id, "status": "CANCELLED"} for o in orders[3:5]]
+            + [{"id": orders[5].id, "status": "PLACED"}]  # unchanged
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(changes)
+
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(set(map(int, data["html"])), {o.id for o in orders[:5]})
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "FoodOrdering_order"')]
+        self.assertEqual(len(updates), 2)
+
+        self.assertEqual(Order.objects.filter(status="PREPARING", preparing_at__isnull=False).count(), 3)
+        self.assertEqual(Order.objects.filter(status="CANCELLED").count(), 2)
+        self.assertEqual(OrderStatusEvent.objects.count(), 5)
+        self.assertEqual(get_tracked_order(orders[0].order_number).status, "PREPARING")
+
+    def test_query_count_does_not_grow_with_the_selection(self):
+        for status in ("PREPARING", "DELIVERING", "COMPLETED"):  # the last two teach the prep times
+            with self.subTest(status=status):
+                counts = []
+                for n in (5, 25):
+                    orders = self.orders(n, minutes_ago=10)
+                    with CaptureQueriesContext(connection) as ctx:
+                        self.post([{"id": o.id, "status": status} for o in orders])
+                    counts.append(len(ctx.captured_queries))
+                    if status != "PREPARING":
+                        self.assertEqual(ProductPrepTime.objects.get(product=self.doener).samples, n)
+                    Order.objects.all().delete()
+                    ProductPrepTime.objects.all().delete()
+                self.assertEqual(counts[0], counts[1])
+
+    def test_invalid_requests_change_nothing(self):
+        orders = self.orders(2)
+        cart = self.orders(1, status="CART")[0]
+        for changes in (
+            [{"id": orders[0].id, "status": "PREPARING"}, {"id": 999999, "status": "PREPARING"}],
+            [{"id": orders[0].id, "status": "PREPARING"}, {"id": cart.id, "status": "PREPARING"}],
+            [{"id": orders[0].id, "status": "CART"}],
+            [{"id": orders[0].id, "status": "PREPARING"}, {"id": orders[0].id, "status": "COMPLETED"}],
+            [],
+        ):
+            response = self.post(changes)
+            self.assertEqual(response.status_code, 400, changes)
+        self.assertFalse(Order.objects.filter(status="PREPARING").exists())
+        self.assertFalse(OrderStatusEvent.objects.exists())
+        response = self.client.post(reverse("bulk_update_order_status"), "nope", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+# -----------------------------
+# SALES ROLLUPS (analytics.py)
+# -----------------------------
+
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        [cls.doener] = make_menu()
+        [cls.ayran] = make_menu("Ayran", price="2.00")
+        sauce = OptionGroup.objects.create(name="Soße")
+        cls.garlic = Option.objects.create(group=sauce, name="Knoblauch", price_delta=Decimal("0.50"))
+        cls.staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+
+    def setUp(self):
+        self.now = timezone.now().replace(hour=20, minute=0, second=0, microsecond=0)
+        self.numbers = 0
+
+    def order(self, placed_at, payment_method="CASH", doener=1, ayran=0, status="PLACED"):
+        self.numbers += 1
+        lines = [(self.doener, doener, Decimal("7.50")), (self.ayran, ayran, Decimal("2.00"))]
+        order = Order.objects.create(
+            full_name="Kunde", phone="0341", status=status, payment_method=payment_method,
+            order_number=f"OK-{self.numbers}", placed_at=placed_at,
+            total_amount=sum((price * quantity for _, quantity, price in lines), Decimal("0.00")),
+        )
+        for product, quantity, price in lines:
+            if quantity:
+                item = OrderItem.objects.create(order=order, product=product, quantity=quantity, price_at_time=price,
+                                                subtotal=price * quantity, line_total=price * quantity)
+                if product == self.doener:
+                    OrderItemOption.objects.create(order_item=item, option=self.garlic,
+                                                   price_delta_at_time=Decimal("0.50"))
+        return order
+
+    def test_hour_and_day_rollups(self):
+        self.order(self.now - timedelta(hours=2), doener=2)  # 15.00
+        self.order(self.now - timedelta(hours=2, minutes=-30), payment_method="STRIPE", doener=1, ayran=1)  # 9.50
+        self.order(self.now - timedelta(hours=1), doener=0, ayran=2)  # 4.00
+        self.order(self.now - timedelta(hours=1), status="CANCELLED")
+        self.order(self.now - timedelta(days=1))
+
+        self.assertEqual(len(refresh(now=self.now)), 2)
+
+        day = timezone.localtime(self.now).replace(hour=0)
+        rows = {r.payment_method: r for r in SalesRollup.objects.filter(period="day", period_start=day)}
+        self.assertEqual((rows["CASH"].orders, rows["CASH"].revenue), (2, Decimal("19.00")))  # cancelled left out
+        self.assertEqual((rows["STRIPE"].orders, rows["STRIPE"].revenue), (1, Decimal("9.50")))
+        hours = SalesRollup.objects.filter(period="hour", period_start__gte=day).order_by("period_start", "payment_method")
+        self.assertEqual([(r.period_start.hour, r.payment_method, r.orders) for r in hours],
+                         [(18, "CASH", 1), (18, "STRIPE", 1), (19, "CASH", 1)])
+
+        products = {r.product_id: r for r in ProductSalesRollup.objects.filter(period="day", period_start=day)}
+        self.assertEqual((products[self.doener.id].quantity, products[self.doener.id].revenue), (3, Decimal("22.50")))
+        self.assertEqual(products[self.ayran.id].quantity, 3)
+        option = OptionSalesRollup.objects.get(period="day", period_start=day)
+        self.assertEqual((option.quantity, option.revenue), (3, Decimal("1.50")))
+
+    def test_refresh_only_rebuilds_changed_days(self):
+        now = timezone.now()  # the status log below is stamped with the real clock
+        self.order(now - timedelta(days=3))
+        late = self.order(now - timedelta(days=2))
+        refresh(now=now - timedelta(minutes=10))
+        self.assertEqual(refresh(now=now - timedelta(minutes=5)), [])
+
+        new = self.order(now - timedelta(minutes=6))
+        self.client.force_login(self.staff)
+        self.client.post(reverse("update_order_status", args=[late.id]), {"status": "CANCELLED"})
+        days = refresh(now=timezone.now() + ROLLUP_LAG + timedelta(seconds=1))
+        self.assertEqual(days, [timezone.localdate(late.placed_at), timezone.localdate(new.placed_at)])
+        late_day = timezone.localtime(late.placed_at).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.assertFalse(SalesRollup.objects.filter(period="day", period_start=late_day).exists())
+        self.assertEqual(SalesRollup.objects.filter(period="day").count(), 2)
+
+    def test_dashboard_reads_only_the_rollups(self):
+        for i in range(5):
+            self.order(self.now - timedelta(days=i % 3, hours=i), payment_method=("CASH", "STRIPE")[i % 2])
+        refresh(now=self.now)
+        with self.assertNumQueries(5):
+            sales = sales_overview(days=7, today=timezone.localdate(self.now))
+        self.assertEqual((sales["orders"], sales["revenue"], sales["avg_basket"]), (5, Decimal("37.50"), Decimal("7.50")))
+        self.assertEqual([m["method"] for m in sales["payment_methods"]], ["CASH", "STRIPE"])
+        self.assertEqual(sales["products"][0]["product__name"], "Döner")
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("admin_sales"), {"days": 7})
+        self.assertIn("Top Produkte", response.json()["html"])
+        self.assertEqual(self.client.get(reverse("admin_sales"), {"days": 0}).status_code, 400)
+
+
+# -----------------------------
+# CACHE INVALIDATION (signals.py)
+# -----------------------------
+
+class InvalidationTests(TestCase):
+    """Caches are invalidated after commit, so no request rebuilds them from uncommitted-away rows."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_menu_version_moves_after_commit(self):
+        [product] = make_menu()
+        version = current_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.name = "RENAMED"
+            product.save()
+            self.assertEqual(current_version(), version)  # a request here still sees the old version
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(current_version(), version)
+        self.assertEqual(get_menu_snapshot().get_product(product.id).name, "RENAMED")
+
+    def test_edits_from_another_worker_reach_the_menu(self):
+        product, extra = make_menu("Döner", "Dürüm")
+        extra_id = extra.id
+        self.assertEqual(get_menu_snapshot().get_product(product.id).price, Decimal("7.00"))
+
+        # the other worker's invalidate_menu() bumps only its own LocMemCache
+        with mock.patch("FoodOrdering.signals.invalidate_menu"), self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(id=product.id).update(price=Decimal("7.50"), updated_at=timezone.now())
+            extra.delete()
+        self.assertEqual(get_menu_snapshot().get_product(product.id).price, Decimal("7.00"))  # not re-read yet
+        with mock.patch.object(menu, "_menu_check", (0.0, "")):  # MENU_CHECK_INTERVAL has passed
+            snapshot = get_menu_snapshot()
+        self.assertEqual(snapshot.get_product(product.id).price, Decimal("7.50"))
+        self.assertIsNone(snapshot.get_product(extra_id))
+
+    def test_tracking_entry_dropped_after_commit(self):
+        order = Order.objects.create(full_name="Kunde", phone="0341", status="PLACED", order_number="OK-1")
+        self.assertEqual(get_tracked_order("OK-1").status, "PLACED")
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = "PREPARING"
+            order.save()
+            self.assertEqual(get_tracked_order("OK-1").status, "PLACED")  # cached until commit
+        self.assertEqual(get_tracked_order("OK-1").status, "PREPARING")
+
+
+# -----------------------------
+# LIVE UPDATES (broker.py)
+# -----------------------------
+
+class RecordingBroker:
+    subscriber_count = 1
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event_type, data):
+        self.events.append((event_type, data))
+
+
+class OrderEventRelayTests(TestCase):
+    """Dashboards hear about orders placed in any process (here: the job worker) through the status log."""
+
+    def setUp(self):
+        cache.clear()
+        get_queue()
+        [product] = make_menu()
+        self.order = Order.objects.create(full_name="Kunde", phone="0341")
+        OrderItem.objects.create(
+            order=self.order, product=product, quantity=1, price_at_time=Decimal("7.00"), line_total=Decimal("7.00")
+        )
+        self.broker = RecordingBroker()
+        self.relay = OrderEventRelay(self.broker)
+
+    def test_webhook_placing_first_reaches_the_dashboard_once(self):
+        enqueue("stripe.checkout_completed", {"order_id": self.order.id, "session_id": "cs_1"}, key="stripe:evt_1")
+        self.assertEqual(run_pending(), (2, 0))  # the job worker wins the race (+ the order.placed job)
+        self.relay.poll()
+        self.assertEqual([event_type for event_type, _ in self.broker.events], ["order.placed"])
+        self.assertEqual(self.broker.events[0][1]["order"]["id"], self.order.id)
+        self.assertIn("html", self.broker.events[0][1])
+
+        # the success page comes second: nothing to place, nothing new to publish
+        order, placed = place_order(self.order.id, payment_method="STRIPE", is_paid=True, stripe_session_id="cs_1")
+        self.assertFalse(placed)
+        self.relay.poll()
+        self.assertEqual(len(self.broker.events), 1)
+
+    def test_status_changes_are_published_as_status_events(self):
+        place_order(self.order.id, payment_method="CASH")
+        self.client.force_login(get_user_model().objects.create_user("staff", password="x", is_staff=True))
+        self.client.post(reverse("bulk_update_order_status"), {"changes": [{"id": self.order.id, "status": "PREPARING"}]},
+                         content_type="application/json")
+        self.relay.poll()
+        self.assertEqual([event_type for event_type, _ in self.broker.events], ["order.placed", "order.status"])
+        self.assertEqual(self.broker.events[1][1]["order"]["status"], "PREPARING")
+
+    def test_history_before_the_lookback_is_not_replayed(self):
+        place_order(self.order.id, payment_method="CASH")
+        self.relay.poll(now=timezone.now() + RELAY_LOOKBACK + timedelta(seconds=1))
+        self.assertEqual(self.broker.events, [])
+
+
+# -----------------------------
+# INSTRUMENTATION (instrumentation.py)
+# -----------------------------
+
+class InstrumentationTests(TestCase):
+    """Server-Timing counts the request's own queries and template time, under WSGI and ASGI alike."""
+
+    def setUp(self):
+        cache.clear()
+        [self.product] = make_menu()
+        get_menu_snapshot()
+
+    def timing(self, response):
+        return dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+
+    def test_sync_request(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("cart_detail"))
+        timing = self.timing(response)
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing["db"])
+        self.assertNotEqual(timing["tpl"], "dur=0.0")
+
+    async def test_async_request(self):
+        # the sync view runs in a sync_to_async thread; its render is still counted
+        await self.async_client.post(reverse("add_to_cart", args=[self.product.id]), {"quantity": 1})
+        response = await self.async_client.get(reverse("cart_detail"))
+        timing = self.timing(response)
+        self.assertIn('desc="1 queries"', timing["db"])  # the session row
+        self.assertNotEqual(timing["tpl"], "dur=0.0")
+
+
+# -----------------------------
+# ORDER TOTALS BACKFILL (migrations/0017)
+# -----------------------------
+
+class OrderTotalsBackfillTests(TestCase):
+    def test_orders_from_before_the_totals_columns_are_filled(self):
+        backfill = importlib.import_module("FoodOrdering.migrations.0017_backfill_order_totals").backfill_order_totals
+        [product] = make_menu()
+        sauce = OptionGroup.objects.create(name="Soße")
+        garlic = Option.objects.create(group=sauce, name="Knoblauch", price_delta=Decimal("0.50"))
+        order = Order.objects.create(full_name="Kunde", phone="0341", status="PLACED")
+        item = OrderItem.objects.create(order=order, product=product, quantity=2, price_at_time=Decimal("7.00"))
+        OrderItemOption.objects.create(order_item=item, option=garlic, price_delta_at_time=Decimal("0.50"))
+        # what 0008/0009 left behind: the column defaults
+        OrderItem.objects.update(options_total=0, subtotal=0, line_total=0, option_label="")
+        Order.objects.update(total_amount=0)
+
+        backfill(django_apps, None)
+        item.refresh_from_db()
+        order.refresh_from_db()
+        self.assertEqual((item.options_total, item.subtotal, item.line_total), (Decimal("0.50"), Decimal("14.00"), Decimal("15.00")))
+        self.assertEqual(item.option_label, "Soße: Knoblauch")
+        self.assertEqual(order.total_amount, Decimal("15.00"))
+
+
+# -----------------------------
+# CART LINE VALIDATION (cart.py)
+# -----------------------------
+
+class OptionValidationTests(TestCase):
+    """validate_options() enforces the resolved group rules; add_to_cart only stores valid lines."""
+
+    @classmethod
+    def setUpTestData(cls):
+        [cls.product] = make_menu()
+        cls.sauce = OptionGroup.objects.create(name="Soße", slug="sosse", is_required=True)  # radio, min 0 -> treated as 1
+        cls.extras = OptionGroup.objects.create(name="Extras", slug="extras", min_select=1, max_select=2)
+        cls.garlic = Option.objects.create(group=cls.sauce, name="Knoblauch")
+        cls.hot = Option.objects.create(group=cls.sauce, name="Scharf")
+        cls.off = Option.objects.create(group=cls.sauce, name="Alt", is_active=False)
+        cls.cheese = Option.objects.create(group=cls.extras, name="Käse", price_delta=Decimal("1.00"))
+        cls.feta = Option.objects.create(group=cls.extras, name="Feta", price_delta=Decimal("1.50"))
+        cls.onion = Option.objects.create(group=cls.extras, name="Zwiebeln")
+        ProductOptionGroup.objects.create(product=cls.product, group=cls.sauce)
+        ProductOptionGroup.objects.create(product=cls.product, group=cls.extras)
+
+    def setUp(self):
+        cache.clear()
+        invalidate_menu()
+
+    def post(self, sauce=(), extras=()):
+        data = QueryDict(mutable=True)
+        data.setlist(f"group_{self.sauce.id}", [str(v) for v in sauce])
+        data.setlist(f"group_{self.extras.id}[]", [str(v) for v in extras])
+        return data
+
+    def validate(self, **kwargs):
+        return validate_options(get_menu_snapshot().get_product(self.product.id), self.post(**kwargs))
+
+    def assertRejected(self, message, **kwargs):
+        with self.assertRaisesMessage(CartLineError, message):
+            self.validate(**kwargs)
+
+    def test_valid_selection_in_menu_order(self):
+        chosen = self.validate(sauce=[self.garlic.id], extras=[self.feta.id, self.cheese.id])
+        # groups as on the menu (sort order, then name), options as posted
+        self.assertEqual([(group.name, option.name) for group, option in chosen],
+                         [("Extras", "Feta"), ("Extras", "Käse"), ("Soße", "Knoblauch")])
+
+    def test_min_and_max_select(self):
+        self.assertRejected("mindestens 1 Option(en) bei: Soße", extras=[self.cheese.id])  # required radio
+        self.assertRejected("mindestens 1 Option(en) bei: Extras", sauce=[self.garlic.id])
+        self.assertRejected("Zu viele Optionen gewählt bei: Extras (max. 2)",
+                            sauce=[self.garlic.id], extras=[self.cheese.id, self.feta.id, self.onion.id])
+
+    def test_foreign_inactive_duplicate_and_garbage_options(self):
+        for sauce, extras in (
+            ([self.cheese.id], [self.feta.id]),  # option of another group
+            ([self.off.id], [self.feta.id]),  # inactive
+            ([self.garlic.id], [self.feta.id, self.feta.id]),  # duplicate
+            (["abc"], [self.feta.id]),  # not an id
+        ):
+            with self.subTest(sauce=sauce, extras=extras):
+                self.assertRejected("Ungültige Auswahl bei:", sauce=sauce, extras=extras)
+
+    def test_product_overrides_the_group_rules(self):
+        ProductOptionGroup.objects.filter(product=self.product, group=self.extras).update(min_select=0, max_select=3)
+        invalidate_menu()
+        self.assertEqual(len(self.validate(sauce=[self.hot.id])), 1)
+        self.assertEqual(len(self.validate(sauce=[self.hot.id], extras=[self.cheese.id, self.feta.id, self.onion.id])), 4)
+
+    def test_add_to_cart_quantity(self):
+        url = reverse("add_to_cart", args=[self.product.id])
+        options = {f"group_{self.sauce.id}": self.garlic.id, f"group_{self.extras.id}[]": [self.cheese.id]}
+        for raw, expected in (("3", 3), ("0", 1), ("-2", 1), ("abc", 1)):
+            with self.subTest(quantity=raw):
+                self.client.post(url, {"quantity": raw, **options})
+                self.assertEqual(SessionCart(self.client.session).lines[-1].quantity, expected)
+
+        self.client.post(url, {"quantity": 1, f"group_{self.extras.id}[]": [self.cheese.id]})  # sauce missing
+        self.assertEqual(len(SessionCart(self.client.session).lines), 4)
+
+
+# -----------------------------
+# ORDER PLACEMENT (placement.py)
+# -----------------------------
+
+class PlacementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        [product] = make_menu()
+        self.order = Order.objects.create(full_name="Kunde", phone="0341")
+        OrderItem.objects.create(order=self.order, product=product, quantity=2, price_at_time=Decimal("7.00"))
+
+    def test_placing_twice_is_a_no_op(self):
+        order, placed = place_order(self.order.id, payment_method="CASH")
+        self.assertTrue(placed)
+        self.assertEqual((order.status, order.total_amount), ("PLACED", Decimal("14.00")))
+        self.assertRegex(order.order_number, r"^OK-\d{8}-[0-9A-F]{6}$")
+
+        again, placed = place_order(self.order.id, payment_method="CASH")
+        self.assertFalse(placed)
+        self.assertEqual(again.order_number, order.order_number)
+        self.assertEqual(Job.objects.filter(name="order.placed").count(), 1)
+        self.assertEqual(OrderStatusEvent.objects.filter(order=self.order).count(), 1)
+        self.assertEqual(place_order(0, payment_method="CASH"), (None, False))
+
+    def test_late_payment_is_recorded_once(self):
+        place_order(self.order.id, payment_method="STRIPE", stripe_session_id="cs_1")
+        order, placed = place_order(self.order.id, payment_method="STRIPE", is_paid=True, stripe_payment_intent_id="pi_1")
+        self.assertFalse(placed)
+        self.assertEqual((order.is_paid, order.stripe_session_id, order.stripe_payment_intent_id), (True, "cs_1", "pi_1"))
+        self.assertEqual(OrderStatusEvent.objects.filter(order=self.order).count(), 1)
+
+    def test_order_number_clash_is_retried(self):
+        Order.objects.create(full_name="Andere", phone="1", status="PLACED", order_number="OK-20260101-AAAAAA")
+        numbers = iter(["OK-20260101-AAAAAA", "OK-20260101-BBBBBB"])
+        with mock.patch.object(Order, "generate_order_number", side_effect=lambda: next(numbers)):
+            order, placed = place_order(self.order.id, payment_method="CASH")
+        self.assertTrue(placed)
+        self.assertEqual(order.order_number, "OK-20260101-BBBBBB")
+
+    def test_gives_up_after_the_attempts(self):
+        Order.objects.create(full_name="Andere", phone="1", status="PLACED", order_number="OK-20260101-AAAAAA")
+        with mock.patch.object(Order, "generate_order_number", return_value="OK-20260101-AAAAAA") as generate:
+            with self.assertRaises(IntegrityError):
+                place_order(self.order.id, payment_method="CASH")
+        self.assertEqual(generate.call_count, ORDER_NUMBER_ATTEMPTS)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "CART")
+        self.assertFalse(Job.objects.filter(name="order.placed").exists())
+
+
+# -----------------------------
+# JOB QUEUE (jobs.py)
+# -----------------------------
+
+@override_settings(PAYMENT_GATEWAY="FoodOrdering.payments.FakeGateway")
+class JobQueueTests(TestCase):
+    def setUp(self):
+        get_gateway.cache_clear()
+        self.addCleanup(get_gateway.cache_clear)
+        self.calls = []
+
+        def flaky(payload):
+            self.calls.append(payload)
+            raise RuntimeError("kaputt")
+
+        handler("tests.flaky")(flaky)
+        self.addCleanup(jobs._handlers.pop, "tests.flaky")
+
+    def test_key_deduplicates(self):
+        first = enqueue("tests.flaky", {"n": 1}, key="k1")
+        self.assertEqual(enqueue("tests.flaky", {"n": 2}, key="k1").id, first.id)
+        enqueue("tests.flaky", {"n": 3})
+        enqueue("tests.flaky", {"n": 4})
+        self.assertEqual(Job.objects.count(), 3)
+
+    def test_failures_back_off_then_fail(self):
+        job = enqueue("tests.flaky", max_attempts=2)
+        before = timezone.now()
+        with self.assertLogs("FoodOrdering.jobs", "WARNING"):
+            self.assertEqual(run_pending(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_at), ("PENDING", 1, None))
+        self.assertIn("RuntimeError: kaputt", job.last_error)
+        delay = (job.run_at - before).total_seconds()
+        self.assertTrue(jobs.BACKOFF_BASE <= delay <= jobs.BACKOFF_BASE * 1.25 + 1, delay)
+        self.assertEqual(run_pending(), (0, 0))  # not due yet
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs("FoodOrdering.jobs", "ERROR"):
+            self.assertEqual(run_pending(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("FAILED", 2))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        for attempts, base in ((1, 10), (2, 20), (3, 40), (30, jobs.BACKOFF_MAX)):
+            with self.subTest(attempts=attempts):
+                self.assertTrue(base <= jobs.backoff(attempts) <= base * 1.25)
+
+    def test_expired_lease_is_claimed_again(self):
+        now = timezone.now()
+        stale = enqueue("order.placed", {"order_id": 0})
+        fresh = enqueue("order.placed", {"order_id": 0})
+        Job.objects.filter(id=stale.id).update(status="RUNNING", attempts=1, locked_at=now - jobs.LEASE - timedelta(seconds=1))
+        Job.objects.filter(id=fresh.id).update(status="RUNNING", attempts=1, locked_at=now)
+
+        self.assertEqual(run_pending(), (1, 0))
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.attempts), ("DONE", 2))
+        self.assertEqual(fresh.status, "RUNNING")  # its worker may still be busy
+
+    def test_webhook_only_enqueues(self):
+        order = Order.objects.create(full_name="Kunde", phone="0341")
+        event = json.dumps({
+            "id": "evt_1", "type": "checkout.session.completed",
+            "data": {"object": {"id": "cs_1", "payment_intent": "pi_1", "metadata": {"order_id": str(order.id)}}},
+        })
+        for _ in range(2):  # Stripe retries deliveries
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(reverse("stripe_webhook"), event, content_type="application/json")
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse([q for q in ctx.captured_queries if "FoodOrdering_order" in q["sql"]])
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, "CART")
+        job = Job.objects.get(name="stripe.checkout_completed")
+        self.assertEqual(job.payload, {"order_id": order.id, "session_id": "cs_1", "payment_intent": "pi_1"})
+
+        run_pending()
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.is_paid, order.stripe_payment_intent_id), ("PLACED", True, "pi_1"))
+
+
+# -----------------------------
+# STRIPE GATEWAY (payments.py)
+# -----------------------------
+
+@override_settings(
+    STRIPE_SECRET_KEY="sk_test_123", STRIPE_WEBHOOK_SECRET="whsec_test",
+    PAYMENT_GATEWAY="FoodOrdering.payments.StripeGateway",
+)
+class StripeGatewayTests(TestCase):
+    """The real stripe objects (not dicts) must survive the gateway; no network."""
+
+    def setUp(self):
+        get_gateway.cache_clear()
+        self.addCleanup(get_gateway.cache_clear)
+
+    SESSION = {
+        "id": "cs_1", "object": "checkout.session", "url": "https://checkout.stripe.com/c/pay/cs_1",
+        "payment_status": "paid", "payment_intent": "pi_1", "metadata": {"order_id": "7"},
+    }
+
+    def test_checkout_session_from_stripe(self):
+        session = CheckoutSession.from_stripe(stripe.checkout.Session.construct_from(self.SESSION, "sk_test"))
+        self.assertEqual(session, CheckoutSession(
+            id="cs_1", url="https://checkout.stripe.com/c/pay/cs_1", payment_status="paid",
+            payment_intent="pi_1", metadata={"order_id": "7"},
+        ))
+        self.assertTrue(session.is_paid)
+
+        unpaid = CheckoutSession.from_stripe(stripe.checkout.Session.construct_from(
+            {"id": "cs_2", "object": "checkout.session", "url": None, "payment_status": "unpaid",
+             "payment_intent": None, "metadata": {}}, "sk_test",
+        ))
+        self.assertEqual((unpaid.url, unpaid.payment_intent, unpaid.is_paid), ("", "", False))
+
+    def test_retrieve_returns_a_checkout_session(self):
+        gateway = StripeGateway()
+        stripe_session = stripe.checkout.Session.construct_from(self.SESSION, "sk_test")
+        with mock.patch.object(gateway.client.v1.checkout.sessions, "retrieve", return_value=stripe_session):
+            self.assertEqual(gateway.retrieve_checkout_session("cs_1").metadata, {"order_id": "7"})
+
+    def test_signed_webhook_enqueues_the_placement(self):
+        order = Order.objects.create(full_name="Kunde", phone="0341")
+        payload = json.dumps({
+            "id": "evt_1", "object": "event", "type": "checkout.session.completed",
+            "data": {"object": {**self.SESSION, "metadata": {"order_id": str(order.id)}}},
+        })
+        signature = stripe.WebhookSignature.generate_signature_header(payload, "whsec_test")
+        response = self.client.post(
+            reverse("stripe_webhook"), payload, content_type="application/json", HTTP_STRIPE_SIGNATURE=signature,
+        )
+        self.assertEqual(response.status_code, 200)
+        job = Job.objects.get(name="stripe.checkout_completed", key="stripe:evt_1")
+        self.assertEqual(job.payload, {"order_id": order.id, "session_id": "cs_1", "payment_intent": "pi_1"})
+
+        response = self.client.post(
+            reverse("stripe_webhook"), payload, content_type="application/json", HTTP_STRIPE_SIGNATURE="t=1,v1=bad",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+# -----------------------------
+# ABANDONED CARTS (purge_abandoned_carts)
+# -----------------------------
+
+class PurgeAbandonedCartsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        [cls.product] = make_menu()
+        sauce = OptionGroup.objects.create(name="Soße", slug="sosse")
+        cls.garlic = Option.objects.create(group=sauce, name="Knoblauch", price_delta=Decimal("0.50"))
+
+    def order(self, status="CART", hours_ago=0):
+        order = Order.objects.create(full_name="Kunde", phone="0341", status=status)
+        Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+        item = OrderItem.objects.create(order=order, product=self.product, quantity=1, price_at_time=Decimal("7.00"))
+        OrderItemOption.objects.create(order_item=item, option=self.garlic, price_delta_at_time=Decimal("0.50"))
+        return order
+
+    def test_only_old_carts_are_deleted(self):
+        abandoned = [self.order(hours_ago=72) for _ in range(3)]
+        recent = self.order(hours_ago=24)
+        placed = [self.order(status=status, hours_ago=72) for status in ("PLACED", "COMPLETED", "CANCELLED")]
+
+        out = StringIO()
+        call_command("purge_abandoned_carts", "--dry-run", stdout=out)
+        self.assertIn("3 abandoned carts", out.getvalue())
+        self.assertEqual(Order.objects.count(), 7)
+
+        out = StringIO()
+        call_command("purge_abandoned_carts", "--batch-size", "2", stdout=out)  # two batches
+        self.assertIn("Done: 3 carts deleted.", out.getvalue())
+        kept = [recent, *placed]
+        self.assertEqual(set(Order.objects.values_list("id", flat=True)), {order.id for order in kept})
+        self.assertFalse(OrderItem.objects.filter(order__in=abandoned).exists())
+        self.assertEqual(OrderItem.objects.count(), 4)
+        self.assertEqual(OrderItemOption.objects.count(), 4)
+
+        call_command("purge_abandoned_carts", "--older-than-hours", "12", stdout=StringIO())
+        self.assertEqual(set(Order.objects.values_list("status", flat=True)), {"PLACED", "COMPLETED", "CANCELLED"})
+
+
+# -----------------------------
+# CART COUNT (views.get_cart_count)
+# -----------------------------
+
+class CartCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = make_menu("Döner", "Dürüm")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_cart_revalidates_with_304(self):
+        url = reverse("get_cart_count")
+        self.client.post(reverse("add_to_cart", args=[self.products[0].id]), {"quantity": 1})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"count": 1})
+        etag = response["ETag"]
+        self.assertTrue(etag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertFalse([q for q in ctx.captured_queries if '"FoodOrdering_order' in q["sql"]])
+
+        self.client.post(reverse("add_to_cart", args=[self.products[1].id]), {"quantity": 1})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"count": 2})
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+
+# -----------------------------
+# DASHBOARD STATS (dashboard.py)
+# -----------------------------
+
+@override_settings(TIME_ZONE="Europe/Berlin")
+class DashboardStatsTests(TestCase):
+    def local(self, *args):
+        return timezone.make_aware(datetime(*args))
+
+    def test_order_stats(self):
+        now = self.local(2026, 10, 14, 12, 0)  # a Wednesday
+        starts = _period_starts(now)
+        self.assertEqual(starts, {
+            "today": self.local(2026, 10, 14), "week": self.local(2026, 10, 12), "month": self.local(2026, 10, 1),
+        })
+        minute = timedelta(minutes=1)
+        for placed_at, amount, status, paid in (
+            (starts["today"], "1.00", "COMPLETED", True),
+            (starts["today"] - minute, "2.00", "DELIVERING", True),
+            (starts["week"], "4.00", "COMPLETED", True),
+            (starts["week"] - minute, "8.00", "COMPLETED", True),
+            (starts["month"], "16.00", "COMPLETED", True),
+            (starts["month"] - minute, "32.00", "CANCELLED", True),
+            (now, "64.00", "PLACED", False),
+            (now, "128.00", "PREPARING", False),
+            (now, "256.00", "CART", True),  # not an order yet
+        ):
+            Order.objects.create(full_name="Kunde", phone="0341", status=status, placed_at=placed_at,
+                                 total_amount=Decimal(amount), is_paid=paid)
+
+        self.assertEqual(order_stats(now), {
+            "orders_count": 8,
+            "placed_orders": 1,
+            "preparing_orders": 1,
+            "delivering_orders": 1,
+            "completed_orders": 4,
+            "cancelled_orders": 1,
+            "total_revenue": Decimal("63.00"),
+            "revenue_today": Decimal("1.00"),
+            "revenue_week": Decimal("7.00"),
+            "revenue_month": Decimal("31.00"),
+        })
+
+    def test_empty_stats_are_zero(self):
+        stats = order_stats()
+        self.assertEqual(stats["orders_count"], 0)
+        self.assertEqual((stats["total_revenue"], stats["revenue_today"]), (Decimal("0.00"), Decimal("0.00")))
+        self.assertEqual(reservation_stats()["reservations_count"], 0)
+
+    def test_reservation_stats(self):
+        for status in ("new", "new", "confirmed", "cancelled"):
+            TableReservation.objects.create(name="Gast", email="gast@example.com", phone="0341",
+                                            date=date(2026, 10, 14), time=dt_time(19, 0), people=2, status=status)
+        self.assertEqual(reservation_stats(), {
+            "reservations_count": 4,
+            "reservations_new": 2,
+            "reservations_confirmed": 1,
+            "reservations_cancelled": 1,
+        })
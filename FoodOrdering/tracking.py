@@ -0,0 +1,77 @@
+"""
+Order tracking read model (order_success, track_order, tracking status JSON).
+
+Customers refresh these pages while waiting, so a lookup by order number is
+cached for a short time: status plus the rendered item summary
+(`includes/order_summary.html`). Building it costs 2 queries: the order and
+its CartSummary (option names come from the stored OrderItem.option_label).
+Every Order save drops the entry after commit (signals.py), so a status
+change is visible on the next poll; `.update()` callers must call
+`invalidate_tracking()` (after commit as well).
+"""
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .cart import CartSummary
+from .models import Order
+
+TRACKING_TTL = 30  # seconds
+
+
+@dataclass(frozen=True)
+class TrackedOrder:
+    order_number: str
+    status: str
+    status_display: str
+    created_at: object
+    summary_html: str
+
+    def as_json(self):
+        return {
+            "order_number": self.order_number,
+            "status": self.status,
+            "status_display": self.status_display,
+        }
+
+
+def _key(order_number):
+    return f"tracking:{order_number}"
+
+
+def invalidate_tracking(order_number):
+    if order_number:
+        cache.delete(_key(order_number))
+
+
+def _load(order_number):
+    order = (
+        Order.objects.exclude(status="CART")
+        .filter(order_number=order_number)
+        .only("id", "order_number", "status", "created_at")
+        .first()
+    )
+    if order is None:
+        return None
+    summary = CartSummary.from_order(order.id)
+    return TrackedOrder(
+        order_number=order.order_number,
+        status=order.status,
+        status_display=order.get_status_display(),
+        created_at=order.created_at,
+        summary_html=render_to_string("includes/order_summary.html", {"summary": summary}),
+    )
+
+
+def get_tracked_order(order_number):
+    """TrackedOrder for a placed order, or None (misses are not cached)."""
+    if not order_number:
+        return None
+    key = _key(order_number)
+    tracked = cache.get(key)
+    if tracked is None:
+        tracked = _load(order_number)
+        if tracked is not None:
+            cache.set(key, tracked, TRACKING_TTL)
+    return tracked
@@ -0,0 +1,101 @@
+"""
+Status changes for many orders at once (dashboard bulk actions).
+
+`set_statuses({order_id: status})` validates the whole request, then in one
+transaction locks the orders with a single SELECT, writes one UPDATE per
+target status (not per order), logs the transitions (status_log.py) and runs
+the kitchen hook (kitchen.py). `.update()` skips the Order signals, so the
+tracking entries are dropped explicitly after commit; live dashboards pick
+the changes up from the status log (broker.py) like a single status change.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .kitchen import statuses_changed
+from .models import Order
+from .status_log import record_transitions
+from .tracking import invalidate_tracking
+
+BULK_STATUS_LIMIT = 100  # orders per request
+BULK_STATUSES = tuple(status for status, _ in Order.STATUS_CHOICES if status != "CART")
+
+# first time an order reaches a status: stamp the matching column (kept if already set)
+STATUS_TIMESTAMPS = {"PLACED": "placed_at", "PREPARING": "preparing_at"}
+
+
+class TransitionError(Exception):
+    """A bulk request that can't be applied; nothing was changed."""
+
+
+def parse_changes(raw):
+    """[{"id": 1, "status": "PREPARING"}, ...] -> {1: "PREPARING"}; raises TransitionError."""
+    if not isinstance(raw, list) or not raw:
+        raise TransitionError("No orders selected")
+    if len(raw) > BULK_STATUS_LIMIT:
+        raise TransitionError(f"At most {BULK_STATUS_LIMIT} orders per request")
+    wanted = {}
+    for change in raw:
+        try:
+            order_id, status = int(change["id"]), change["status"]
+        except (KeyError, TypeError, ValueError):
+            raise TransitionError("Invalid change") from None
+        if status not in BULK_STATUSES:
+            raise TransitionError(f"Invalid status: {status}")
+        if wanted.setdefault(order_id, status) != status:
+            raise TransitionError(f"Conflicting statuses for order {order_id}")
+    return wanted
+
+
+@transaction.atomic
+def set_statuses(wanted, now=None):
+    """
+    Apply {order_id: status} to placed orders. Returns the ids whose status
+    actually changed; raises TransitionError (and changes nothing) if an id
+    is unknown or still a cart.
+    """
+    now = now or timezone.now()
+    orders = list(
+        Order.objects.select_for_update()
+        .exclude(status="CART")
+        .filter(id__in=wanted)
+        .only("id", "order_number", "status", "created_at", "placed_at", "preparing_at")
+    )
+    missing = set(wanted) - {order.id for order in orders}
+    if missing:
+        raise TransitionError(f"Unknown orders: {', '.join(map(str, sorted(missing)))}")
+
+    by_status = defaultdict(list)
+    changes = []
+    for order in orders:
+        status = wanted[order.id]
+        if status == order.status:
+            continue
+        changes.append((order, order.status))
+        by_status[status].append(order)
+
+    for status, group in by_status.items():
+        values = {"status": status}
+        column = STATUS_TIMESTAMPS.get(status)
+        if column:
+            values[column] = Coalesce(F(column), Value(now, output_field=DateTimeField()))
+        Order.objects.filter(id__in=[order.id for order in group]).update(**values)
+        for order in group:
+            order.status = status
+            if column and getattr(order, column) is None:
+                setattr(order, column, now)
+
+    record_transitions(changes, now=now)
+    statuses_changed(changes, now=now)
+
+    numbers = [order.order_number for order, _ in changes]
+
+    def drop_tracking():
+        for number in numbers:
+            invalidate_tracking(number)
+
+    transaction.on_commit(drop_tracking)
+    return [order.id for order, _ in changes]
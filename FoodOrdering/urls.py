@@ -7,7 +7,14 @@ urlpatterns = [
     path('login/', views.login_page, name='login'),
     path('logout/', views.logout_user, name='logout'),
     path('dashboard/', views.admin_panel, name='admin'),
+    path('dashboard/orders/', views.admin_orders_feed, name='admin_orders_feed'),
+    path('dashboard/reservations/', views.admin_reservations_feed, name='admin_reservations_feed'),
+    path('dashboard/stream/', views.order_stream, name='order_stream'),
+    path('dashboard/metrics/', views.request_metrics_view, name='request_metrics'),
+    path('dashboard/order-flow/', views.order_flow_view, name='order_flow'),
+    path('dashboard/sales/', views.admin_sales, name='admin_sales'),
     path('dashboard/order/<int:order_id>/status/', views.update_order_status, name='update_order_status'),
+    path('dashboard/orders/status/', views.bulk_update_order_status, name='bulk_update_order_status'),
     path('dashboard/reservation/<int:reservation_id>/status/', views.update_reservation_status, name='update_reservation_status'),
 
     # Menu / Categories / Products
@@ -32,7 +39,9 @@ urlpatterns = [
     path("checkout/cash/", views.place_cash_order, name="place_cash_order"),
     path("order/success/<str:order_number>/", views.order_success, name="order_success"),
     path("order/track/", views.track_order, name="track_order"),
+    path("order/track/<str:order_number>/status/", views.order_status_json, name="order_status_json"),
 
 # Reservation
     path("reservation/create/", views.create_reservation, name="create_reservation"),
+    path("reservation/availability/", views.reservation_availability, name="reservation_availability"),
 ]
@@ -1,39 +1,54 @@
-from decimal import Decimal
-import stripe
+import asyncio
+import json
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
-from django.views.decorators.http import require_POST
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_POST
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Prefetch
+from django.template.loader import render_to_string
 from .forms import TableReservationForm, CustomAuthenticationForm
-
-from .models import (
-    Product, Order, OrderItem, Category,
-    ProductOptionGroup, Option, OrderItemOption, Event,
-    TableReservation
+from .analytics import sales_overview
+from .broker import format_sse, order_events, order_relay
+from .cart import CUSTOMER_FIELDS, CartLineError, CartSummary, SessionCart, cart_count, validate_options
+from .checkout import build_checkout_payload
+from .dashboard import (
+    ORDER_PAGE_SIZE, ORDER_STATUSES, RESERVATION_PAGE_SIZE, RESERVATION_STATUSES, get_feed_orders, order_feed,
+    order_stats, parse_feed_params, reservation_feed, reservation_stats, serialize_order, serialize_reservation,
 )
+from .instrumentation import METRICS_WINDOW, request_metrics
+from .jobs import enqueue
+from .kitchen import ACTIVE_STATUSES as KITCHEN_STATUSES, get_eta, get_queue, order_status_changed
+from .menu import get_menu_snapshot, render_menu_section
+from .payments import InvalidWebhookError, PaymentGatewayError, get_gateway
+from .placement import place_order
+from .reservations import ReservationError, SlotUnavailable, available_slots, reserve
+from .status_log import order_flow, record_transition
+from .tracking import get_tracked_order
+from .transitions import TransitionError, parse_changes, set_statuses
+
+from .models import Order, TableReservation
+
+STREAM_HEARTBEAT = 15  # seconds between keepalive comments
+STREAM_RETRY_MS = 3000  # EventSource reconnect delay
 
 
 def home(request):
-    # Speed: prefetch everything needed for modals (products + option groups + options)
-    events = Event.objects.filter(is_active=True).order_by('sort_order')
-    categories = (
-        Category.objects.filter(is_active=True)
-        .prefetch_related(
-            "products",
-            "products__product_option_groups__group__options",
-        )
-    )    
-    return render(request, "index.html", {  
-        "categories": categories,
-        'events': events,
+    # Speed: menu + events come from the in-memory snapshot, the menu section
+    # HTML from the fragment cache (both rebuilt only when the menu changes).
+    menu = get_menu_snapshot()
+    return render(request, "index.html", {
+        "menu_html": render_menu_section(request, menu),
+        "events": menu.events,
         "reservation_form": TableReservationForm()
     })
 
@@ -76,44 +91,132 @@ def login_page(request):
 @login_required(login_url='login')
 def admin_panel(request):
     """Render the admin panel with orders and reservations (login required)."""
-    # Fetch all orders (except CART status) ordered by newest first
-    orders = (
-        Order.objects
-        .exclude(status="CART")
-        .select_related("user")
-        .prefetch_related("items__product", "items__chosen_options__option__group")
-        .order_by("-created_at")
-    )
-    
-    # Fetch all reservations ordered by newest first
-    reservations = TableReservation.objects.order_by("-created_at")
-    
-    # Calculate stats
-    orders_count = orders.count()
-    placed_orders = orders.filter(status="PLACED").count()
-    preparing_orders = orders.filter(status="PREPARING").count()
-    completed_orders = orders.filter(status="COMPLETED").count()
-    
-    reservations_new = reservations.filter(status="new").count()
-    reservations_confirmed = reservations.filter(status="confirmed").count()
-    
-    total_revenue = sum(order.total_price() for order in orders.filter(is_paid=True))
-    
+    # Only the newest page of each list; older pages come from the JSON feeds
+    orders, orders_next_cursor = order_feed()
+    reservations, reservations_next_cursor = reservation_feed()
+
+    # Stats: two aggregate queries, independent of history size
     context = {
         "orders": orders,
+        "orders_next_cursor": orders_next_cursor,
         "reservations": reservations,
-        "orders_count": orders_count,
-        "placed_orders": placed_orders,
-        "preparing_orders": preparing_orders,
-        "completed_orders": completed_orders,
-        "reservations_new": reservations_new,
-        "reservations_confirmed": reservations_confirmed,
-        "total_revenue": total_revenue,
+        "reservations_next_cursor": reservations_next_cursor,
+        "kitchen": get_queue(),
+        **order_stats(),
+        **reservation_stats(),
     }
     
     return render(request, "admin.html", context)
 
 
+@staff_member_required(login_url='login')
+def request_metrics_view(request):
+    """p50/p95/p99 response time, queries and size per URL name (this process, recent requests)."""
+    return JsonResponse({"window": METRICS_WINDOW, "views": request_metrics.summary()})
+
+
+@staff_member_required(login_url='login')
+def order_flow_view(request):
+    """Per-stage latency percentiles and hourly throughput from the status log (GET: days, default 7)."""
+    try:
+        days = int(request.GET.get("days", 7))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid days"}, status=400)
+    if not 1 <= days <= 90:
+        return JsonResponse({"success": False, "error": "Invalid days"}, status=400)
+    return JsonResponse({"success": True, "days": days, **order_flow(days)})
+
+
+@login_required(login_url='login')
+def admin_sales(request):
+    """Sales charts (GET: days, default 14) rendered from the rollup tables only."""
+    try:
+        days = int(request.GET.get("days", 14))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid days"}, status=400)
+    if not 1 <= days <= 90:
+        return JsonResponse({"success": False, "error": "Invalid days"}, status=400)
+    html = render_to_string(
+        "includes/sales_charts.html", {"sales": sales_overview(days), "days": days}, request=request
+    )
+    return JsonResponse({"success": True, "html": html})
+
+
+@login_required(login_url='login')
+def admin_orders_feed(request):
+    """
+    One page of orders as JSON (GET: status, date_from, date_to, cursor, limit).
+    `html` holds the rendered table rows so the dashboard can append them as-is.
+    """
+    try:
+        params = parse_feed_params(request.GET, ORDER_PAGE_SIZE, ORDER_STATUSES)
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid filter"}, status=400)
+
+    orders, next_cursor = order_feed(**params)
+    html = "".join(
+        render_to_string("includes/dashboard_order_row.html", {"order": order}, request=request)
+        for order in orders
+    )
+    return JsonResponse({
+        "success": True,
+        "orders": [serialize_order(order) for order in orders],
+        "html": html,
+        "next_cursor": next_cursor,
+    })
+
+
+@login_required(login_url='login')
+def admin_reservations_feed(request):
+    """One page of reservations as JSON, same parameters as admin_orders_feed."""
+    try:
+        params = parse_feed_params(request.GET, RESERVATION_PAGE_SIZE, RESERVATION_STATUSES)
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid filter"}, status=400)
+
+    reservations, next_cursor = reservation_feed(**params)
+    html = "".join(
+        render_to_string("includes/dashboard_reservation_row.html", {"reservation": r}, request=request)
+        for r in reservations
+    )
+    return JsonResponse({
+        "success": True,
+        "reservations": [serialize_reservation(r) for r in reservations],
+        "html": html,
+        "next_cursor": next_cursor,
+    })
+
+
+@login_required(login_url='login')
+async def order_stream(request):
+    """
+    Server-sent events for the dashboard: `order.placed`, `order.status` and
+    `resync`. Needs the ASGI entry point; a WSGI worker would be held forever.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Live-Updates benötigen den ASGI-Server.", status=503)
+
+    async def stream():
+        order_relay.ensure_running()
+        sub = order_events.subscribe()
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            order_events.unsubscribe(sub)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
+
+
 @login_required(login_url='login')
 @require_POST
 def update_order_status(request, order_id):
@@ -126,10 +229,14 @@ def update_order_status(request, order_id):
     if new_status not in valid_statuses:
         return JsonResponse({"success": False, "error": "Invalid status"}, status=400)
     
+    previous_status = order.status
     order.status = new_status
     if new_status == "PLACED" and not order.placed_at:
         order.placed_at = timezone.now()
-    order.save()
+    with transaction.atomic():  # the status and its log entry land together
+        order.save()
+        record_transition(order, previous_status)
+        order_status_changed(order, previous_status)
     
     return JsonResponse({
         "success": True,
@@ -140,6 +247,33 @@ def update_order_status(request, order_id):
     })
 
 
+@login_required(login_url='login')
+@require_POST
+def bulk_update_order_status(request):
+    """
+    Move many orders at once (AJAX, JSON body {"changes": [{"id": 1, "status": "PREPARING"}, ...]}).
+    Returns only the changed rows, rendered, so the dashboard replaces them in place.
+    """
+    try:
+        wanted = parse_changes(json.loads(request.body or b"{}").get("changes"))
+        changed = set_statuses(wanted)
+    except (ValueError, AttributeError):
+        return JsonResponse({"success": False, "error": "Invalid JSON"}, status=400)
+    except TransitionError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    orders = get_feed_orders(changed)
+    return JsonResponse({
+        "success": True,
+        "message": f"{len(orders)} Bestellungen aktualisiert",
+        "orders": [serialize_order(order) for order in orders],
+        "html": {
+            order.id: render_to_string("includes/dashboard_order_row.html", {"order": order}, request=request)
+            for order in orders
+        },
+    })
+
+
 @login_required(login_url='login')
 @require_POST
 def update_reservation_status(request, reservation_id):
@@ -172,20 +306,6 @@ def logout_user(request):
 
 
 
-def get_cart(request):
-    cart_id = request.session.get("cart_id")
-    cart = None
-
-    if cart_id:
-        cart = Order.objects.filter(id=cart_id, status="CART").first()
-
-    if not cart:
-        cart = Order.objects.create(full_name="", phone="", status="CART")
-        request.session["cart_id"] = cart.id
-
-    return cart
-
-
 def _parse_quantity(request):
     try:
         q = int(request.POST.get("quantity", "1"))
@@ -194,7 +314,25 @@ def _parse_quantity(request):
         return 1
 
 
-@transaction.atomic
+def _customer_from_post(request):
+    return {k: (request.POST.get(k) or "").strip() for k in CUSTOMER_FIELDS}
+
+
+def _customer_complete(customer):
+    return all(customer.get(k) for k in ("last_name", "phone", "street", "postal_code", "city"))
+
+
+def _order_fields(customer):
+    """Map checkout form fields to Order columns."""
+    return {
+        "full_name": f"{customer.get('first_name', '')} {customer.get('last_name', '')}".strip(),
+        "phone": customer.get("phone", ""),
+        "address_line": customer.get("street", ""),
+        "postal_code": customer.get("postal_code", ""),
+        "city": customer.get("city", ""),
+    }
+
+
 def add_to_cart(request, product_id):
     """
     Expects POST from modal.
@@ -204,86 +342,23 @@ def add_to_cart(request, product_id):
     - For RADIO groups (max_select == 1):   group_<group_id> = <option_id>
     - For CHECKBOX groups (max_select > 1): group_<group_id>[] = [<option_id>, ...]
     """
-    product = get_object_or_404(Product, id=product_id, is_available=True)
+    product = get_menu_snapshot().get_product(product_id)
+    if product is None:
+        raise Http404("Produkt nicht verfügbar.")
 
     if request.method != "POST":
         messages.error(request, "Bitte wähle Optionen aus und füge dann zum Warenkorb hinzu.")
         return redirect("home")
 
-    cart = get_cart(request)
-    quantity = _parse_quantity(request)
-
-    # Create a new line item always (because same product can have different options)
-    item = OrderItem.objects.create(
-        order=cart,
-        product=product,
-        quantity=quantity,
-        price_at_time=product.price,
-    )
-
-    # Load option groups attached to this product
-    pogs = (
-        ProductOptionGroup.objects
-        .select_related("group")
-        .filter(product=product)
-        .order_by("sort_order", "group__sort_order", "group__name")
-    )
+    # Validate everything in memory, the line only goes into the session
+    try:
+        options = validate_options(product, request.POST)
+    except CartLineError as e:
+        messages.error(request, str(e))
+        return redirect("home")
 
-    # Validate + save selected options
-    for pog in pogs:
-        group = pog.group
-
-        min_select = pog.effective_min_select()
-        max_select = pog.effective_max_select()
-        is_required = pog.effective_is_required()
-
-        # If required but min_select is 0, we treat it as 1 (sane UX)
-        if is_required and min_select == 0:
-            min_select = 1
-
-        radio_key = f"group_{group.id}"
-        checkbox_key = f"group_{group.id}[]"
-
-        if max_select and max_select > 1:
-            raw_ids = request.POST.getlist(checkbox_key)
-        else:
-            v = request.POST.get(radio_key)
-            raw_ids = [v] if v else []
-
-        raw_ids = [x for x in raw_ids if x]  # drop empty
-        count = len(raw_ids)
-
-        # Rules
-        if count < min_select:
-            item.delete()
-            messages.error(request, f"Bitte wähle mindestens {min_select} Option(en) bei: {group.name}")
-            return redirect("home")
-
-        if max_select and count > max_select:
-            item.delete()
-            messages.error(request, f"Zu viele Optionen gewählt bei: {group.name} (max. {max_select})")
-            return redirect("home")
-
-        # Fetch options and verify they belong to THIS group and are active
-        opts = list(
-            Option.objects.filter(
-                id__in=raw_ids,
-                group=group,
-                is_active=True,
-            )
-        )
-        if len(opts) != count:
-            item.delete()
-            messages.error(request, f"Ungültige Auswahl bei: {group.name}")
-            return redirect("home")
-
-        # Save snapshots
-        for opt in opts:
-            OrderItemOption.objects.create(
-                order_item=item,
-                option=opt,
-                price_delta_at_time=opt.price_delta,
-            )
+    # Add a new line always (because same product can have different options)
+    SessionCart(request.session).add(product, _parse_quantity(request), options)
 
  # ✅ Return JSON for AJAX, otherwise redirect back to menu
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -292,16 +367,22 @@ def add_to_cart(request, product_id):
     return redirect("home")
 
 
+def _cart_count_etag(request):
+    return f"cart-{cart_count(request.session)}"
+
+
+# Polled on every page load: answered from the session (no Order queries),
+# and a browser revalidating with If-None-Match gets an empty 304.
+@cache_control(private=True, no_cache=True)
+@etag(_cart_count_etag)
 def get_cart_count(request):
     """Return the total number of items in the cart as JSON."""
-    cart = get_cart(request)
-    count = cart.items.count()  # Count number of OrderItems (not quantities)
+    count = cart_count(request.session)  # Count number of lines (not quantities)
     return JsonResponse({"count": count})
 
 def cart_detail(request):
-    cart = get_cart(request)
-    cart_items = cart.items.select_related("product").prefetch_related("chosen_options__option__group")
-    return render(request, "cart.html", {"cart": cart, "cart_items": cart_items})
+    summary = CartSummary.from_cart(SessionCart(request.session))
+    return render(request, "cart.html", {"cart": summary})
 
 
 
@@ -310,100 +391,99 @@ def remove_from_cart(request, product_id):
     Your old behavior: removes ALL cart lines of that product.
     Better UX is removing by item_id; keep this for now.
     """
-    cart = get_cart(request)
-    OrderItem.objects.filter(order=cart, product_id=product_id).delete()
+    SessionCart(request.session).remove_product(product_id)
     return redirect("cart_detail")
 
 
 def checkout(request):
-    cart = get_cart(request)
-    cart_items = (
-        cart.items.select_related("product")
-        .prefetch_related("chosen_options__option__group")
-    )
-    return render(request, "checkout.html", {"cart": cart, "cart_items": cart_items})
+    summary = CartSummary.from_cart(SessionCart(request.session))
+    return render(request, "checkout.html", {"cart": summary})
 
 
 # Stripe integration views Payement
-stripe.api_key = settings.STRIPE_SECRET_KEY
+# Async views: the Stripe round trip is awaited (payments.get_gateway()), the
+# DB work around it runs via sync_to_async.
 
+def _materialize_for_stripe(request):
+    """Validate + materialize the session cart. Returns (order, payload, error response)."""
+    cart = SessionCart(request.session)
 
-def _order_line_items_for_stripe(cart):
-    """
-    Stripe wants amounts in cents.
-    """
-    line_items = []
-    for item in cart.items.select_related("product").prefetch_related("chosen_options__option__group"):
-        # Build name including options
-        option_parts = []
-        for cho in item.chosen_options.all():
-            option_parts.append(f"{cho.option.group.name}: {cho.option.name}")
-        option_text = " | ".join(option_parts)
-
-        product_name = item.product.name
-        full_name = product_name if not option_text else f"{product_name} ({option_text})"
-
-        unit_amount_eur = item.unit_total()  # Decimal
-        unit_amount_cents = int((unit_amount_eur * 100).quantize(Decimal("1")))
-
-        line_items.append({
-            "price_data": {
-                "currency": "eur",
-                "product_data": {"name": full_name},
-                "unit_amount": unit_amount_cents,
-            },
-            "quantity": item.quantity,
-        })
-    return line_items
+    customer = _customer_from_post(request) if request.method == "POST" else cart.customer
+    if not _customer_complete(customer):
+        return None, None, JsonResponse({"ok": False, "message": "Bitte zuerst Name/Telefon/Adresse eingeben."}, status=400)
+
+    removed = cart.remove_unavailable(get_menu_snapshot())
+    if removed:
+        return None, None, JsonResponse({"ok": False, "message": f"Nicht mehr verfügbar: {', '.join(removed)}"}, status=400)
 
+    if not cart.count:
+        return None, None, JsonResponse({"ok": False, "message": "Warenkorb ist leer."}, status=400)
 
-def create_stripe_checkout_session(request):
-    cart = get_cart(request)
+    # First DB write of this cart: Order + items + options
+    cart.set_customer(**customer)
+    order = cart.materialize(payment_method="STRIPE", **_order_fields(customer))
 
-    if not cart.phone or not cart.address_line or not cart.postal_code or not cart.city:
-        return JsonResponse({"ok": False, "message": "Bitte zuerst Name/Telefon/Adresse eingeben."}, status=400)
+    # Line items (amounts in cents), count and total in one query
+    return order, build_checkout_payload(order.id), None
 
-    if cart.items.count() == 0:
-        return JsonResponse({"ok": False, "message": "Warenkorb ist leer."}, status=400)
+
+async def create_stripe_checkout_session(request):
+    order, payload, error = await sync_to_async(_materialize_for_stripe)(request)
+    if error:
+        return error
 
     success_url = request.build_absolute_uri(reverse("checkout_success"))
     cancel_url = request.build_absolute_uri(reverse("checkout_cancel"))
 
-    session = stripe.checkout.Session.create(
-        mode="payment",
-        payment_method_types=["card"],
-        line_items=_order_line_items_for_stripe(cart),
-        success_url=success_url + "?session_id={CHECKOUT_SESSION_ID}",
-        cancel_url=cancel_url,
-        metadata={"order_id": str(cart.id)},
-    )
+    try:
+        session = await get_gateway().acreate_checkout_session(
+            line_items=payload.line_items,
+            success_url=success_url + "?session_id={CHECKOUT_SESSION_ID}",
+            cancel_url=cancel_url,
+            metadata={"order_id": str(order.id), "item_count": str(payload.item_count)},
+        )
+    except PaymentGatewayError:
+        return JsonResponse({"ok": False, "message": "Kartenzahlung ist gerade nicht möglich. Bitte später erneut versuchen."}, status=502)
 
-    cart.payment_method = "STRIPE"
-    cart.stripe_session_id = session["id"]
-    cart.save(update_fields=["payment_method", "stripe_session_id"])
+    await Order.objects.filter(id=order.id).aupdate(stripe_session_id=session.id)
 
     return JsonResponse({"ok": True, "checkout_url": session.url})
 
 
-def checkout_success(request):
-    cart = get_cart(request)
+def _complete_checkout(request, session):
+    cart = SessionCart(request.session)
+    order = None
+
+    if session and session.is_paid:
+        # The webhook may have placed this order already: place_order is idempotent
+        order_id = session.metadata.get("order_id") or cart.order_id
+        if order_id:
+            order, _ = place_order(
+                order_id,
+                payment_method="STRIPE",
+                is_paid=True,
+                stripe_payment_intent_id=session.payment_intent,
+            )
+
+        # optional: clear cart session so next order starts fresh
+        cart.clear()
+
+    summary = CartSummary.from_order(order.id) if order else CartSummary.from_cart(cart)
+    return render(request, "checkout_success.html", {"cart": summary, "order": order})
+
+
+async def checkout_success(request):
+    session = None
     session_id = request.GET.get("session_id")
 
     # If we have session_id, verify it:
     if session_id:
-        session = stripe.checkout.Session.retrieve(session_id)
-        if session and session.get("payment_status") == "paid":
-            cart.ensure_order_number()
-            cart.status = "PLACED"
-            cart.is_paid = True
-            cart.placed_at = timezone.now()
-            cart.stripe_payment_intent_id = session.get("payment_intent", "") or ""
-            cart.save(update_fields=["status", "is_paid", "placed_at", "stripe_payment_intent_id", "order_number"])
+        try:
+            session = await get_gateway().aretrieve_checkout_session(session_id)
+        except PaymentGatewayError:
+            session = None  # the webhook still places the order
 
-            # optional: clear cart session so next order starts fresh
-            request.session.pop("cart_id", None)
-
-    return render(request, "checkout_success.html", {"cart": cart})
+    return await sync_to_async(_complete_checkout)(request, session)
 
 
 def checkout_cancel(request):
@@ -412,32 +492,34 @@ def checkout_cancel(request):
 
 @csrf_exempt
 def stripe_webhook(request):
+    """
+    Verify, record, answer: the event is stored as a job (deduplicated by the
+    Stripe event id, so Stripe's retries are no-ops) and `run_jobs` places the
+    order. Stripe gets its 200 after one INSERT.
+    """
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
-        )
-    except Exception:
+        event = get_gateway().construct_event(payload, sig_header)
+    except InvalidWebhookError:
         return HttpResponse(status=400)
 
     # Handle successful payment
     if event["type"] == "checkout.session.completed":
         session = event["data"]["object"]
-        order_id = session.get("metadata", {}).get("order_id")
+        order_id = (session.get("metadata") or {}).get("order_id")
 
         if order_id:
-            order = Order.objects.filter(id=order_id).first()
-            if order:
-                order.status = "PLACED"
-                order.is_paid = True
-                order.payment_method = "STRIPE"
-                order.placed_at = timezone.now()
-                order.stripe_session_id = session.get("id", "")
-                order.stripe_payment_intent_id = session.get("payment_intent", "") or ""
-                order.ensure_order_number()
-                order.save()
+            enqueue(
+                "stripe.checkout_completed",
+                {
+                    "order_id": int(order_id),
+                    "session_id": session.get("id", ""),
+                    "payment_intent": session.get("payment_intent", "") or "",
+                },
+                key=f"stripe:{event['id']}" if event.get("id") else None,
+            )
 
     return HttpResponse(status=200)
 
@@ -445,27 +527,15 @@ def stripe_webhook(request):
 # Save checkout info (name, phone, address)
 @require_POST
 def save_checkout_info(request):
-    cart = get_cart(request)
-
-    first_name = (request.POST.get("first_name") or "").strip()
-    last_name = (request.POST.get("last_name") or "").strip()
-    phone = (request.POST.get("phone") or "").strip()
-    street = (request.POST.get("street") or "").strip()
-    postal_code = (request.POST.get("postal_code") or "").strip()
-    city = (request.POST.get("city") or "").strip()
+    customer = _customer_from_post(request)
 
     # Required validation
-    if not last_name or not phone or not street or not postal_code or not city:
+    if not _customer_complete(customer):
         messages.error(request, "Bitte füllen Sie alle Pflichtfelder aus (Nachname, Telefon, Adresse).")
         return redirect("cart_detail")
 
-    # Save into Order
-    cart.full_name = f"{first_name} {last_name}".strip()
-    cart.phone = phone
-    cart.address_line = street
-    cart.postal_code = postal_code
-    cart.city = city
-    cart.save(update_fields=["full_name", "phone", "address_line", "postal_code", "city"])
+    # Kept in the session until the order is placed
+    SessionCart(request.session).set_customer(**customer)
 
     messages.success(request, "Daten gespeichert. Bitte wählen Sie nun eine Zahlungsart.")
     return redirect("cart_detail")
@@ -475,88 +545,119 @@ def save_checkout_info(request):
 
 @require_POST
 def place_cash_order(request):
-    cart = get_cart(request)
+    cart = SessionCart(request.session)
 
-    # 1) Must have items
-    if cart.items.count() == 0:
-        messages.error(request, "Ihr Warenkorb ist leer.")
+    # 1) Drop products that left the menu meanwhile
+    removed = cart.remove_unavailable(get_menu_snapshot())
+    if removed:
+        messages.error(request, f"Nicht mehr verfügbar und entfernt: {', '.join(removed)}")
         return redirect("cart_detail")
 
-    # 2) Read fields from POST (from hidden inputs in cart.html)
-    first_name = (request.POST.get("first_name") or "").strip()
-    last_name = (request.POST.get("last_name") or "").strip()
-    phone = (request.POST.get("phone") or "").strip()
-    street = (request.POST.get("street") or "").strip()
-    postal_code = (request.POST.get("postal_code") or "").strip()
-    city = (request.POST.get("city") or "").strip()
+    # 2) Must have items
+    if not cart.count:
+        messages.error(request, "Ihr Warenkorb ist leer.")
+        return redirect("cart_detail")
 
-    # 3) Validate required fields
-    if not last_name or not phone or not street or not postal_code or not city:
+    # 3) Read + validate fields from POST (from hidden inputs in cart.html)
+    customer = _customer_from_post(request)
+    if not _customer_complete(customer):
         messages.error(request, "Bitte füllen Sie alle Pflichtfelder (*) aus.")
         return redirect("cart_detail")
 
-    # 4) Save customer info into cart (Order)
-    cart.full_name = f"{first_name} {last_name}".strip()
-    cart.phone = phone
-    cart.address_line = street
-    cart.postal_code = postal_code
-    cart.city = city
-
-    # 5) Mark payment + place order (sent to restaurant)
-    cart.payment_method = "CASH"
-    cart.is_paid = False
-    cart.status = "PLACED"
-    cart.placed_at = timezone.now()
+    # 4) Write the cart to the DB, then customer info + payment + order number
+    #    + total in one conditional UPDATE
+    order = cart.materialize(**_order_fields(customer))
+    order, _ = place_order(order.id, payment_method="CASH", is_paid=False, **_order_fields(customer))
 
-    # 6) Generate order number BEFORE saving
-    cart.ensure_order_number()
-
-    # 7) Save everything in one DB save
-    cart.save(update_fields=[
-        "full_name", "phone", "address_line", "postal_code", "city",
-        "payment_method", "is_paid", "status", "placed_at", "order_number"
-    ])
-
-    # 8) Clear session cart (new cart next time)
-    request.session.pop("cart_id", None)
+    # 5) Clear session cart (new cart next time)
+    cart.clear()
 
     # ✅ Option A (recommended): redirect to success page that shows order number
-    return redirect("order_success", order_number=cart.order_number)
+    return redirect("order_success", order_number=order.order_number)
 
     # ✅ Option B (if you prefer redirect home):
-    # messages.success(request, f"✅ Bestellung aufgegeben! Bestellnummer: {cart.order_number}")
+    # messages.success(request, f"✅ Bestellung aufgegeben! Bestellnummer: {order.order_number}")
     # return redirect("home")
 
 
 # Order success and track order views
+def _eta(tracked):
+    """Kitchen ETA while the order is placed/being prepared (in-process queue)."""
+    if tracked is None or tracked.status not in KITCHEN_STATUSES:
+        return None
+    return get_eta(tracked.order_number)
+
+
 def order_success(request, order_number):
-    order = get_object_or_404(Order, order_number=order_number)
-    return render(request, "order_success.html", {"order": order})
+    tracked = get_tracked_order(order_number)
+    if tracked is None:
+        raise Http404("Bestellung nicht gefunden.")
+    return render(request, "order_success.html", {"tracked": tracked, "eta": _eta(tracked)})
 
 
 
 def track_order(request):
-    order = None
+    tracked = None
     error = None
 
     if request.method == "POST":
         order_number = (request.POST.get("order_number") or "").strip()
-        order = Order.objects.filter(order_number=order_number).first()
-        if not order:
+        tracked = get_tracked_order(order_number)
+        if not tracked:
             error = "Bestellnummer nicht gefunden. Bitte prüfen Sie die Nummer und versuchen Sie es erneut."
 
-    return render(request, "track_order.html", {"order": order, "error": error})
+    return render(request, "track_order.html", {"tracked": tracked, "eta": _eta(tracked), "error": error})
+
+
+def order_status_json(request, order_number):
+    """Polled by the tracking pages; served from the tracking cache."""
+    tracked = get_tracked_order(order_number)
+    if tracked is None:
+        return JsonResponse({"ok": False, "message": "Bestellung nicht gefunden."}, status=404)
+    eta = _eta(tracked)
+    return JsonResponse({**tracked.as_json(), **(eta.as_json() if eta else {"eta": None, "eta_minutes": None})})
 
 # Table Reservation view
 @require_POST
 def create_reservation(request):
     form = TableReservationForm(request.POST)
-    if form.is_valid():
-        form.save()
+    if not form.is_valid():
+        errors = form.non_field_errors()
+        messages.error(
+            request,
+            errors[0] if errors else "Bitte prüfen Sie Ihre Eingaben. Die Reservierung konnte nicht gesendet werden.",
+        )
+        return redirect("home")
+
+    try:
+        # re-checks capacity under a per-day lock: concurrent requests can't overbook
+        reserve(**form.cleaned_data)
+    except SlotUnavailable as e:
+        alternatives = ", ".join(e.alternatives[:6])
+        messages.error(
+            request,
+            f"{e} Noch frei: {alternatives} Uhr." if alternatives else f"{e} An diesem Tag sind wir leider ausgebucht.",
+        )
+    except ReservationError as e:
+        messages.error(request, str(e))
+    else:
         messages.success(
             request,
             "Ihre Reservierungsanfrage wurde gesendet. Wir melden uns zur Bestätigung. Vielen Dank!"
         )
-    else:
-        messages.error(request, "Bitte prüfen Sie Ihre Eingaben. Die Reservierung konnte nicht gesendet werden.")
-    return redirect("home")
\ No newline at end of file
+    return redirect("home")
+
+
+def reservation_availability(request):
+    """GET date=YYYY-MM-DD, people=N -> free start times (in-memory day index, see reservations.py)."""
+    try:
+        day = date.fromisoformat(request.GET.get("date", ""))
+        people = int(request.GET.get("people", "2"))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid date or people"}, status=400)
+    return JsonResponse({
+        "success": True,
+        "date": day.isoformat(),
+        "people": people,
+        "slots": available_slots(day, people),
+    })
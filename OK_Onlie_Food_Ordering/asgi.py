@@ -3,6 +3,10 @@ ASGI config for OK_Onlie_Food_Ordering project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve through an ASGI server (e.g. ``uvicorn OK_Onlie_Food_Ordering.asgi:application``)
+so the dashboard's live order stream (``/dashboard/stream/``) can stay open
+without occupying a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,7 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'FoodOrdering.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'FoodOrdering.static_assets.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,11 +62,17 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Instrumentation (FoodOrdering/instrumentation.py): requests slower than this
+# are logged with their top queries; the sample rate thins out the log.
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_SAMPLE_RATE = 1.0
+
 ROOT_URLCONF = 'OK_Onlie_Food_Ordering.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates + render timing for Server-Timing (FoodOrdering/instrumentation.py)
+        'BACKEND': 'FoodOrdering.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],  # global templates
         'APP_DIRS': True,
         'OPTIONS': {
@@ -83,18 +92,117 @@ WSGI_APPLICATION = 'OK_Onlie_Food_Ordering.wsgi.application'
 STRIPE_SECRET_KEY = "sk_live_or_test_..."
 STRIPE_PUBLISHABLE_KEY = "pk_live_or_test_..."
 STRIPE_WEBHOOK_SECRET = "whsec_..."
+STRIPE_TIMEOUT = (3.05, 10)  # (connect, read) seconds per Stripe call
+STRIPE_MAX_NETWORK_RETRIES = 1
+# "FoodOrdering.payments.FakeGateway" for tests/load tests (no network)
+PAYMENT_GATEWAY = "FoodOrdering.payments.StripeGateway"
+
+# Kitchen ETA model (FoodOrdering/kitchen.py)
+KITCHEN_STATIONS = 2  # orders cooked in parallel
+KITCHEN_BASE_SECONDS = 180  # per order: packing, handover
+KITCHEN_DEFAULT_ITEM_SECONDS = 240  # per unit of a product without history yet
+KITCHEN_LEARNING_RATE = 0.2
+KITCHEN_MAX_SAMPLE_SECONDS = 2 * 60 * 60  # longer = status updated late, not learned from
+
+# Table reservations (FoodOrdering/reservations.py)
+RESERVATION_TABLES = {2: 4, 4: 6, 6: 2, 8: 1}  # seats -> number of tables
+RESERVATION_SLOT_MINUTES = 30
+RESERVATION_DURATION_MINUTES = 120  # how long a booked table is blocked
+RESERVATION_LAST_SEATING_MINUTES = 60  # before closing
+RESERVATION_MAX_DAYS_AHEAD = 60
+# weekday (Mon=0) -> (open, close), see the opening hours on the homepage
+RESERVATION_HOURS = {
+    0: ("11:00", "22:00"),
+    1: ("11:00", "22:00"),
+    2: ("11:00", "22:00"),
+    3: ("11:00", "22:00"),
+    4: ("11:00", "22:00"),
+    5: ("11:00", "22:00"),
+    6: ("11:00", "20:30"),
+}
 
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Chosen by environment:
+#   DB_ENGINE=sqlite (default): single file, WAL mode - readers don't block the
+#     writer, writers wait (busy timeout) instead of failing with "database is
+#     locked". Fine for one server with a few workers. WAL is switched on per
+#     connection (FoodOrdering/signals.py) and then stored in the file, so the
+#     sample db.sqlite3 tracked in git keeps its rollback journal: deploy with
+#     SQLITE_PATH pointing elsewhere, or set SQLITE_WAL=1.
+#   DB_ENGINE=postgres: DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT;
+#     persistent connections (DB_CONN_MAX_AGE seconds) or, with DB_POOL=1, a
+#     psycopg connection pool of DB_POOL_SIZE per process.
+
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgres":
+    DB_POOL = os.environ.get("DB_POOL") == "1"
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("DB_NAME", "omran_kebab"),
+            'USER': os.environ.get("DB_USER", "omran_kebab"),
+            'PASSWORD': os.environ.get("DB_PASSWORD", ""),
+            'HOST': os.environ.get("DB_HOST", "localhost"),
+            'PORT': os.environ.get("DB_PORT", "5432"),
+            # the pool replaces persistent connections (Django requires 0 with it)
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {'min_size': 2, 'max_size': int(os.environ.get("DB_POOL_SIZE", "10"))},
+            } if DB_POOL else {},
+        }
     }
-}
+else:
+    SQLITE_SAMPLE_DB = BASE_DIR / 'db.sqlite3'
+    SQLITE_WAL = os.environ.get("SQLITE_WAL") == "1"
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("SQLITE_PATH", SQLITE_SAMPLE_DB),
+            'OPTIONS': {
+                # take the write lock at BEGIN, so a transaction never fails on
+                # a read -> write lock upgrade; waiting is bounded by `timeout`
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+                'init_command': (
+                    'PRAGMA synchronous=NORMAL;'  # safe with WAL, fsync only at checkpoints
+                    'PRAGMA mmap_size=134217728;'  # 128 MB
+                    'PRAGMA cache_size=-20000;'  # 20 MB
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+            # tests use a real file (WAL needs one; see ConcurrencyTests)
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+
+# Cache
+# Menu/kitchen/tracking caches are versioned through the Django cache, so
+# several worker processes need a shared one:
+#   REDIS_URL set (pip install redis): one Redis cache for all processes;
+#     sessions (cart + badge count) are read from it and the DB is only the
+#     write-through store, so cart pages don't query django_session.
+#   unset: per-process LocMemCache (single process / development); sessions
+#     stay in the DB (one query per request), since a per-process cache would
+#     serve other workers' stale carts.
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
 
 # Password validation
@@ -133,6 +241,22 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Outside DEBUG, collectstatic builds hashed + gzip/brotli-compressed files and
+# a manifest (FoodOrdering/static_assets.py); run it on every deploy.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "FoodOrdering.static_assets.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+
+# Serve STATIC_ROOT from the app with far-future caching (no reverse proxy in front)
+SERVE_STATIC = os.environ.get("SERVE_STATIC", "0" if DEBUG else "1") == "1"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 